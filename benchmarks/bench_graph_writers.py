@@ -0,0 +1,191 @@
+"""
+Benchmark du débit d'écriture du graphe: traversées Gremlin et lots openCypher (UNWIND)
+
+Mesure le nombre de chunks écrits par seconde (chunk, arête HAS_CHUNK, annotations
+et arêtes ABOUT vers les topics du chunk) :
+- avec NeptuneClient (Gremlin), en écritures bloquantes puis asynchrones pour chaque taille de pool
+- avec OpenCypherWriter, pour chaque taille de lot
+
+Sans --endpoint, des serveurs de substitution sont démarrés localement: le serveur
+Gremlin de bench_neptune_writes.py et un serveur HTTP openCypher qui décode le
+formulaire (query, parameters), attend --latency-ms plus --row-cost-us par ligne
+du lot (coût d'exécution simulé) et répond par un résultat vide.
+
+Usage:
+    python benchmarks/bench_graph_writers.py
+    python benchmarks/bench_graph_writers.py --chunks 5000 --batch-sizes 100 1000 --latency-ms 5
+    python benchmarks/bench_graph_writers.py --endpoint localhost --port 8182
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from neptune_client import NeptuneClient
+from opencypher_writer import OpenCypherWriter
+from bench_neptune_writes import GremlinStandIn, _synthetic_chunks
+
+
+class OpenCypherStandIn:
+    """Serveur HTTP openCypher minimal répondant par un résultat vide"""
+
+    def __init__(self, port: int = 0, latency_ms: float = 2.0, row_cost_us: float = 20.0):
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.row_cost = row_cost_us / 1e6
+        self.requests = 0
+        self.rows = 0
+        self._server = None
+
+    def start(self):
+        """Démarre le serveur dans un thread dédié"""
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                parameters = json.loads(form.get("parameters", ["{}"])[0])
+                rows = len(parameters.get("rows", ()))
+
+                standin.requests += 1
+                standin.rows += rows
+                time.sleep(standin.latency + rows * standin.row_cost)
+
+                body = b'{"results": []}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _chunk_topics(chunks, topics_per_chunk: int):
+    """Relations ABOUT synthétiques (topics partagés entre chunks)"""
+    return [
+        (chunk["id"], f"bench_topic_{(i + k) % 50:02d}", "ABOUT")
+        for i, chunk in enumerate(chunks)
+        for k in range(topics_per_chunk)
+    ]
+
+
+def _write(client, chunks, relationships) -> float:
+    """Écrit le document, les topics, les chunks et les relations; retourne le débit en chunks par seconde"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.connect()
+        client.insert_document("bench", "Benchmark", "bench.pdf")
+        client.merge_topics({f"bench_topic_{k:02d}": {"name": f"topic {k}", "type": "bench"} for k in range(50)})
+        client.flush()
+
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        client.insert_chunk(chunk)
+    client.flush()
+    client.create_relationships(relationships)
+    client.flush()
+    duration = time.perf_counter() - t0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.close()
+    return len(chunks) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des writers de graphe (Gremlin, openCypher)")
+    parser.add_argument('--endpoint', type=str, help="Serveur à utiliser (défaut: serveurs de substitution locaux)")
+    parser.add_argument('--port', type=int, default=8182, help="Port du serveur")
+    parser.add_argument('--chunks', type=int, default=2000, help="Nombre de chunks écrits par mesure")
+    parser.add_argument('--topics-per-chunk', type=int, default=2, help="Arêtes ABOUT par chunk")
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 8], help="Tailles de pool Gremlin mesurées")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500, 1000],
+                        help="Tailles de lot openCypher mesurées")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="Latence par requête des serveurs de substitution")
+    parser.add_argument('--row-cost-us', type=float, default=20.0,
+                        help="Coût par ligne d'un lot openCypher du serveur de substitution")
+    parser.add_argument('--annotation-mode', default="properties", help="Mode de stockage des annotations")
+    parser.add_argument('--json', type=str, help="Fichier de sortie JSON des mesures")
+    args = parser.parse_args()
+
+    gremlin_standin, cypher_standin = None, None
+    gremlin_port = cypher_port = args.port
+    endpoint = args.endpoint
+    if endpoint is None:
+        gremlin_standin = GremlinStandIn(latency_ms=args.latency_ms)
+        gremlin_standin.start()
+        cypher_standin = OpenCypherStandIn(latency_ms=args.latency_ms, row_cost_us=args.row_cost_us)
+        cypher_standin.start()
+        endpoint, gremlin_port, cypher_port = "127.0.0.1", gremlin_standin.port, cypher_standin.port
+        print(f"Serveurs de substitution: ws://{endpoint}:{gremlin_port}/gremlin, "
+              f"http://{endpoint}:{cypher_port}/openCypher "
+              f"(latence {args.latency_ms} ms, {args.row_cost_us} µs par ligne openCypher)\n")
+
+    chunks = _synthetic_chunks(args.chunks)
+    relationships = _chunk_topics(chunks, args.topics_per_chunk)
+    results = {"gremlin": {}, "opencypher": {}}
+
+    try:
+        print("=== gremlin ===")
+        baseline = _write(NeptuneClient(endpoint, port=gremlin_port, use_iam=False,
+                                        annotation_mode=args.annotation_mode, store_content=False,
+                                        pool_size=1, serializer="graphbinary"),
+                          chunks, relationships)
+        results["gremlin"]["blocking"] = baseline
+        print(f"  {'bloquant, pool 1':<24} {baseline:10.0f} chunks/s")
+        for pool_size in args.pool_sizes:
+            rate = _write(NeptuneClient(endpoint, port=gremlin_port, use_iam=False,
+                                        annotation_mode=args.annotation_mode, store_content=False,
+                                        pool_size=pool_size, serializer="graphbinary",
+                                        max_in_flight=pool_size * 4),
+                          chunks, relationships)
+            results["gremlin"][f"async_pool_{pool_size}"] = rate
+            print(f"  {f'asynchrone, pool {pool_size}':<24} {rate:10.0f} chunks/s (x{rate / baseline:.1f})")
+
+        print("\n=== opencypher ===")
+        for batch_size in args.batch_sizes:
+            rate = _write(OpenCypherWriter(endpoint, port=cypher_port, use_iam=False,
+                                           annotation_mode=args.annotation_mode, store_content=False,
+                                           batch_size=batch_size),
+                          chunks, relationships)
+            results["opencypher"][f"batch_{batch_size}"] = rate
+            print(f"  {f'UNWIND, lot {batch_size}':<24} {rate:10.0f} chunks/s (x{rate / baseline:.1f})")
+        print()
+    finally:
+        if gremlin_standin is not None:
+            gremlin_standin.stop()
+        if cypher_standin is not None:
+            cypher_standin.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Mesures exportées: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Benchmark du débit d'écriture de NeptuneClient selon la taille du pool de connexions
+
+Mesure le nombre de chunks écrits par seconde (un chunk = vertex Chunk, arête
+HAS_CHUNK et annotations, en une requête) :
+- en écritures bloquantes (comportement historique: une requête en cours)
+- en écritures asynchrones pour chaque taille de pool
+- pour chaque sérialiseur (GraphSON v3, GraphBinary v1)
+
+Sans --endpoint, un serveur Gremlin de substitution est démarré localement: il
+décode les requêtes WebSocket, attend --latency-ms (latence réseau et d'exécution
+simulée) et répond par un résultat vide. Avec --endpoint, les écritures sont
+envoyées à un vrai Gremlin Server (ex: docker run -p 8182:8182 tinkerpop/gremlin-server).
+
+Usage:
+    python benchmarks/bench_neptune_writes.py
+    python benchmarks/bench_neptune_writes.py --chunks 2000 --pool-sizes 1 4 16 --latency-ms 5
+    python benchmarks/bench_neptune_writes.py --endpoint localhost --port 8182
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from neptune_client import NeptuneClient
+
+
+class GremlinStandIn:
+    """Serveur Gremlin minimal (WebSocket, GraphSON v3 et GraphBinary v1) répondant par un résultat vide"""
+
+    def __init__(self, port: int = 0, latency_ms: float = 2.0):
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._loop = None
+        self._runner = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """Démarre le serveur dans un thread dédié"""
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self):
+        from aiohttp import web
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get("/gremlin", self._handle)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            data = message.data
+            mime_length = data[0]
+            mime_type = data[1:1 + mime_length]
+            body = data[1 + mime_length:]
+
+            if b"graphbinary" in mime_type:
+                # Version (0x81) suivie de l'identifiant de requête (UUID, 16 octets)
+                request_id = body[1:17]
+                response = (b"\x81" + b"\x00" + request_id + struct.pack(">i", 200) + b"\x01"
+                            + struct.pack(">i", 0) + struct.pack(">i", 0)
+                            + b"\x09\x00" + struct.pack(">i", 0))
+            else:
+                request_id = json.loads(body)["requestId"]["@value"]
+                response = json.dumps({
+                    "requestId": request_id,
+                    "status": {"code": 200, "message": "", "attributes": {}},
+                    "result": {"data": {"@type": "g:List", "@value": []}, "meta": {}}
+                }).encode("utf-8")
+
+            self.requests += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            await ws.send_bytes(response)
+        return ws
+
+
+def _synthetic_chunks(count: int):
+    """Chunks de taille réaliste (contenu ~500 caractères, 4 annotations)"""
+    chunks = []
+    for i in range(count):
+        chunks.append({
+            "id": f"bench_chunk_{i:06d}",
+            "document_id": "bench",
+            "content": ("Architecture de la data fabric et pipeline d'ingestion. " * 9)[:500],
+            "metadata": {"page": i // 10 + 1, "type": "TextItem"},
+            "annotations": [
+                {"type": "element_type", "value": "TextItem", "context": "Ce contenu est de type TextItem"},
+                {"type": "location", "value": f"page_{i // 10 + 1}",
+                 "context": f"Ce contenu se trouve à la page {i // 10 + 1}"},
+                {"type": "length", "value": "long", "context": "Ce contenu est de longueur long"},
+                {"type": "keywords", "value": "architecture, pipeline",
+                 "context": "Contient les concepts: architecture, pipeline"},
+            ]
+        })
+    return chunks
+
+
+def _measure(endpoint: str, port: int, chunks, pool_size: int, serializer: str,
+             max_in_flight: int, annotation_mode: str) -> float:
+    """Écrit les chunks et retourne le débit en chunks par seconde"""
+    client = NeptuneClient(endpoint, port=port, use_iam=False, annotation_mode=annotation_mode,
+                           store_content=False, pool_size=pool_size, serializer=serializer,
+                           max_in_flight=max_in_flight)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.connect()
+        client.insert_document("bench", "Benchmark", "bench.pdf")
+        client.flush()
+
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        client.insert_chunk(chunk)
+    client.flush()
+    duration = time.perf_counter() - t0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.close()
+    return len(chunks) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du débit d'écriture Neptune")
+    parser.add_argument('--endpoint', type=str, help="Gremlin Server à utiliser (défaut: serveur de substitution local)")
+    parser.add_argument('--port', type=int, default=8182, help="Port du Gremlin Server")
+    parser.add_argument('--chunks', type=int, default=1000, help="Nombre de chunks écrits par mesure")
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16], help="Tailles de pool mesurées")
+    parser.add_argument('--serializers', nargs='+', default=list(NeptuneClient.SERIALIZERS),
+                        choices=NeptuneClient.SERIALIZERS, help="Sérialiseurs mesurés")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="Latence par requête du serveur de substitution")
+    parser.add_argument('--annotation-mode', default="properties", help="Mode de stockage des annotations")
+    parser.add_argument('--json', type=str, help="Fichier de sortie JSON des mesures")
+    args = parser.parse_args()
+
+    standin = None
+    endpoint, port = args.endpoint, args.port
+    if endpoint is None:
+        standin = GremlinStandIn(latency_ms=args.latency_ms)
+        standin.start()
+        endpoint, port = "127.0.0.1", standin.port
+        print(f"Serveur Gremlin de substitution: ws://{endpoint}:{port}/gremlin "
+              f"(latence {args.latency_ms} ms)\n")
+
+    chunks = _synthetic_chunks(args.chunks)
+    results = {}
+
+    try:
+        for serializer in args.serializers:
+            print(f"=== {serializer} ===")
+            baseline = _measure(endpoint, port, chunks, 1, serializer, 0, args.annotation_mode)
+            results[serializer] = {"blocking": baseline, "async": {}}
+            print(f"  {'bloquant, pool 1':<22} {baseline:10.0f} chunks/s")
+
+            for pool_size in args.pool_sizes:
+                rate = _measure(endpoint, port, chunks, pool_size, serializer,
+                                pool_size * 4, args.annotation_mode)
+                results[serializer]["async"][pool_size] = rate
+                print(f"  {f'asynchrone, pool {pool_size}':<22} {rate:10.0f} chunks/s "
+                      f"(x{rate / baseline:.1f})")
+            print()
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Mesures exportées: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
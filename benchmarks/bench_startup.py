@@ -0,0 +1,148 @@
+"""
+Benchmark du temps de démarrage des scripts d'ingestion et d'interrogation
+
+Mesure, dans des processus Python neufs :
+- le temps d'import de chaque module de src/
+- le temps de `query.py --help` et `ingestion.py --help`
+- optionnellement le temps jusqu'au premier chunk pour un PDF (--pdf)
+
+Le script retourne un code de sortie non nul si un budget est dépassé, pour
+détecter les régressions (ex: réintroduction d'un import lourd au chargement).
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --pdf data/input/document.pdf --max-first-chunk 120
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+MODULES = [
+    "embeddings",
+    "docling_processor",
+    "neptune_client",
+    "opencypher_writer",
+    "memory_graph",
+    "graph_store",
+    "opensearch_client",
+    "topic_extractor",
+    "query",
+    "ingestion",
+]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+"""
+
+FIRST_CHUNK_SNIPPET = """
+import sys, time
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+from docling_processor import DoclingProcessor
+processor = DoclingProcessor()
+document_data = processor.process_pdf({pdf!r})
+chunks = processor.create_chunks(document_data)
+print(time.perf_counter() - t0)
+"""
+
+
+def _run_python(code: str) -> float:
+    """Exécute un extrait dans un interpréteur neuf et retourne la durée mesurée par l'extrait"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, cwd=ROOT_DIR, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _run_wall(args) -> float:
+    """Exécute une commande et retourne sa durée totale (démarrage de l'interpréteur inclus)"""
+    t0 = time.perf_counter()
+    subprocess.run(args, capture_output=True, cwd=ROOT_DIR, check=True)
+    return time.perf_counter() - t0
+
+
+def _best_of(func, repeat: int) -> float:
+    return min(func() for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage des scripts")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre de mesures (meilleur temps retenu)")
+    parser.add_argument('--pdf', type=str, help="PDF pour mesurer le temps jusqu'au premier chunk")
+    parser.add_argument('--max-import', type=float, default=0.5,
+                        help="Budget d'import par module (secondes)")
+    parser.add_argument('--max-help', type=float, default=1.0,
+                        help="Budget pour `--help` (secondes, démarrage inclus)")
+    parser.add_argument('--max-first-chunk', type=float, default=None,
+                        help="Budget jusqu'au premier chunk (secondes)")
+    parser.add_argument('--json', type=str, help="Fichier de sortie JSON des mesures")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "help": {}}
+    failures = []
+
+    print("=== Temps d'import des modules ===")
+    for module in MODULES:
+        code = IMPORT_SNIPPET.format(src=SRC_DIR, module=module)
+        try:
+            duration = _best_of(lambda: _run_python(code), args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"✗ {module}: import impossible ({e.stderr.strip().splitlines()[-1]})")
+            continue
+        results["imports"][module] = duration
+        status = "✓" if duration <= args.max_import else "✗"
+        if duration > args.max_import:
+            failures.append(f"import {module}: {duration:.3f}s > {args.max_import}s")
+        print(f"{status} {module:<20} {duration * 1000:8.1f} ms")
+
+    print("\n=== Temps de `--help` ===")
+    for script in ("query.py", "ingestion.py"):
+        command = [sys.executable, os.path.join(SRC_DIR, script), "--help"]
+        try:
+            duration = _best_of(lambda: _run_wall(command), args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"✗ {script}: échec de --help")
+            continue
+        results["help"][script] = duration
+        status = "✓" if duration <= args.max_help else "✗"
+        if duration > args.max_help:
+            failures.append(f"{script} --help: {duration:.3f}s > {args.max_help}s")
+        print(f"{status} {script:<20} {duration * 1000:8.1f} ms")
+
+    if args.pdf:
+        print("\n=== Temps jusqu'au premier chunk ===")
+        code = FIRST_CHUNK_SNIPPET.format(src=SRC_DIR, pdf=os.path.abspath(args.pdf))
+        duration = _run_python(code)
+        results["first_chunk"] = duration
+        if args.max_first_chunk is not None and duration > args.max_first_chunk:
+            failures.append(f"premier chunk: {duration:.1f}s > {args.max_first_chunk}s")
+        print(f"  {os.path.basename(args.pdf)}: {duration:.2f} s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Mesures exportées: {args.json}")
+
+    if failures:
+        print("\n✗ Budgets dépassés:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+    print("\n✓ Tous les budgets sont respectés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Module pour le rendu et le stockage des annotations de chunks
+"""
+
+from typing import List, Dict, Any
+import hashlib
+
+
+# Types d'annotations, dans l'ordre de génération
+ANNOTATION_TYPES = ("element_type", "location", "length", "keywords")
+
+# Modes de stockage des annotations dans le graphe:
+# - vertices: un vertex Annotation par chunk et par annotation (comportement historique)
+# - properties: propriétés ann_<type> sur le vertex Chunk, sans vertex ni arête
+# - shared: vertices Annotation partagés entre chunks (un par couple type/valeur), comme les Topics
+ANNOTATION_MODES = ("vertices", "properties", "shared")
+
+# Préfixe des propriétés d'annotation sur le vertex Chunk (mode "properties")
+ANNOTATION_PROPERTY_PREFIX = "ann_"
+
+
+def render_annotation_context(annotation_type: str, value: str) -> str:
+    """
+    Construit la phrase de contexte d'une annotation à partir de son type et de sa valeur
+
+    Le contexte étant une fonction pure du couple (type, valeur), il n'a pas besoin
+    d'être stocké: il est recalculé à la lecture.
+
+    Args:
+        annotation_type: Type d'annotation (voir ANNOTATION_TYPES)
+        value: Valeur de l'annotation
+
+    Returns:
+        Phrase de contexte
+    """
+    if annotation_type == "element_type":
+        return f"Ce contenu est de type {value}"
+    if annotation_type == "location":
+        return f"Ce contenu se trouve à la page {value[len('page_'):] if value.startswith('page_') else value}"
+    if annotation_type == "length":
+        return f"Ce contenu est de longueur {value}"
+    if annotation_type == "keywords":
+        return f"Contient les concepts: {value}"
+    return f"{annotation_type}: {value}"
+
+
+def shared_annotation_id(annotation_type: str, value: str) -> str:
+    """
+    Identifiant d'un vertex Annotation partagé (mode "shared")
+
+    L'identifiant est l'empreinte du couple (type, valeur) exact: deux valeurs qui ne
+    diffèrent que par la casse, les accents ou la ponctuation ont des vertices distincts.
+
+    Args:
+        annotation_type: Type d'annotation
+        value: Valeur de l'annotation
+
+    Returns:
+        Identifiant stable, identique pour tous les chunks portant la même annotation
+    """
+    digest = hashlib.blake2b(f"{annotation_type}\x00{value}".encode('utf-8'), digest_size=16).hexdigest()
+    return f"ann_{annotation_type}_{digest}"
+
+
+def annotations_from_properties(properties: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Reconstruit les annotations d'un chunk à partir de ses propriétés (mode "properties")
+
+    Args:
+        properties: Propriétés du vertex Chunk (valeurs simples ou listes issues de valueMap)
+
+    Returns:
+        Liste d'annotations {type, value, context}, dans l'ordre de génération
+    """
+    annotations = []
+    for annotation_type in ANNOTATION_TYPES:
+        value = properties.get(ANNOTATION_PROPERTY_PREFIX + annotation_type)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value is None:
+            continue
+        annotations.append({
+            "type": annotation_type,
+            "value": value,
+            "context": render_annotation_context(annotation_type, value)
+        })
+    return annotations
@@ -0,0 +1,94 @@
+"""
+Module pour l'élimination des chunks strictement dupliqués avant embeddings
+"""
+
+from typing import List, Dict, Any, Tuple
+import hashlib
+import re
+
+
+class ChunkDeduplicator:
+    """Détecte les chunks au contenu identique (en-têtes, pieds de page, mentions légales...)"""
+
+    MODES = ("drop", "reference")
+
+    def __init__(self, mode: str = "reference"):
+        """
+        Initialise le dédoublonneur
+
+        Args:
+            mode: "drop" supprime les doublons, "reference" les conserve comme
+                  simples références (id + page) sur le chunk canonique
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de déduplication inconnu: {mode} (attendu: {', '.join(self.MODES)})")
+
+        self.mode = mode
+
+    def normalize(self, content: str) -> str:
+        """
+        Normalise le contenu d'un chunk avant hachage
+
+        Args:
+            content: Contenu textuel du chunk
+
+        Returns:
+            Contenu en minuscules avec les espaces compactés
+        """
+        return re.sub(r'\s+', ' ', content).strip().lower()
+
+    def content_hash(self, content: str) -> str:
+        """
+        Calcule l'empreinte du contenu normalisé
+
+        Args:
+            content: Contenu textuel du chunk
+
+        Returns:
+            Empreinte hexadécimale
+        """
+        return hashlib.blake2b(self.normalize(content).encode('utf-8'), digest_size=16).hexdigest()
+
+    def deduplicate(self, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Élimine les chunks dupliqués en conservant la première occurrence
+
+        Args:
+            chunks: Liste de chunks issue de create_chunks
+
+        Returns:
+            Tuple (chunks uniques, statistiques de déduplication)
+        """
+        canonical_by_hash = {}
+        unique_chunks = []
+        duplicate_count = 0
+        duplicated_hashes = set()
+
+        for chunk in chunks:
+            digest = self.content_hash(chunk['content'])
+            canonical = canonical_by_hash.get(digest)
+
+            if canonical is None:
+                canonical_by_hash[digest] = chunk
+                unique_chunks.append(chunk)
+                continue
+
+            duplicate_count += 1
+            duplicated_hashes.add(digest)
+
+            if self.mode == "reference":
+                # Référence légère: seul l'identifiant et la page du doublon sont conservés
+                canonical['metadata'].setdefault('duplicates', []).append({
+                    "id": chunk['id'],
+                    "page": chunk['metadata']['page']
+                })
+
+        stats = {
+            "mode": self.mode,
+            "chunks_total": len(chunks),
+            "chunks_unique": len(unique_chunks),
+            "duplicates_removed": duplicate_count,
+            "duplicated_contents": len(duplicated_hashes)
+        }
+
+        return unique_chunks, stats
@@ -0,0 +1,211 @@
+"""
+Module pour la représentation compacte des chunks en mémoire
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import sys
+
+from annotations import render_annotation_context
+
+
+class ChunkAnnotation:
+    """Annotation d'un chunk (type, valeur); le contexte est construit à la lecture"""
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, annotation_type: str, value: str):
+        self.type = annotation_type
+        self.value = value
+
+    @property
+    def context(self) -> str:
+        """Phrase de contexte de l'annotation"""
+        return render_annotation_context(self.type, self.value)
+
+    def keys(self):
+        return ("type", "value", "context")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.keys() else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Annotation sous forme de dictionnaire {type, value, context}"""
+        return {"type": self.type, "value": self.value, "context": self.context}
+
+
+class ChunkMetadata:
+    """Vue dictionnaire sur les métadonnées d'un ChunkRecord (sans copie)"""
+
+    __slots__ = ("_record",)
+
+    def __init__(self, record: "ChunkRecord"):
+        self._record = record
+
+    def keys(self) -> List[str]:
+        record = self._record
+        keys = ["page", "type", "bbox", "length"]
+        if record.elements is not None:
+            keys.append("elements")
+        if record.tokens is not None:
+            keys.append("tokens")
+        if record.extra:
+            keys.extend(record.extra)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        record = self._record
+        if key == "length":
+            return record.length
+        if key in ("page", "type", "bbox"):
+            return getattr(record, key)
+        if key == "elements" and record.elements is not None:
+            return record.elements
+        if key == "tokens" and record.tokens is not None:
+            return record.tokens
+        if record.extra and key in record.extra:
+            return record.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        """Valeur d'une métadonnée; les métadonnées additionnelles (ex: duplicates) sont créées à la demande"""
+        try:
+            return self[key]
+        except KeyError:
+            record = self._record
+            if record.extra is None:
+                record.extra = {}
+            return record.extra.setdefault(key, default)
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+class ChunkRecord:
+    """
+    Chunk compact: attributs à slots, chaînes répétées internées, contenu stocké
+    sous forme d'offsets dans le texte de la page et annotations (type, valeur)
+    dont le contexte n'est construit qu'à la lecture.
+
+    L'accès par clé (chunk['content'], chunk['metadata']['page'], chunk.get('annotations'))
+    reste compatible avec l'ancienne représentation en dictionnaires; to_dict()
+    produit cette représentation pour les exports et les stores.
+    """
+
+    __slots__ = ("id", "document_id", "page", "type", "bbox", "elements", "tokens", "extra",
+                 "_page_text", "_start", "_end", "_content", "_annotations")
+
+    def __init__(self, chunk_id: str, document_id: str, content: str, page_number: int,
+                 element_type: str, bbox: Any = None, page_text: Optional[str] = None,
+                 annotations: List[Tuple[str, str]] = (), elements: List[Dict[str, Any]] = None,
+                 tokens: Optional[int] = None):
+        """
+        Initialise le chunk
+
+        Args:
+            chunk_id: Identifiant unique du chunk
+            document_id: Identifiant du document parent
+            content: Contenu textuel du chunk
+            page_number: Numéro de page
+            element_type: Type d'élément
+            bbox: Bounding box de l'élément
+            page_text: Texte de la page (partagé entre ses chunks); si le contenu en est
+                       une sous-chaîne, seuls ses offsets sont conservés
+            annotations: Couples (type, valeur)
+            elements: Provenance des éléments regroupés
+            tokens: Nombre de tokens du contenu
+        """
+        self.id = chunk_id
+        self.document_id = sys.intern(document_id)
+        self.page = page_number
+        self.type = sys.intern(element_type)
+        self.bbox = bbox
+        self.elements = elements
+        self.tokens = tokens
+        self.extra = None
+
+        start = page_text.find(content) if page_text is not None else -1
+        if start >= 0:
+            self._page_text = page_text
+            self._start = start
+            self._end = start + len(content)
+            self._content = None
+        else:
+            self._page_text = None
+            self._start = 0
+            self._end = len(content)
+            self._content = content
+
+        self._annotations = tuple((sys.intern(t), sys.intern(v)) for t, v in annotations)
+
+    @property
+    def content(self) -> str:
+        """Contenu textuel du chunk"""
+        if self._content is not None:
+            return self._content
+        return self._page_text[self._start:self._end]
+
+    @property
+    def length(self) -> int:
+        """Longueur du contenu en caractères"""
+        return self._end - self._start
+
+    @property
+    def metadata(self) -> ChunkMetadata:
+        """Métadonnées (vue dictionnaire)"""
+        return ChunkMetadata(self)
+
+    @property
+    def annotations(self) -> List[ChunkAnnotation]:
+        """Annotations du chunk"""
+        return [ChunkAnnotation(t, v) for t, v in self._annotations]
+
+    _KEYS = ("id", "document_id", "content", "metadata", "annotations")
+
+    def keys(self):
+        return self._KEYS
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._KEYS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Représentation en dictionnaires imbriqués (format historique des chunks)
+
+        Returns:
+            Dictionnaire {id, document_id, content, metadata, annotations}
+        """
+        return {
+            "id": self.id,
+            "document_id": self.document_id,
+            "content": self.content,
+            "metadata": self.metadata.to_dict(),
+            "annotations": [annotation.to_dict() for annotation in self.annotations]
+        }
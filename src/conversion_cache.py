@@ -0,0 +1,168 @@
+"""
+Module pour le cache disque des documents convertis par Docling
+"""
+
+from typing import List, Dict, Any, Optional
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+
+def docling_version() -> str:
+    """Version de Docling installée (incluse dans les clés de cache)"""
+    try:
+        from importlib.metadata import version
+        return version("docling")
+    except Exception:
+        return "unknown"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier
+
+    Args:
+        path: Chemin du fichier
+        block_size: Taille des blocs lus
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Cache des documents et des pages extraits par Docling, indépendant des paramètres de chunking"""
+
+    def __init__(self, cache_dir: str = ".cache/docling"):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir: Dossier racine du cache
+        """
+        self.cache_dir = cache_dir
+        self.version = docling_version()
+        self.hits = 0
+        self.misses = 0
+
+    def document_key(self, pdf_path: str, options: Dict[str, Any]) -> str:
+        """
+        Calcule la clé d'un document converti
+
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            options: Options du pipeline de conversion
+
+        Returns:
+            Clé: empreinte du contenu du PDF, de la version de Docling et des options
+        """
+        payload = json.dumps({
+            "pdf": file_sha256(pdf_path),
+            "docling": self.version,
+            "options": options
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_document(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Lit un document converti depuis le cache
+
+        Args:
+            key: Clé calculée par document_key
+
+        Returns:
+            Données du document ({"pages", "metadata"}), ou None si absent
+        """
+        data = self._read(self._path("documents", key))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put_document(self, key: str, document_data: Dict[str, Any]):
+        """
+        Écrit un document converti dans le cache
+
+        Args:
+            key: Clé calculée par document_key
+            document_data: Document structuré issu de process_pdf
+        """
+        self._write(self._path("documents", key), {
+            "pages": document_data["pages"],
+            "metadata": document_data.get("metadata", {})
+        })
+
+    def page_key(self, page_hash: str, options: Dict[str, Any]) -> str:
+        """
+        Calcule la clé du résultat de conversion d'une page
+
+        Args:
+            page_hash: Empreinte du contenu de la page
+            options: Options du pipeline de conversion
+
+        Returns:
+            Clé: empreinte de la page, de la version de Docling et des options
+        """
+        payload = json.dumps({
+            "page": page_hash,
+            "docling": self.version,
+            "options": options
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_page(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Lit les éléments d'une page convertie depuis le cache
+
+        Args:
+            key: Clé calculée par page_key
+
+        Returns:
+            Liste d'éléments (éventuellement vide), ou None si absente
+        """
+        return self._read(self._path("pages", key))
+
+    def put_page(self, key: str, elements: List[Dict[str, Any]]):
+        """
+        Écrit les éléments d'une page convertie dans le cache
+
+        Args:
+            key: Clé calculée par page_key
+            elements: Éléments extraits de la page
+        """
+        self._write(self._path("pages", key), elements)
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], f"{key}.json.gz")
+
+    def _read(self, path: str) -> Optional[Any]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Entrée de cache illisible ignorée ({path}): {e}")
+            return None
+
+    def _write(self, path: str, data: Any):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Écriture atomique: plusieurs workers peuvent produire la même entrée
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,211 @@
+"""
+Module pour le pool de workers Docling préchauffés (partage copy-on-write des modèles)
+"""
+
+from typing import List, Dict, Any, Callable, Iterator
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+# Processeur Docling préchauffé dans le processus parent, hérité par les workers via fork
+_WARM_PROCESSOR = None
+
+
+def minimal_pdf_bytes(text: str = "Warmup") -> bytes:
+    """
+    Construit un PDF d'une page contenant une ligne de texte
+
+    Args:
+        text: Texte de la page (ASCII)
+
+    Returns:
+        Contenu binaire du PDF
+    """
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode("ascii")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length " + str(len(stream)).encode("ascii") + b" >>\nstream\n" + stream + b"\nendstream",
+    ]
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode("ascii")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+
+    return pdf
+
+
+def _memory_usage_mb() -> Dict[str, float]:
+    """
+    Mémoire du processus courant en Mo (Linux)
+
+    Le RSS compte les pages partagées avec le parent; le PSS les répartit entre
+    les processus qui les partagent et reflète donc le coût réel d'un worker.
+
+    Returns:
+        Dictionnaire {"rss_mb", "pss_mb"} (0 si indisponible)
+    """
+    usage = {"rss_mb": 0.0, "pss_mb": 0.0}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    usage["rss_mb"] = round(int(line.split()[1]) / 1024.0, 1)
+                elif line.startswith("Pss:"):
+                    usage["pss_mb"] = round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    return usage
+
+
+def _worker_init(torch_threads: int):
+    """Initialise un worker: limite les threads du runtime de calcul pour éviter la sursouscription"""
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+
+def _worker_process(pdf_path: str) -> Dict[str, Any]:
+    """Convertit un PDF dans un worker avec le processeur hérité du parent"""
+    t0 = time.perf_counter()
+    try:
+        document_data = _WARM_PROCESSOR.process_pdf(pdf_path)
+    except Exception as e:
+        # L'erreur est remontée au parent sans interrompre les autres conversions
+        return {"error": f"{type(e).__name__}: {e}", "source": pdf_path}
+
+    document_data["metadata"]["worker"] = {
+        "pid": os.getpid(),
+        "seconds": round(time.perf_counter() - t0, 3),
+        **_memory_usage_mb()
+    }
+    return document_data
+
+
+class ConverterPool:
+    """Pool de workers Docling forkés depuis un processus parent aux modèles préchauffés"""
+
+    def __init__(self, processor, workers: int = 2, recycle_after: int = 50,
+                 warmup: bool = True, torch_threads: int = 1):
+        """
+        Initialise le pool (les workers sont démarrés par start())
+
+        Args:
+            processor: DoclingProcessor à préchauffer dans le parent
+            workers: Nombre de processus workers
+            recycle_after: Nombre de documents avant remplacement d'un worker (limite les fuites)
+            warmup: Convertir un PDF minimal avant de forker pour charger tous les modèles
+            torch_threads: Threads de calcul par worker (0 = valeur par défaut du runtime)
+        """
+        self.processor = processor
+        self.workers = workers
+        self.recycle_after = recycle_after
+        self.warmup = warmup
+        self.torch_threads = torch_threads
+
+        self._pool = None
+        self.stats = {
+            "workers": workers,
+            "recycle_after": recycle_after,
+            "warmup_seconds": 0.0,
+            "parent_memory_mb": {},
+            "worker_memory_mb": {}
+        }
+
+    def start(self):
+        """Préchauffe les modèles dans le parent puis forke les workers"""
+        global _WARM_PROCESSOR
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Le pool de conversion nécessite la méthode de démarrage 'fork' (Linux/macOS)")
+
+        if self.warmup:
+            self._warmup()
+
+        _WARM_PROCESSOR = self.processor
+        self.stats["parent_memory_mb"] = _memory_usage_mb()
+
+        context = multiprocessing.get_context("fork")
+        self._pool = context.Pool(
+            processes=self.workers,
+            initializer=_worker_init,
+            initargs=(self.torch_threads,),
+            maxtasksperchild=self.recycle_after or None
+        )
+        print(f"✓ Pool Docling démarré: {self.workers} workers, recyclage tous les "
+              f"{self.recycle_after} documents (RSS parent: {self.stats['parent_memory_mb']['rss_mb']} Mo)")
+
+    def _warmup(self):
+        """Initialise les pipelines et charge les modèles en convertissant un PDF minimal"""
+        print("Préchauffage des modèles Docling...")
+        t0 = time.perf_counter()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            warmup_pdf = os.path.join(tmp_dir, "warmup.pdf")
+            with open(warmup_pdf, "wb") as f:
+                f.write(minimal_pdf_bytes())
+            self.processor.warmup(warmup_pdf)
+
+        self.stats["warmup_seconds"] = round(time.perf_counter() - t0, 2)
+        print(f"✓ Modèles préchauffés en {self.stats['warmup_seconds']} s")
+
+    def imap(self, pdf_paths: List[str], poll: Callable[[], Any] = None,
+             poll_interval: float = None) -> Iterator[Dict[str, Any]]:
+        """
+        Convertit des PDFs dans les workers, en conservant l'ordre des chemins
+
+        Args:
+            pdf_paths: Chemins vers les fichiers PDF
+            poll: Fonction appelée toutes les poll_interval secondes pendant l'attente d'une conversion
+            poll_interval: Intervalle d'appel de poll, en secondes
+
+        Yields:
+            document_data de chaque PDF (avec metadata["worker"]: pid, RSS, PSS, durée),
+            ou {"error", "source"} si la conversion a échoué
+        """
+        if self._pool is None:
+            self.start()
+
+        results = self._pool.imap(_worker_process, pdf_paths)
+        while True:
+            try:
+                document_data = results.next(poll_interval) if poll else next(results)
+            except multiprocessing.TimeoutError:
+                poll()
+                continue
+            except StopIteration:
+                return
+
+            if "error" not in document_data:
+                worker = document_data["metadata"]["worker"]
+                self.stats["worker_memory_mb"][worker["pid"]] = {
+                    "rss_mb": worker["rss_mb"],
+                    "pss_mb": worker["pss_mb"]
+                }
+            yield document_data
+
+    def close(self):
+        """Arrête les workers"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+        for pid, usage in sorted(self.stats["worker_memory_mb"].items()):
+            print(f"  Worker Docling {pid}: RSS {usage['rss_mb']} Mo, PSS {usage['pss_mb']} Mo")
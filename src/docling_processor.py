@@ -2,28 +2,175 @@
 Module pour le traitement des documents PDF avec Docling
 """
 
-from docling.document_converter import DocumentConverter
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
 import os
+import time
+
+from chunk_record import ChunkRecord
+from conversion_cache import ConversionCache
+from keyword_annotator import KeywordAnnotator
+from token_splitter import TokenSplitter
+
+
+# Profils de conversion: du plus rapide (couche texte native) au plus complet (OCR + tables)
+# La structure de tables reste active dans tous les profils: sans elle, Docling retourne des
+# tables sans cellules et leur texte disparaîtrait de l'index
+CONVERSION_PROFILES = {
+    "fast": {"do_ocr": False, "do_table_structure": True, "table_mode": "fast", "backend": "pypdfium2"},
+    "standard": {"do_ocr": False, "do_table_structure": True, "table_mode": "fast", "backend": "docling_parse"},
+    "full": {"do_ocr": True, "do_table_structure": True, "table_mode": "accurate", "backend": "docling_parse"},
+}
+
+# Stratégies de chunking
+CHUNK_STRATEGIES = ("element", "packed")
+
+# Unités de mesure de chunk_size, chunk_overlap et min_chunk_size
+CHUNK_UNITS = ("characters", "tokens")
+
+# Types d'éléments Docling qui ouvrent une nouvelle section (jamais regroupés avec la section précédente)
+SECTION_ELEMENT_TYPES = ("TitleItem", "SectionHeaderItem")
+
+# Processeur utilisé par les workers de conversion par plages (hérité via fork, voir start_shard_pool)
+_SHARD_PROCESSOR = None
+
+
+def _convert_shard(args: Tuple[str, Tuple[int, int], str]) -> Dict[int, List[Dict[str, Any]]]:
+    """Convertit une plage de pages dans un worker"""
+    pdf_path, page_range, profile = args
+    return _SHARD_PROCESSOR._convert_range(pdf_path, page_range, profile)
 
 
 class DoclingProcessor:
     """Traite les documents PDF avec Docling et génère des chunks"""
     
-    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, min_chunk_size: int = 100):
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, min_chunk_size: int = 100,
+                 shard_page_threshold: int = 0, shard_size: int = 50, shard_workers: int = 4,
+                 cache: ConversionCache = None, auto_profile: bool = False,
+                 default_profile: str = "full", profile_overrides: List[Dict[str, str]] = None,
+                 text_min_chars: int = 100, probe_pages: int = 3, page_cache: bool = False,
+                 page_hash_scale: float = 0.25, chunk_strategy: str = "element",
+                 chunk_unit: str = "characters", tokenizer: str = None,
+                 keyword_annotator: KeywordAnnotator = None):
         """
         Initialise le processeur Docling
         
         Args:
-            chunk_size: Taille maximale d'un chunk en caractères
+            chunk_size: Taille maximale d'un chunk (en caractères ou en tokens, voir chunk_unit)
             chunk_overlap: Chevauchement entre chunks
             min_chunk_size: Taille minimale d'un chunk
+            shard_page_threshold: Nombre de pages à partir duquel un PDF est découpé en
+                                  plages converties en parallèle (0 = jamais)
+            shard_size: Nombre de pages par plage
+            shard_workers: Nombre de processus de conversion des plages
+            cache: Cache disque des documents convertis (None = pas de cache)
+            auto_profile: Choisir le profil de conversion en sondant la couche texte du PDF
+            default_profile: Profil utilisé sans sondage (ou si le sondage échoue)
+            profile_overrides: Profils imposés par motif de chemin ([{"pattern", "profile"}])
+            text_min_chars: Caractères par page à partir desquels la couche texte est exploitable
+            probe_pages: Nombre de pages sondées
+            page_cache: Mettre en cache les résultats de conversion par page (nécessite cache)
+            page_hash_scale: Échelle du rendu utilisé pour l'empreinte des pages
+            chunk_strategy: "element" (un chunk par élément Docling) ou "packed"
+                            (éléments consécutifs d'une même section regroupés jusqu'à chunk_size)
+            chunk_unit: "characters" ou "tokens" (tokens du tokenizer du modèle d'embeddings)
+            tokenizer: Identifiant Hugging Face ou chemin du tokenizer (requis si chunk_unit="tokens")
+            keyword_annotator: Détecteur des mots-clés de l'annotation "keywords"
+                               (défaut: vocabulaire historique, sans cache disque)
         """
-        # Configuration avec layout detection (télécharge les modèles au premier lancement)
-        self.converter = DocumentConverter()
+        if chunk_strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"Stratégie de chunking inconnue: {chunk_strategy} "
+                             f"(attendu: {', '.join(CHUNK_STRATEGIES)})")
+        
+        for profile in [default_profile] + [o["profile"] for o in profile_overrides or []]:
+            if profile not in CONVERSION_PROFILES:
+                raise ValueError(f"Profil de conversion inconnu: {profile} "
+                                 f"(attendu: {', '.join(CONVERSION_PROFILES)})")
+        
+        if chunk_unit not in CHUNK_UNITS:
+            raise ValueError(f"Unité de chunking inconnue: {chunk_unit} (attendu: {', '.join(CHUNK_UNITS)})")
+        if chunk_unit == "tokens" and not tokenizer:
+            raise ValueError("chunk_unit='tokens' nécessite un tokenizer")
+        
+        # Les convertisseurs (et leurs modèles de layout) sont créés au premier usage, par profil
+        self._converters = {}
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.min_chunk_size = min_chunk_size
+        self.shard_page_threshold = shard_page_threshold
+        self.shard_size = shard_size
+        self.shard_workers = shard_workers
+        self.cache = cache
+        self.auto_profile = auto_profile
+        self.default_profile = default_profile
+        self.profile_overrides = profile_overrides or []
+        self.text_min_chars = text_min_chars
+        self.probe_pages = probe_pages
+        self.page_cache = page_cache
+        self.page_hash_scale = page_hash_scale
+        self.chunk_strategy = chunk_strategy
+        self.chunk_unit = chunk_unit
+        self.keyword_annotator = keyword_annotator or KeywordAnnotator(cache_dir=None)
+        self._shard_pool = None
+        self.token_splitter = None
+        if chunk_unit == "tokens":
+            self.token_splitter = TokenSplitter(tokenizer, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    
+    @property
+    def converter(self):
+        """Convertisseur Docling du profil par défaut, créé au premier usage"""
+        return self._get_converter(self.default_profile)
+    
+    def _get_converter(self, profile: str):
+        """
+        Retourne le convertisseur Docling d'un profil, créé au premier usage
+        
+        Args:
+            profile: Nom du profil (voir CONVERSION_PROFILES)
+            
+        Returns:
+            DocumentConverter configuré pour ce profil
+        """
+        if profile not in self._converters:
+            # Configuration avec layout detection (télécharge les modèles au premier lancement)
+            from docling.document_converter import DocumentConverter, PdfFormatOption
+            from docling.datamodel.base_models import InputFormat
+            from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+            
+            spec = CONVERSION_PROFILES[profile]
+            pipeline_options = PdfPipelineOptions()
+            pipeline_options.do_ocr = spec["do_ocr"]
+            pipeline_options.do_table_structure = spec["do_table_structure"]
+            if spec["do_table_structure"]:
+                pipeline_options.table_structure_options.mode = (
+                    TableFormerMode.ACCURATE if spec["table_mode"] == "accurate" else TableFormerMode.FAST
+                )
+            
+            format_option = PdfFormatOption(pipeline_options=pipeline_options)
+            if spec["backend"] == "pypdfium2":
+                from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+                format_option = PdfFormatOption(pipeline_options=pipeline_options,
+                                                backend=PyPdfiumDocumentBackend)
+            
+            self._converters[profile] = DocumentConverter(format_options={InputFormat.PDF: format_option})
+        
+        return self._converters[profile]
+    
+    def warmup(self, pdf_path: str):
+        """
+        Charge les modèles de tous les profils utilisables en convertissant un PDF (sans cache)
+        
+        Args:
+            pdf_path: PDF de préchauffage (une page suffit)
+        """
+        for profile in self._usable_profiles():
+            self._get_converter(profile).convert(pdf_path)
+    
+    def _usable_profiles(self) -> List[str]:
+        """Profils de conversion que ce processeur peut choisir"""
+        profiles = set([self.default_profile] + [o["profile"] for o in self.profile_overrides])
+        if self.auto_profile:
+            profiles.update(CONVERSION_PROFILES)
+        return sorted(profiles)
         
     def process_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
@@ -36,22 +183,269 @@ class DoclingProcessor:
             Dictionnaire contenant le document structuré
         """
         print(f"Traitement du PDF: {pdf_path}")
+        t0 = time.perf_counter()
+        
+        probe = self._probe(pdf_path) if (self.auto_profile or self.shard_page_threshold) else {}
+        profile, reason = self.select_profile(pdf_path, probe)
+        
+        # Le chunking ne dépend pas de la conversion: un document déjà converti est relu du cache
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.document_key(pdf_path, self._pipeline_options(profile))
+            cached = self.cache.get_document(cache_key)
+            if cached is not None:
+                print("✓ Document converti relu depuis le cache")
+                document_data = self._build_document_data(pdf_path, {})
+                document_data["pages"] = cached["pages"]
+                document_data["metadata"]["conversion"] = {
+                    "profile": profile,
+                    "profile_reason": reason,
+                    "cache": "hit",
+                    "seconds": round(time.perf_counter() - t0, 3)
+                }
+                return document_data
+        
+        print(f"Profil de conversion: {profile} ({reason})")
+        conversion = {
+            "profile": profile,
+            "profile_reason": reason,
+            "cache": "miss" if cache_key else "disabled"
+        }
+        
+        if self.cache and self.page_cache:
+            page_texts = self._convert_with_page_cache(pdf_path, profile, conversion)
+        else:
+            page_texts = self._convert_document(pdf_path, profile, probe.get("pages", 0))
+        
+        document_data = self._build_document_data(pdf_path, page_texts)
+        
+        if cache_key:
+            self.cache.put_document(cache_key, document_data)
+        
+        conversion["seconds"] = round(time.perf_counter() - t0, 3)
+        document_data["metadata"]["conversion"] = conversion
+        return document_data
+    
+    def _convert_document(self, pdf_path: str, profile: str, page_count: int) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Convertit un document entier, par plages parallèles s'il est assez long
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            profile: Profil de conversion
+            page_count: Nombre de pages (0 si inconnu)
+            
+        Returns:
+            Dictionnaire {numéro de page: liste d'éléments}
+        """
+        if page_count >= self.shard_page_threshold > 0 and self._can_shard():
+            ranges = [(start, min(start + self.shard_size - 1, page_count))
+                      for start in range(1, page_count + 1, self.shard_size)]
+            return self._convert_shards(pdf_path, ranges, profile)
         
         # Conversion du PDF
-        result = self.converter.convert(pdf_path)
+        result = self._get_converter(profile).convert(pdf_path)
+        return self._extract_page_texts(result.document)
+    
+    def _convert_with_page_cache(self, pdf_path: str, profile: str,
+                                 conversion: Dict[str, Any]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Convertit uniquement les pages absentes du cache de pages
         
-        # Extraction des métadonnées
-        document_data = {
-            "id": os.path.splitext(os.path.basename(pdf_path))[0],
-            "title": os.path.basename(pdf_path),
-            "source": pdf_path,
-            "pages": [],
-            "metadata": {}
-        }
+        Chaque page est identifiée par l'empreinte de son rendu et de son texte: d'une
+        révision à l'autre d'un document, seules les pages modifiées passent par
+        l'analyse de layout.
         
-        # Extraction du contenu - l'API Docling retourne le document directement
-        doc = result.document
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            profile: Profil de conversion
+            conversion: Métadonnées de conversion, complétées avec les compteurs de pages
+            
+        Returns:
+            Dictionnaire {numéro de page: liste d'éléments}
+        """
+        options = self._pipeline_options(profile)
+        page_keys = {page_no: self.cache.page_key(page_hash, options)
+                     for page_no, page_hash in self._page_hashes(pdf_path).items()}
         
+        page_texts = {}
+        missing = []
+        for page_no, key in sorted(page_keys.items()):
+            elements = self.cache.get_page(key)
+            if elements is None:
+                missing.append(page_no)
+            elif elements:
+                page_texts[page_no] = elements
+        
+        conversion["pages_cached"] = len(page_keys) - len(missing)
+        conversion["pages_converted"] = len(missing)
+        
+        if not missing:
+            print(f"✓ {len(page_keys)} page(s) relue(s) depuis le cache de pages")
+            return page_texts
+        
+        if len(missing) == len(page_keys):
+            converted = self._convert_document(pdf_path, profile, len(page_keys))
+        else:
+            print(f"{len(page_keys) - len(missing)} page(s) inchangée(s) relue(s) du cache, "
+                  f"{len(missing)} page(s) à convertir")
+            ranges = self._page_ranges(missing)
+            if len(ranges) > 1 and self._can_shard():
+                converted = self._convert_shards(pdf_path, ranges, profile)
+            else:
+                converted = {}
+                for page_range in ranges:
+                    converted.update(self._convert_range(pdf_path, page_range, profile))
+        
+        # Les pages converties sans contenu sont aussi mises en cache (liste vide)
+        for page_no in missing:
+            elements = converted.get(page_no, [])
+            self.cache.put_page(page_keys[page_no], elements)
+            if elements:
+                page_texts[page_no] = elements
+        
+        return page_texts
+    
+    def _page_ranges(self, pages: List[int]) -> List[Tuple[int, int]]:
+        """
+        Regroupe des numéros de page en plages contiguës d'au plus shard_size pages
+        
+        Args:
+            pages: Numéros de page triés
+            
+        Returns:
+            Liste de plages (première page, dernière page)
+        """
+        ranges = []
+        for page_no in pages:
+            if ranges and ranges[-1][1] == page_no - 1 and page_no - ranges[-1][0] < self.shard_size:
+                ranges[-1] = (ranges[-1][0], page_no)
+            else:
+                ranges.append((page_no, page_no))
+        return ranges
+    
+    def _page_hashes(self, pdf_path: str) -> Dict[int, str]:
+        """
+        Calcule l'empreinte de chaque page: rendu basse résolution, dimensions et texte
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            
+        Returns:
+            Dictionnaire {numéro de page: empreinte hexadécimale}
+        """
+        import hashlib
+        import pypdfium2 as pdfium
+        
+        hashes = {}
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for index in range(len(pdf)):
+                page = pdf[index]
+                digest = hashlib.blake2b(digest_size=20)
+                digest.update(repr(page.get_size()).encode('utf-8'))
+                digest.update(page.get_textpage().get_text_range().encode('utf-8'))
+                digest.update(bytes(page.render(scale=self.page_hash_scale).buffer))
+                hashes[index + 1] = digest.hexdigest()
+        finally:
+            pdf.close()
+        
+        return hashes
+    
+    def select_profile(self, pdf_path: str, probe: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Choisit le profil de conversion d'un PDF
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            probe: Résultat de _probe (peut être vide)
+            
+        Returns:
+            Tuple (profil, raison du choix)
+        """
+        import fnmatch
+        
+        for override in self.profile_overrides:
+            pattern = override["pattern"]
+            if fnmatch.fnmatch(pdf_path, pattern) or fnmatch.fnmatch(os.path.basename(pdf_path), pattern):
+                return override["profile"], f"motif {pattern}"
+        
+        if not self.auto_profile or not probe.get("probed_pages"):
+            return self.default_profile, "profil par défaut"
+        
+        if probe["text_pages"] < probe["probed_pages"]:
+            # Pages sans couche texte (scan, fax): OCR nécessaire
+            return "full", f"{probe['probed_pages'] - probe['text_pages']} page(s) sans couche texte"
+        
+        if probe["numeric_ratio"] >= 0.15:
+            # Beaucoup de valeurs numériques: probablement des tableaux denses (parseur docling_parse)
+            return "standard", f"couche texte native, {probe['numeric_ratio']:.0%} de tokens numériques"
+        
+        return "fast", "couche texte native"
+    
+    def _probe(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        Sonde rapidement la couche texte des premières pages d'un PDF (sans Docling)
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            
+        Returns:
+            Dictionnaire {pages, probed_pages, text_pages, numeric_ratio}, vide en cas d'échec
+        """
+        try:
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(pdf_path)
+        except Exception as e:
+            print(f"Impossible de sonder {pdf_path}: {e}")
+            return {}
+        
+        try:
+            probed = min(len(pdf), self.probe_pages)
+            text_pages = 0
+            tokens = 0
+            numeric_tokens = 0
+            
+            for index in range(probed):
+                text = pdf[index].get_textpage().get_text_range()
+                if len("".join(text.split())) >= self.text_min_chars:
+                    text_pages += 1
+                words = text.split()
+                tokens += len(words)
+                numeric_tokens += sum(1 for word in words if any(c.isdigit() for c in word))
+            
+            return {
+                "pages": len(pdf),
+                "probed_pages": probed,
+                "text_pages": text_pages,
+                "numeric_ratio": numeric_tokens / tokens if tokens else 0.0
+            }
+        finally:
+            pdf.close()
+    
+    def _pipeline_options(self, profile: str) -> Dict[str, Any]:
+        """
+        Décrit les options de conversion qui influencent le résultat (clé de cache)
+        
+        Args:
+            profile: Profil de conversion
+            
+        Returns:
+            Dictionnaire sérialisable des options
+        """
+        return {"profile": profile, **CONVERSION_PROFILES[profile]}
+    
+    def _extract_page_texts(self, doc, fallback_page: int = 1) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Extrait les éléments textuels et les tables d'un document Docling, par page
+        
+        Args:
+            doc: Document Docling (result.document)
+            fallback_page: Page attribuée au texte exporté si aucun élément n'a de provenance
+            
+        Returns:
+            Dictionnaire {numéro de page: liste d'éléments}
+        """
         # Extraire le texte complet par page en utilisant iterate_items()
         page_texts = {}
         
@@ -66,7 +460,7 @@ class DoclingProcessor:
                     element = {
                         "type": item.__class__.__name__,
                         "content": item.text,
-                        "bbox": prov_item.bbox if hasattr(prov_item, 'bbox') else None
+                        "bbox": self._bbox_to_dict(getattr(prov_item, 'bbox', None))
                     }
                     page_texts[page_no].append(element)
         
@@ -86,7 +480,7 @@ class DoclingProcessor:
                             element = {
                                 "type": "TableItem",
                                 "content": table_text,
-                                "bbox": prov_item.bbox if hasattr(prov_item, 'bbox') else None
+                                "bbox": self._bbox_to_dict(getattr(prov_item, 'bbox', None))
                             }
                             page_texts[page_no].append(element)
         
@@ -96,12 +490,56 @@ class DoclingProcessor:
             full_text = doc.export_to_text()
             if full_text:
                 # Créer une seule page avec tout le texte
-                page_texts[1] = [{
+                page_texts[fallback_page] = [{
                     "type": "Text",
                     "content": full_text,
                     "bbox": None
                 }]
         
+        return page_texts
+    
+    def _bbox_to_dict(self, bbox) -> Optional[Dict[str, Any]]:
+        """
+        Convertit une bounding box Docling en dictionnaire sérialisable (JSON, cache, OpenSearch)
+        
+        Args:
+            bbox: BoundingBox Docling ou None
+            
+        Returns:
+            Dictionnaire {l, t, r, b, coord_origin} ou None
+        """
+        if bbox is None:
+            return None
+        
+        origin = getattr(bbox, 'coord_origin', None)
+        return {
+            "l": bbox.l,
+            "t": bbox.t,
+            "r": bbox.r,
+            "b": bbox.b,
+            "coord_origin": getattr(origin, 'value', origin)
+        }
+    
+    def _build_document_data(self, pdf_path: str, page_texts: Dict[int, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Construit le document structuré à partir des éléments par page
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            page_texts: Dictionnaire {numéro de page: liste d'éléments}
+            
+        Returns:
+            Dictionnaire contenant le document structuré
+        """
+        # Extraction des métadonnées
+        document_data = {
+            "id": os.path.splitext(os.path.basename(pdf_path))[0],
+            "title": os.path.basename(pdf_path),
+            "source": pdf_path,
+            "pages": [],
+            "metadata": {}
+        }
+        
         # Construire les données de page
         for page_no in sorted(page_texts.keys()):
             elements = page_texts[page_no]
@@ -116,7 +554,114 @@ class DoclingProcessor:
         
         return document_data
     
-    def create_chunks(self, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _can_fork_workers(self) -> bool:
+        """Indique si des processus de conversion peuvent être créés depuis ce processus"""
+        import multiprocessing
+        
+        if self.shard_workers < 2 or "fork" not in multiprocessing.get_all_start_methods():
+            return False
+        
+        # Un worker du pool de conversion (processus démon) ne peut pas avoir d'enfants
+        return not multiprocessing.current_process().daemon
+    
+    def _can_shard(self) -> bool:
+        """Indique si les workers de conversion par plages sont disponibles dans ce processus"""
+        import multiprocessing
+        
+        # Les workers (processus démons) héritent de la référence au pool sans pouvoir l'utiliser
+        return self._shard_pool is not None and not multiprocessing.current_process().daemon
+    
+    def start_shard_pool(self) -> bool:
+        """
+        Démarre les workers de conversion par plages, réutilisés pour tous les documents
+        
+        Les workers sont forkés une seule fois, depuis un parent sans threads: à appeler
+        avant d'ouvrir des connexions (driver Gremlin, client OpenSearch) et avant toute
+        conversion. Sans workers démarrés, les documents sont convertis d'un seul tenant.
+        
+        Returns:
+            True si les workers ont été démarrés (découpage configuré et fork disponible)
+        """
+        import multiprocessing
+        global _SHARD_PROCESSOR
+        
+        sharding = self.shard_page_threshold > 0 or (self.cache and self.page_cache)
+        if self._shard_pool is not None or not sharding or not self._can_fork_workers():
+            return self._shard_pool is not None
+        
+        # Modèles chargés avant le fork pour être partagés en copy-on-write par les workers
+        for profile in self._usable_profiles():
+            self._initialize_pipeline(profile)
+        _SHARD_PROCESSOR = self
+        
+        context = multiprocessing.get_context("fork")
+        self._shard_pool = context.Pool(processes=self.shard_workers)
+        print(f"✓ Workers de conversion par plages démarrés: {self.shard_workers} workers")
+        return True
+    
+    def close_shard_pool(self):
+        """Arrête les workers de conversion par plages"""
+        if self._shard_pool is not None:
+            self._shard_pool.close()
+            self._shard_pool.join()
+            self._shard_pool = None
+    
+    def _convert_range(self, pdf_path: str, page_range: Tuple[int, int],
+                       profile: str) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Convertit une plage de pages et extrait ses éléments
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            page_range: Plage (première page, dernière page), bornes incluses, base 1
+            profile: Profil de conversion
+            
+        Returns:
+            Dictionnaire {numéro de page dans le document: liste d'éléments}
+        """
+        start, end = page_range
+        result = self._get_converter(profile).convert(pdf_path, page_range=page_range)
+        page_texts = self._extract_page_texts(result.document, fallback_page=start)
+        
+        # Numéros de page relatifs à la plage: les ramener à la numérotation du document
+        if page_texts and not all(start <= page_no <= end for page_no in page_texts):
+            page_texts = {page_no + start - 1: elements for page_no, elements in page_texts.items()}
+        
+        return page_texts
+    
+    def _convert_shards(self, pdf_path: str, ranges: List[Tuple[int, int]],
+                        profile: str) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Convertit des plages de pages dans les workers (voir start_shard_pool) et fusionne les résultats
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            ranges: Plages (première page, dernière page) disjointes
+            profile: Profil de conversion
+            
+        Returns:
+            Dictionnaire {numéro de page: liste d'éléments} pour tout le document
+        """
+        print(f"Conversion parallèle de {len(ranges)} plage(s) de {self.shard_size} pages "
+              f"({self.shard_workers} workers)")
+        
+        page_texts = {}
+        for shard_pages in self._shard_pool.imap(_convert_shard, [(pdf_path, page_range, profile) for page_range in ranges]):
+            # Plages disjointes: chaque page provient d'une seule plage, ordre des éléments conservé
+            page_texts.update(shard_pages)
+        
+        return page_texts
+    
+    def _initialize_pipeline(self, profile: str):
+        """Charge les modèles du pipeline PDF d'un profil sans convertir de document"""
+        try:
+            from docling.datamodel.base_models import InputFormat
+            self._get_converter(profile).initialize_pipeline(InputFormat.PDF)
+        except (ImportError, AttributeError):
+            # Versions de Docling sans initialize_pipeline: les modèles se chargeront dans chaque worker
+            pass
+    
+    def create_chunks(self, document_data: Dict[str, Any]) -> List[ChunkRecord]:
         """
         Crée des chunks à partir du document structuré
         
@@ -126,30 +671,37 @@ class DoclingProcessor:
         Returns:
             Liste de chunks avec métadonnées
         """
+        if self.chunk_strategy == "packed":
+            return self._create_packed_chunks(document_data)
+        
         chunks = []
         chunk_id = 0
         
         for page in document_data["pages"]:
             page_num = page["page_number"]
+            page_text = self._page_text(page)
             
             # Traitement par élément pour préserver la structure
             for element in page["elements"]:
                 content = element["content"].strip()
+                length = self._length(content)
                 
-                if len(content) < self.min_chunk_size:
+                if length < self.min_chunk_size:
                     continue
                 
                 # Si l'élément est trop grand, on le découpe
-                if len(content) > self.chunk_size:
+                if length > self.chunk_size:
                     sub_chunks = self._split_text(content)
-                    for sub_chunk in sub_chunks:
+                    for sub_chunk, sub_length in sub_chunks:
                         chunk = self._create_chunk(
                             chunk_id=f"{document_data['id']}_chunk_{chunk_id:04d}",
                             document_id=document_data["id"],
                             content=sub_chunk,
                             page_number=page_num,
                             element_type=element["type"],
-                            bbox=element.get("bbox")
+                            bbox=element.get("bbox"),
+                            page_text=page_text,
+                            length=sub_length
                         )
                         chunks.append(chunk)
                         chunk_id += 1
@@ -160,7 +712,9 @@ class DoclingProcessor:
                         content=content,
                         page_number=page_num,
                         element_type=element["type"],
-                        bbox=element.get("bbox")
+                        bbox=element.get("bbox"),
+                        page_text=page_text,
+                        length=length
                     )
                     chunks.append(chunk)
                     chunk_id += 1
@@ -168,37 +722,197 @@ class DoclingProcessor:
         print(f"Créé {len(chunks)} chunks pour le document {document_data['id']}")
         return chunks
     
-    def _split_text(self, text: str) -> List[str]:
+    def count_element_chunks(self, document_data: Dict[str, Any]) -> int:
+        """
+        Compte les chunks que produirait la stratégie "element" (référence du rapport d'ingestion)
+        
+        Args:
+            document_data: Document structuré issu de process_pdf
+            
+        Returns:
+            Nombre de chunks, sans les construire ni les annoter
+        """
+        count = 0
+        for page in document_data["pages"]:
+            for element in page["elements"]:
+                content = element["content"].strip()
+                if self._length(content) < self.min_chunk_size:
+                    continue
+                count += len(self._split_text(content)) if self._length(content) > self.chunk_size else 1
+        return count
+    
+    def _create_packed_chunks(self, document_data: Dict[str, Any]) -> List[ChunkRecord]:
+        """
+        Crée des chunks en regroupant les éléments consécutifs d'une même page et d'une même section
+        
+        Les éléments sont accumulés jusqu'à chunk_size; seuls les éléments plus grands que
+        chunk_size sont découpés. Un reste de section plus court que min_chunk_size est rattaché
+        au chunk précédent de la même section s'il y tient, ou placé en tête du premier morceau
+        de l'élément trop grand qui le suit (découpé d'autant plus court), plutôt qu'ignoré.
+        Aucun chunk ne dépasse chunk_size.
+        
+        Args:
+            document_data: Document structuré issu de process_pdf
+            
+        Returns:
+            Liste de chunks avec métadonnées (provenance des éléments dans metadata["elements"])
+        """
+        chunks = []
+        
+        for page in document_data["pages"]:
+            page_num = page["page_number"]
+            page_text = self._page_text(page)
+            
+            # Groupes d'éléments de la page: [section, [(élément, contenu)], longueur]
+            groups = []
+            current = []
+            current_length = 0
+            section = 0
+            
+            def close_group():
+                nonlocal current, current_length
+                if not current:
+                    return
+                previous = groups[-1] if groups else None
+                if (current_length < self.min_chunk_size and previous and previous[0] == section
+                        and previous[2] + self._separator_length + current_length <= self.chunk_size):
+                    # Reste trop court: rattaché au chunk précédent de la même section s'il y tient
+                    previous[1].extend(current)
+                    previous[2] += self._separator_length + current_length
+                else:
+                    groups.append([section, current, current_length])
+                current = []
+                current_length = 0
+            
+            for element in page["elements"]:
+                content = element["content"].strip()
+                if not content:
+                    continue
+                
+                if element["type"] in SECTION_ELEMENT_TYPES:
+                    close_group()
+                    section += 1
+                
+                if self._length(content) > self.chunk_size:
+                    # Élément trop grand: découpé seul, son premier morceau étant raccourci pour
+                    # accueillir un éventuel début de section trop court
+                    prefix, prefix_length = [], 0
+                    budget = self.chunk_size - current_length - self._separator_length
+                    if current and current_length < self.min_chunk_size and budget > 2 * self.chunk_overlap:
+                        prefix, prefix_length, current, current_length = current, current_length, [], 0
+                    close_group()
+                    first_size = budget if prefix else None
+                    for sub_chunk, length in self._split_text(content, first_size=first_size):
+                        if prefix:
+                            length += prefix_length + self._separator_length
+                        groups.append([section, prefix + [(element, sub_chunk)], length])
+                        prefix = []
+                    continue
+                
+                length = self._length(content)
+                separator = self._separator_length if current else 0
+                if current and current_length + separator + length > self.chunk_size:
+                    close_group()
+                    separator = 0
+                
+                current.append((element, content))
+                current_length += separator + length
+            
+            close_group()
+            
+            for _, parts, length in groups:
+                first_element = parts[0][0]
+                chunk = self._create_chunk(
+                    chunk_id=f"{document_data['id']}_chunk_{len(chunks):04d}",
+                    document_id=document_data["id"],
+                    content="\n\n".join(content for _, content in parts),
+                    page_number=page_num,
+                    element_type=first_element["type"],
+                    bbox=first_element.get("bbox"),
+                    elements=[{"type": element["type"], "bbox": element.get("bbox")}
+                              for element, _ in parts],
+                    page_text=page_text,
+                    length=length
+                )
+                chunks.append(chunk)
+        
+        print(f"Créé {len(chunks)} chunks (regroupés) pour le document {document_data['id']}")
+        return chunks
+    
+    def _page_text(self, page: Dict[str, Any]) -> str:
+        """
+        Texte d'une page: éléments non vides séparés par une ligne vide
+        
+        Les chunks de la page (éléments, morceaux découpés ou regroupements
+        d'éléments consécutifs) en sont des sous-chaînes et n'en conservent que les offsets.
+        
+        Args:
+            page: Page de document_data
+            
+        Returns:
+            Texte de la page
+        """
+        return "\n\n".join(content for content in
+                            (element["content"].strip() for element in page["elements"]) if content)
+    
+    @property
+    def _separator_length(self) -> int:
+        """Longueur du séparateur entre deux éléments regroupés, dans l'unité de chunk_size"""
+        return 1 if self.chunk_unit == "tokens" else 2
+    
+    def _length(self, text: str) -> int:
+        """
+        Mesure un texte dans l'unité de chunk_size
+        
+        Args:
+            text: Texte à mesurer
+            
+        Returns:
+            Nombre de caractères, ou de tokens si chunk_unit="tokens"
+        """
+        if self.token_splitter is not None:
+            return self.token_splitter.count_tokens(text)
+        return len(text)
+    
+    def _split_text(self, text: str, first_size: int = None) -> List[Tuple[str, int]]:
         """
         Découpe un texte en chunks avec chevauchement
         
         Args:
             text: Texte à découper
+            first_size: Taille maximale du premier chunk (défaut: chunk_size), au moins 2 * chunk_overlap
             
         Returns:
-            Liste de chunks
+            Liste de couples (chunk, longueur dans l'unité de chunk_size)
         """
+        if self.token_splitter is not None:
+            return self.token_splitter.split_with_counts(text, first_size=first_size)
+        
         chunks = []
         start = 0
         
         while start < len(text):
-            end = start + self.chunk_size
+            size = first_size if first_size and not chunks else self.chunk_size
+            end = start + size
             chunk = text[start:end]
             
             # Essayer de couper à un espace pour ne pas couper les mots
             if end < len(text):
                 last_space = chunk.rfind(' ')
-                if last_space > self.chunk_size // 2:
+                if last_space > size // 2:
                     chunk = chunk[:last_space]
                     end = start + last_space
             
-            chunks.append(chunk.strip())
+            chunk = chunk.strip()
+            chunks.append((chunk, len(chunk)))
             start = end - self.chunk_overlap
         
         return chunks
     
     def _create_chunk(self, chunk_id: str, document_id: str, content: str, 
-                     page_number: int, element_type: str, bbox: Any = None) -> Dict[str, Any]:
+                     page_number: int, element_type: str, bbox: Any = None,
+                     elements: List[Dict[str, Any]] = None, page_text: str = None,
+                     length: int = None) -> ChunkRecord:
         """
         Crée un chunk avec ses métadonnées et annotations
         
@@ -209,71 +923,65 @@ class DoclingProcessor:
             page_number: Numéro de page
             element_type: Type d'élément (paragraph, title, table, etc.)
             bbox: Bounding box de l'élément
+            elements: Provenance des éléments regroupés (type, bbox), pour les chunks "packed"
+            page_text: Texte de la page, dont le chunk ne conserve que les offsets
+            length: Longueur déjà mesurée dans l'unité de chunk_size (en tokens: éléments, séparateurs
+                    et morceaux découpés comptés lors du découpage, sans retokeniser le chunk)
             
         Returns:
-            Dictionnaire représentant le chunk
-        """
-        chunk = {
-            "id": chunk_id,
-            "document_id": document_id,
-            "content": content,
-            "metadata": {
-                "page": page_number,
-                "type": element_type,
-                "bbox": bbox,
-                "length": len(content)
-            },
-            "annotations": self._generate_annotations(content, element_type, page_number)
-        }
-        
-        return chunk
+            ChunkRecord (accès par clé compatible avec l'ancien dictionnaire, voir to_dict())
+        """
+        return ChunkRecord(
+            chunk_id=chunk_id,
+            document_id=document_id,
+            content=content,
+            page_number=page_number,
+            element_type=element_type,
+            bbox=bbox,
+            page_text=page_text,
+            annotations=self._generate_annotations(content, element_type, page_number),
+            elements=elements,
+            tokens=self._chunk_tokens(content, length)
+        )
+    
+    def _chunk_tokens(self, content: str, length: int = None) -> Optional[int]:
+        """Nombre de tokens d'un chunk (None sans découpage en tokens), mesuré au découpage si connu"""
+        if self.token_splitter is None:
+            return None
+        return length if length is not None else self.token_splitter.count_tokens(content)
     
-    def _generate_annotations(self, content: str, element_type: str, page_number: int) -> List[Dict[str, Any]]:
+    def _generate_annotations(self, content: str, element_type: str, page_number: int) -> List[Tuple[str, str]]:
         """
         Génère des annotations contextuelles pour un chunk
         
+        Seuls le type et la valeur sont produits: la phrase de contexte est
+        construite à la lecture (voir annotations.render_annotation_context).
+        
         Args:
             content: Contenu du chunk
             element_type: Type d'élément
             page_number: Numéro de page
             
         Returns:
-            Liste d'annotations
+            Liste d'annotations (type, valeur)
         """
         annotations = []
         
         # Annotation de type
-        annotations.append({
-            "type": "element_type",
-            "value": element_type,
-            "context": f"Ce contenu est de type {element_type}"
-        })
+        annotations.append(("element_type", element_type))
         
         # Annotation de localisation
-        annotations.append({
-            "type": "location",
-            "value": f"page_{page_number}",
-            "context": f"Ce contenu se trouve à la page {page_number}"
-        })
+        annotations.append(("location", f"page_{page_number}"))
         
         # Annotation de longueur
         length_category = "court" if len(content) < 200 else "moyen" if len(content) < 400 else "long"
-        annotations.append({
-            "type": "length",
-            "value": length_category,
-            "context": f"Ce contenu est de longueur {length_category}"
-        })
+        annotations.append(("length", length_category))
         
-        # Détection de mots-clés importants (exemple simple)
-        keywords = ["data fabric", "architecture", "ingestion", "metadata", "pipeline"]
-        found_keywords = [kw for kw in keywords if kw.lower() in content.lower()]
+        # Détection des mots-clés du vocabulaire (une seule passe sur le contenu)
+        found_keywords = self.keyword_annotator.find(content)
         
         if found_keywords:
-            annotations.append({
-                "type": "keywords",
-                "value": ", ".join(found_keywords),
-                "context": f"Contient les concepts: {', '.join(found_keywords)}"
-            })
+            annotations.append(("keywords", ", ".join(found_keywords)))
         
         return annotations
     
@@ -2,9 +2,12 @@
 Module pour la génération d'embeddings vectoriels
 """
 
-import cohere
 import os
-from typing import List, Union
+import re
+import time
+import hashlib
+from typing import List, Dict, Union, Tuple
+from collections import deque
 import numpy as np
 from tqdm import tqdm
 
@@ -13,19 +16,30 @@ class EmbeddingGenerator:
     """Génère des embeddings vectoriels pour les textes"""
     
     def __init__(self, provider: str = "cohere", model_name: str = "embed-multilingual-v3", 
-                 api_key: str = None):
+                 api_key: str = None, dimension: int = 1024, latency_ms: float = 0.0):
         """
         Initialise le générateur d'embeddings
         
         Args:
-            provider: Provider d'embeddings ("cohere" ou "sentence-transformers")
+            provider: Provider d'embeddings ("cohere", "sentence-transformers" ou "hash")
             model_name: Nom du modèle à utiliser
             api_key: Clé API (pour Cohere)
+            dimension: Dimension des vecteurs (pour le provider "hash")
+            latency_ms: Latence artificielle par requête (pour le provider "hash")
         """
         self.provider = provider
         self.model_name = model_name
+        self.request_count = 0
         
-        if provider == "cohere":
+        if provider == "hash":
+            # Provider déterministe hors ligne (benchmarks, CI): aucun modèle ni réseau
+            self._dimension = dimension
+            self.latency_ms = latency_ms
+            self._token_slots = {}
+            print(f"Provider d'embeddings hors ligne 'hash' (dimension: {dimension}, "
+                  f"latence simulée: {latency_ms} ms)")
+        
+        elif provider == "cohere":
             # Récupérer la clé API depuis les paramètres ou variable d'environnement
             self.api_key = api_key or os.getenv("COHERE_API_KEY")
             if not self.api_key:
@@ -34,23 +48,46 @@ class EmbeddingGenerator:
                     "ou passez api_key au constructeur."
                 )
             
-            print(f"Initialisation du client Cohere avec le modèle: {model_name}")
-            self.client = cohere.Client(self.api_key)
+            # Le SDK Cohere est importé et le client créé au premier appel
+            self._client = None
             
             # Dimensions selon le modèle Cohere
             if "v3" in model_name:
-                self.dimension = 1024
+                self._dimension = 1024
             elif "v2" in model_name:
-                self.dimension = 768
+                self._dimension = 768
             else:
-                self.dimension = 1024  # Par défaut
+                self._dimension = 1024  # Par défaut
                 
         else:
-            # Fallback sur sentence-transformers
+            # Fallback sur sentence-transformers (modèle chargé au premier appel)
+            self._model = None
+            self._dimension = None
+    
+    @property
+    def client(self):
+        """Client Cohere, créé au premier usage"""
+        if self._client is None:
+            import cohere
+            print(f"Initialisation du client Cohere avec le modèle: {self.model_name}")
+            self._client = cohere.Client(self.api_key)
+        return self._client
+    
+    @property
+    def model(self):
+        """Modèle sentence-transformers, chargé au premier usage"""
+        if self._model is None:
             from sentence_transformers import SentenceTransformer
-            print(f"Chargement du modèle sentence-transformers: {model_name}")
-            self.model = SentenceTransformer(model_name)
-            self.dimension = self.model.get_sentence_embedding_dimension()
+            print(f"Chargement du modèle sentence-transformers: {self.model_name}")
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+    
+    @property
+    def dimension(self) -> int:
+        """Dimension des embeddings produits"""
+        if self._dimension is None:
+            self._dimension = self.model.get_sentence_embedding_dimension()
+        return self._dimension
         
     def generate_embedding(self, text: str, input_type: str = "search_document") -> List[float]:
         """
@@ -63,7 +100,10 @@ class EmbeddingGenerator:
         Returns:
             Liste de floats représentant l'embedding
         """
-        if self.provider == "cohere":
+        if self.provider == "hash":
+            return self.embed_request([text], input_type)[0].tolist()
+        elif self.provider == "cohere":
+            self.request_count += 1
             response = self.client.embed(
                 texts=[text],
                 model=self.model_name,
@@ -76,7 +116,8 @@ class EmbeddingGenerator:
             return embedding.tolist()
     
     def generate_embeddings_batch(self, texts: List[str], batch_size: int = 96, 
-                                  input_type: str = "search_document") -> List[List[float]]:
+                                  input_type: str = "search_document",
+                                  as_numpy: bool = False) -> Union[List[List[float]], np.ndarray]:
         """
         Génère des embeddings pour un batch de textes
         
@@ -84,11 +125,20 @@ class EmbeddingGenerator:
             texts: Liste de textes à vectoriser
             batch_size: Taille des batchs pour le traitement
             input_type: Type d'input pour Cohere ("search_document" ou "search_query")
+            as_numpy: Retourner une matrice float32 contiguë (n_textes, dimension)
+                      au lieu d'une liste de listes
             
         Returns:
-            Liste d'embeddings
+            Liste d'embeddings, ou ndarray float32 si as_numpy
         """
-        if self.provider == "cohere":
+        if self.provider == "hash":
+            matrix = self._embeddings_matrix(texts, batch_size, input_type)
+            return matrix if as_numpy else matrix.tolist()
+        
+        elif self.provider == "cohere":
+            if as_numpy:
+                return self._embeddings_matrix(texts, batch_size, input_type)
+            
             all_embeddings = []
             
             # Traiter par batch (Cohere a une limite de 96 textes par requête)
@@ -101,6 +151,7 @@ class EmbeddingGenerator:
                     input_type=input_type,
                     embedding_types=["float"]
                 )
+                self.request_count += 1
                 
                 all_embeddings.extend(response.embeddings.float)
             
@@ -112,21 +163,131 @@ class EmbeddingGenerator:
                 show_progress_bar=True,
                 convert_to_numpy=True
             )
+            if as_numpy:
+                return np.ascontiguousarray(embeddings, dtype=np.float32)
             return embeddings.tolist()
     
-    def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+    def embed_request(self, texts: List[str], input_type: str = "search_document") -> np.ndarray:
+        """
+        Génère les embeddings d'un batch en une seule requête au provider
+        
+        Args:
+            texts: Textes du batch (au plus 96 pour Cohere)
+            input_type: Type d'input pour Cohere ("search_document" ou "search_query")
+            
+        Returns:
+            Matrice float32 (n_textes, dimension)
+        """
+        self.request_count += 1
+        
+        if self.provider == "hash":
+            return self._hash_request(texts)
+        elif self.provider == "cohere":
+            response = self.client.embed(
+                texts=texts,
+                model=self.model_name,
+                input_type=input_type,
+                embedding_types=["float"]
+            )
+            return np.asarray(response.embeddings.float, dtype=np.float32)
+        else:
+            embeddings = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def _embeddings_matrix(self, texts: List[str], batch_size: int,
+                           input_type: str) -> np.ndarray:
+        """
+        Remplit une matrice float32 préallouée, batch par batch
+        
+        Args:
+            texts: Liste de textes à vectoriser
+            batch_size: Taille des batchs (limite Cohere: 96)
+            input_type: Type d'input pour Cohere
+            
+        Returns:
+            Matrice float32 (n_textes, dimension)
+        """
+        matrix = None
+        
+        for i in tqdm(range(0, len(texts), batch_size), desc="Génération embeddings"):
+            batch = texts[i:i + batch_size]
+            vectors = self.embed_request(batch, input_type)
+            
+            if matrix is None:
+                # Dimension déduite de la première réponse (le nom du modèle ne suffit pas toujours)
+                matrix = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            
+            # Copie directe dans la matrice: la réponse du batch est libérée aussitôt
+            matrix[i:i + len(batch)] = vectors
+        
+        if matrix is None:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        return matrix
+    
+    def _hash_request(self, texts: List[str]) -> np.ndarray:
+        """
+        Simule une requête d'embeddings avec le provider "hash"
+        
+        Chaque token est haché (blake2b, stable d'un processus à l'autre) vers une
+        composante signée du vecteur; le vecteur est ensuite normalisé. Deux textes
+        partageant des mots ont donc une similarité cosinus positive.
+        
+        Args:
+            texts: Textes d'une requête
+            
+        Returns:
+            Matrice float32 normalisée (n_textes, dimension)
+        """
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        
+        for row, text in enumerate(texts):
+            tokens = re.findall(r'\w+', text.lower()) or [text]
+            for token in tokens:
+                index, sign = self._token_slot(token)
+                matrix[row, index] += sign
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        
+        return matrix
+    
+    def _token_slot(self, token: str) -> Tuple[int, float]:
+        """
+        Retourne la composante et le signe associés à un token (mis en cache)
+        
+        Args:
+            token: Token en minuscules
+            
+        Returns:
+            Tuple (indice de composante, signe)
+        """
+        slot = self._token_slots.get(token)
+        if slot is None:
+            value = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+            slot = (value % self._dimension, 1.0 if value >> 63 else -1.0)
+            self._token_slots[token] = slot
+        return slot
+    
+    def compute_similarity(self, embedding1: Union[List[float], np.ndarray],
+                           embedding2: Union[List[float], np.ndarray]) -> float:
         """
         Calcule la similarité cosinus entre deux embeddings
         
         Args:
-            embedding1: Premier embedding
-            embedding2: Second embedding
+            embedding1: Premier embedding (liste ou ndarray)
+            embedding2: Second embedding (liste ou ndarray)
             
         Returns:
             Score de similarité (0 à 1)
         """
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        # asarray ne copie pas un ndarray float32 déjà contigu
+        vec1 = np.asarray(embedding1, dtype=np.float32)
+        vec2 = np.asarray(embedding2, dtype=np.float32)
         
         # Similarité cosinus
         dot_product = np.dot(vec1, vec2)
@@ -137,3 +298,157 @@ class EmbeddingGenerator:
             return 0.0
             
         return float(dot_product / (norm1 * norm2))
+
+
+class EmbeddingAggregator:
+    """Regroupe les textes de plusieurs documents dans des requêtes d'embeddings complètes"""
+    
+    def __init__(self, generator: EmbeddingGenerator, batch_size: int = 96,
+                 max_wait_seconds: float = 5.0, input_type: str = "search_document"):
+        """
+        Initialise l'agrégateur
+        
+        Args:
+            generator: Générateur d'embeddings utilisé pour les requêtes
+            batch_size: Nombre maximal de textes par requête (limite Cohere: 96)
+            max_wait_seconds: Délai maximal d'attente d'un texte avant l'envoi d'un batch partiel
+            input_type: Type d'input pour Cohere
+        """
+        self.generator = generator
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.input_type = input_type
+        
+        # File des textes en attente: (propriétaire, index dans le document, texte, heure de dépôt)
+        self._pending = deque()
+        # Par propriétaire: matrice d'embeddings en cours de remplissage et textes restants
+        self._owners = {}
+        self._completed = {}
+        # Par propriétaire: erreur de la requête qui a perdu une partie de ses textes
+        self._failed = {}
+        
+        self.request_count = 0
+        self.text_count = 0
+    
+    def submit(self, owner: str, texts: List[str]) -> List[str]:
+        """
+        Dépose les textes d'un document et envoie les batchs complets
+        
+        Args:
+            owner: Identifiant du propriétaire (ex: chemin du PDF)
+            texts: Textes à vectoriser, dans l'ordre des chunks
+            
+        Returns:
+            Propriétaires dont tous les embeddings sont disponibles (voir pop)
+        """
+        if owner in self._owners or owner in self._completed or owner in self._failed:
+            raise ValueError(f"Propriétaire déjà soumis: {owner}")
+        
+        if not texts:
+            self._completed[owner] = np.empty((0, self.generator.dimension), dtype=np.float32)
+            return [owner]
+        
+        self._owners[owner] = {"matrix": None, "remaining": len(texts), "size": len(texts)}
+        now = time.monotonic()
+        self._pending.extend((owner, index, text, now) for index, text in enumerate(texts))
+        
+        return self._dispatch()
+    
+    def poll(self) -> List[str]:
+        """
+        Envoie les batchs complets et ceux dont le délai maximal est dépassé
+        
+        Returns:
+            Propriétaires dont tous les embeddings sont disponibles
+        """
+        return self._dispatch()
+    
+    def flush(self) -> List[str]:
+        """
+        Envoie tous les textes en attente, y compris un dernier batch partiel
+        
+        Returns:
+            Propriétaires dont tous les embeddings sont disponibles
+        """
+        return self._dispatch(force=True)
+    
+    def pop(self, owner: str) -> np.ndarray:
+        """
+        Retourne et oublie les embeddings d'un propriétaire complet
+        
+        Args:
+            owner: Identifiant du propriétaire
+            
+        Returns:
+            Matrice float32 (n_textes, dimension) dans l'ordre des textes soumis
+        """
+        return self._completed.pop(owner)
+    
+    def pop_failed(self) -> Dict[str, str]:
+        """
+        Retourne et oublie les propriétaires dont une requête d'embeddings a échoué
+        
+        Leurs textes encore en attente sont retirés de la file: ils ne seront jamais complétés.
+        
+        Returns:
+            Dictionnaire {propriétaire: message d'erreur}
+        """
+        failed, self._failed = self._failed, {}
+        return failed
+    
+    def average_fill(self) -> float:
+        """Taux de remplissage moyen des requêtes envoyées (0 à 1)"""
+        if not self.request_count:
+            return 0.0
+        return self.text_count / (self.request_count * self.batch_size)
+    
+    def _deadline_passed(self) -> bool:
+        return time.monotonic() - self._pending[0][3] >= self.max_wait_seconds
+    
+    def _dispatch(self, force: bool = False) -> List[str]:
+        """
+        Envoie les batchs prêts et répartit les vecteurs entre leurs propriétaires
+        
+        Args:
+            force: Envoyer aussi un batch partiel
+            
+        Returns:
+            Propriétaires complétés par ces envois
+        """
+        completed = []
+        
+        while len(self._pending) >= self.batch_size or (
+                self._pending and (force or self._deadline_passed())):
+            count = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+            
+            try:
+                vectors = self.generator.embed_request([item[2] for item in batch], self.input_type)
+            except Exception as e:
+                # Seuls les propriétaires de ce batch échouent, les autres restent en attente
+                self._fail({item[0] for item in batch}, e)
+                continue
+            self.request_count += 1
+            self.text_count += count
+            
+            for row, (owner, index, _, _) in enumerate(batch):
+                state = self._owners[owner]
+                if state["matrix"] is None:
+                    state["matrix"] = np.empty((state["size"], vectors.shape[1]), dtype=np.float32)
+                
+                state["matrix"][index] = vectors[row]
+                state["remaining"] -= 1
+                
+                if state["remaining"] == 0:
+                    self._completed[owner] = self._owners.pop(owner)["matrix"]
+                    completed.append(owner)
+        
+        return completed
+    
+    def _fail(self, owners: set, error: Exception):
+        """Marque des propriétaires en échec et retire leurs textes de la file d'attente"""
+        print(f"✗ Requête d'embeddings en échec ({len(owners)} document(s)): {error}")
+        for owner in owners:
+            self._owners.pop(owner, None)
+            self._failed[owner] = str(error)
+        self._pending = deque(item for item in self._pending if item[0] not in owners)
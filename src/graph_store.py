@@ -0,0 +1,113 @@
+"""
+Module pour la sélection du backend de graphe (Neptune ou graphe en mémoire)
+"""
+
+from typing import Dict, Any
+
+
+# Backends de graphe:
+# - neptune: cluster AWS Neptune (ou Gremlin Server), via NeptuneClient
+# - memory: graphe en mémoire avec snapshot disque optionnel, via MemoryGraphClient
+GRAPH_BACKENDS = ("neptune", "memory")
+
+# Protocoles d'écriture du backend neptune (l'ingestion; les lectures restent en Gremlin):
+# - gremlin: traversées Gremlin (WebSocket), via NeptuneClient
+# - opencypher: requêtes openCypher "UNWIND $rows" par lots (HTTP), via OpenCypherWriter
+GRAPH_WRITERS = ("gremlin", "opencypher")
+
+
+def create_graph_client(config: Dict[str, Any], **overrides):
+    """
+    Crée le client de graphe configuré (non connecté: appeler connect())
+
+    Les deux backends exposent les mêmes méthodes: connect, close, flush,
+    insert_document, insert_chunk, insert_annotation, merge_topic(s),
+    create_relationship(s), get_topic_ids, delete_document, get_chunk_annotations,
+    get_related_chunks, ainsi que les attributs annotation_mode et stats.
+
+    Args:
+        config: Section "neptune" de la configuration
+        **overrides: Paramètres remplaçant ceux de la configuration (ex: annotation_mode)
+
+    Returns:
+        NeptuneClient ou MemoryGraphClient
+    """
+    backend = config.get('backend', 'neptune')
+    if backend not in GRAPH_BACKENDS:
+        raise ValueError(f"Backend de graphe inconnu: {backend} (attendu: {', '.join(GRAPH_BACKENDS)})")
+
+    related = config.get('related_chunks') or {}
+    options = {
+        'annotation_mode': config.get('annotation_mode', 'vertices'),
+        'store_content': config.get('store_content', True),
+        'related_fan_out': related.get('fan_out', 50),
+        'related_max_degree': related.get('max_degree', 500),
+        'related_skip_vertices': related.get('skip_vertices'),
+        'related_edge_labels': related.get('edge_labels'),
+        'related_max_results': related.get('max_results', 20),
+        'related_cache_size': related.get('cache_size', 1024),
+        'related_cache_ttl_seconds': related.get('cache_ttl_seconds', 60)
+    }
+
+    if backend == "memory":
+        from memory_graph import MemoryGraphClient
+
+        options['snapshot_path'] = config.get('snapshot_path')
+        options.update(overrides)
+        return MemoryGraphClient(**options)
+
+    from neptune_client import NeptuneClient
+
+    options.update({
+        'endpoint': config['endpoint'],
+        'port': config['port'],
+        'use_iam': config['use_iam'],
+        'pool_size': config.get('pool_size', 4),
+        'max_workers': config.get('max_workers'),
+        'serializer': config.get('serializer', 'graphson'),
+        'max_in_flight': config.get('max_in_flight', 0),
+        'batch_size': config.get('batch_size', 50),
+        'reader_endpoints': config.get('reader_endpoints'),
+        'reader_retry_seconds': config.get('reader_retry_seconds', 30)
+    })
+    options.update(overrides)
+    return NeptuneClient(**options)
+
+
+def create_graph_writer(config: Dict[str, Any], **overrides):
+    """
+    Crée le client d'écriture du graphe configuré (non connecté: appeler connect())
+
+    Le writer openCypher expose les méthodes d'écriture des clients de graphe:
+    connect, close, flush, insert_document, insert_chunk, insert_annotation,
+    merge_topic(s), create_relationship(s), get_topic_ids, delete_document, ainsi que les
+    attributs annotation_mode et stats.
+
+    Args:
+        config: Section "neptune" de la configuration
+        **overrides: Paramètres remplaçant ceux de la configuration (ex: annotation_mode)
+
+    Returns:
+        OpenCypherWriter si neptune.writer vaut "opencypher", sinon le client de create_graph_client
+    """
+    writer = config.get('writer', 'gremlin')
+    if writer not in GRAPH_WRITERS:
+        raise ValueError(f"Writer de graphe inconnu: {writer} (attendu: {', '.join(GRAPH_WRITERS)})")
+
+    if config.get('backend', 'neptune') != "neptune" or writer == "gremlin":
+        return create_graph_client(config, **overrides)
+
+    from opencypher_writer import OpenCypherWriter
+
+    options = {
+        'endpoint': config['endpoint'],
+        'port': config['port'],
+        'use_iam': config['use_iam'],
+        'region': config.get('region'),
+        'annotation_mode': config.get('annotation_mode', 'vertices'),
+        'store_content': config.get('store_content', True),
+        'batch_size': config.get('opencypher_batch_size', 1000),
+        'pool_size': config.get('pool_size', 4)
+    }
+    options.update(overrides)
+    return OpenCypherWriter(**options)
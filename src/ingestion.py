@@ -6,49 +6,93 @@ import argparse
 import yaml
 import os
 import csv
+import json
+import glob
+import time
 from typing import Dict, Any, List, Set
 from tqdm import tqdm
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import numpy as np
 
 from docling_processor import DoclingProcessor
-from embeddings import EmbeddingGenerator
-from neptune_client import NeptuneClient
+from embeddings import EmbeddingGenerator, EmbeddingAggregator
+from graph_store import create_graph_writer
 from opensearch_client import OpenSearchClient
 from topic_extractor import TopicExtractor
+from chunk_deduplicator import ChunkDeduplicator
+from keyword_annotator import KeywordAnnotator
+from converter_pool import ConverterPool
+from conversion_cache import ConversionCache
+from annotations import ANNOTATION_PROPERTY_PREFIX, shared_annotation_id
 
 
 class IngestionPipeline:
     """Pipeline d'ingestion de documents"""
     
-    def __init__(self, config_path: str = "config.yaml", dry_run: bool = False):
+    def __init__(self, config_path: str = "config.yaml", dry_run: bool = False, replace: bool = False,
+                 start_converter_pool: bool = True, start_shard_pool: bool = True):
         """
         Initialise le pipeline d'ingestion
         
         Args:
             config_path: Chemin vers le fichier de configuration
             dry_run: Mode dry-run (génère des CSV sans insertion)
+            replace: Supprimer la version déjà ingérée de chaque document avant de l'insérer
+            start_converter_pool: Démarrer le pool de conversion Docling s'il est configuré
+                                  (docling.pool.workers > 1), utilisé par process_documents
+            start_shard_pool: Démarrer les workers de conversion par plages si le découpage
+                              est configuré (docling.sharding) et le pool de conversion absent
         """
         # Chargement de la configuration
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
         
         self.dry_run = dry_run
+        self.replace = replace
         
         # Initialisation des composants
         print("=== Initialisation du pipeline d'ingestion ===\n")
         
+        cache_config = self.config['docling'].get('cache', {})
+        conversion_cache = None
+        if cache_config.get('enabled', False):
+            conversion_cache = ConversionCache(cache_config.get('dir', '.cache/docling'))
+        profiles_config = self.config['docling'].get('profiles', {})
+        
+        annotations_config = self.config.get('annotations', {})
+        keyword_annotator = KeywordAnnotator(
+            keywords=annotations_config.get('keywords'),
+            keywords_file=annotations_config.get('keywords_file'),
+            cache_dir=annotations_config.get('cache_dir', '.cache/annotations')
+        )
+        print(f"✓ Vocabulaire de mots-clés: {len(keyword_annotator.rank)} mots-clés "
+              f"({keyword_annotator.backend})")
+        
         self.docling = DoclingProcessor(
             chunk_size=self.config['docling']['chunk_size'],
             chunk_overlap=self.config['docling']['chunk_overlap'],
-            min_chunk_size=self.config['docling']['min_chunk_size']
+            min_chunk_size=self.config['docling']['min_chunk_size'],
+            shard_page_threshold=self.config['docling'].get('sharding', {}).get('page_threshold', 0),
+            shard_size=self.config['docling'].get('sharding', {}).get('shard_size', 50),
+            shard_workers=self.config['docling'].get('sharding', {}).get('workers', 4),
+            cache=conversion_cache,
+            auto_profile=profiles_config.get('auto', False),
+            default_profile=profiles_config.get('default', 'full'),
+            profile_overrides=profiles_config.get('overrides') or [],
+            text_min_chars=profiles_config.get('text_min_chars', 100),
+            probe_pages=profiles_config.get('probe_pages', 3),
+            page_cache=cache_config.get('pages', False),
+            chunk_strategy=self.config['docling'].get('chunk_strategy', 'element'),
+            chunk_unit=self.config['docling'].get('chunk_unit', 'characters'),
+            tokenizer=self.config['docling'].get('tokenizer') or self.config['embeddings']['model'],
+            keyword_annotator=keyword_annotator
         )
         
         self.embeddings = EmbeddingGenerator(
             provider=self.config['embeddings']['provider'],
             model_name=self.config['embeddings']['model'],
-            api_key=self.config['embeddings'].get('api_key')
+            api_key=self.config['embeddings'].get('api_key'),
+            dimension=self.config['embeddings']['dimension'],
+            latency_ms=self.config['embeddings'].get('latency_ms', 0)
         )
         
         self.topic_extractor = TopicExtractor(
@@ -56,22 +100,64 @@ class IngestionPipeline:
             max_topics=5
         )
         
-        if not dry_run:
-            self.neptune = NeptuneClient(
-                endpoint=self.config['neptune']['endpoint'],
-                port=self.config['neptune']['port'],
-                use_iam=self.config['neptune']['use_iam']
-            )
-            self.neptune.connect()
-            
-            self.opensearch = OpenSearchClient(
-                endpoint=self.config['opensearch']['endpoint'],
-                index_name=self.config['opensearch']['index_name'],
-                use_iam=self.config['opensearch']['use_iam']
-            )
-            self.opensearch.create_index(
-                dimension=self.config['embeddings']['dimension']
+        dedup_config = self.config.get('deduplication', {})
+        self.deduplicator = None
+        if dedup_config.get('enabled', True):
+            self.deduplicator = ChunkDeduplicator(mode=dedup_config.get('mode', 'reference'))
+        
+        # Stockage des annotations dans le graphe (vertices, properties ou shared)
+        self.annotation_mode = self.config['neptune'].get('annotation_mode', 'vertices')
+        self.store_content = self.config['neptune'].get('store_content', True)
+        self._dry_run_shared_annotations = set()
+        
+        # Topics déjà présents dans le graphe: le vocabulaire est partagé entre documents,
+        # seuls les topics jamais vus sont fusionnés
+        self.topic_cache = self.config['neptune'].get('topic_cache', True)
+        self._known_topics = set()
+        
+        # Pool de conversion Docling: les workers sont forkés avant l'ouverture des
+        # connexions (threads du driver Gremlin, client OpenSearch), jamais après
+        pool_config = self.config['docling'].get('pool', {})
+        self.converter_pool = None
+        if start_converter_pool and pool_config.get('workers', 0) > 1:
+            self.converter_pool = ConverterPool(
+                self.docling,
+                workers=pool_config['workers'],
+                recycle_after=pool_config.get('recycle_after', 50),
+                warmup=pool_config.get('warmup', True),
+                torch_threads=pool_config.get('torch_threads', 1)
             )
+            self.converter_pool.start()
+        
+        # Conversion par plages: mêmes contraintes, workers forkés une fois pour tous les
+        # documents (les workers du pool de conversion ne découpent pas)
+        if start_shard_pool and self.converter_pool is None:
+            self.docling.start_shard_pool()
+        
+        if not dry_run:
+            try:
+                self.neptune = create_graph_writer(
+                    self.config['neptune'],
+                    annotation_mode=self.annotation_mode,
+                    store_content=self.store_content
+                )
+                self.neptune.connect()
+                self._load_known_topics()
+                
+                self.opensearch = OpenSearchClient(
+                    endpoint=self.config['opensearch']['endpoint'],
+                    index_name=self.config['opensearch']['index_name'],
+                    use_iam=self.config['opensearch']['use_iam']
+                )
+                self.opensearch.create_index(
+                    dimension=self.config['embeddings']['dimension']
+                )
+            except Exception:
+                # Le pipeline n'est pas retourné: ses workers ne seraient jamais arrêtés
+                if self.converter_pool:
+                    self.converter_pool.close()
+                self.docling.close_shard_pool()
+                raise
         else:
             print("Mode DRY-RUN activé - Génération de fichiers CSV\n")
             self.neptune_queries = []
@@ -84,34 +170,215 @@ class IngestionPipeline:
         Args:
             pdf_path: Chemin vers le fichier PDF
         """
+        document_data, chunks, report = self._prepare_document(pdf_path)
+        
+        # Étape 2: Génération des embeddings
+        print("Étape 2/6: Génération des embeddings")
+        chunk_contents = [chunk['content'] for chunk in chunks]
+        embeddings = self.embeddings.generate_embeddings_batch(
+            chunk_contents,
+            batch_size=self.config['embeddings']['batch_size'],
+            as_numpy=True
+        )
+        print(f"✓ {len(embeddings)} embeddings générés\n")
+        
+        self._finish_document(document_data, chunks, embeddings, report)
+    
+    def process_documents(self, pdf_paths: List[str]):
+        """
+        Traite plusieurs documents PDF en regroupant leurs embeddings
+        
+        Les chunks de plusieurs documents sont accumulés dans des batchs complets
+        (jusqu'à batch_size textes par requête, ou moins passé le délai maximal),
+        puis chaque document est finalisé dès que tous ses embeddings sont reçus.
+        
+        Args:
+            pdf_paths: Chemins vers les fichiers PDF
+        """
+        aggregator = EmbeddingAggregator(
+            self.embeddings,
+            batch_size=self.config['embeddings']['batch_size'],
+            max_wait_seconds=self.config['embeddings'].get('coalesce_max_wait_seconds', 5.0)
+        )
+        pending = {}
+        failures = []
+        profile_stats = {}
+        
+        def finish(completed):
+            # Documents dont une requête d'embeddings a échoué: abandonnés, les autres continuent
+            for pdf_path, error in aggregator.pop_failed().items():
+                pending.pop(pdf_path)
+                print(f"✗ Erreur lors de la génération des embeddings de {pdf_path}: {error}")
+                failures.append(pdf_path)
+            
+            for pdf_path in completed:
+                document_data, chunks, report = pending.pop(pdf_path)
+                try:
+                    self._finish_document(document_data, chunks, aggregator.pop(pdf_path), report)
+                except Exception as e:
+                    # Les autres documents en attente sont finalisés normalement
+                    print(f"✗ Erreur lors de la finalisation de {pdf_path}: {e}")
+                    failures.append(pdf_path)
+                    continue
+                
+                conversion = report.get('conversion', {})
+                stats = profile_stats.setdefault(conversion.get('profile', 'inconnu'),
+                                                 {"documents": 0, "pages": 0, "seconds": 0.0})
+                stats['documents'] += 1
+                stats['pages'] += report['pages']
+                stats['seconds'] = round(stats['seconds'] + conversion.get('seconds', 0.0), 3)
+        
+        # Conversion Docling dans le pool de workers préchauffés si démarré; pendant l'attente
+        # d'une conversion, les batchs partiels dont le délai maximal expire sont envoyés
+        if self.converter_pool:
+            converted = self.converter_pool.imap(
+                pdf_paths,
+                poll=lambda: finish(aggregator.poll()),
+                poll_interval=aggregator.max_wait_seconds
+            )
+        else:
+            converted = (None for _ in pdf_paths)
+        
+        for pdf_path, document_data in zip(pdf_paths, converted):
+            # Batchs partiels dont le délai maximal a expiré pendant la conversion
+            finish(aggregator.poll())
+            
+            try:
+                if document_data and 'error' in document_data:
+                    raise RuntimeError(document_data['error'])
+                pending[pdf_path] = self._prepare_document(pdf_path, document_data)
+            except Exception as e:
+                print(f"✗ Erreur lors du traitement de {pdf_path}: {e}")
+                failures.append(pdf_path)
+                continue
+            
+            chunks = pending[pdf_path][1]
+            print("Étape 2/6: Embeddings regroupés entre documents")
+            finish(aggregator.submit(pdf_path, [chunk['content'] for chunk in chunks]))
+        
+        # Derniers batchs partiels
+        finish(aggregator.flush())
+        
+        summary = {
+            "documents": len(pdf_paths) - len(failures),
+            "failures": failures,
+            "embedding_requests": aggregator.request_count,
+            "embedded_texts": aggregator.text_count,
+            "average_batch_fill": aggregator.average_fill(),
+            "conversion_profiles": profile_stats
+        }
+        if self.converter_pool:
+            summary['converter_pool'] = self.converter_pool.stats
+        output_dir = self.config['output']['dry_run_dir'] if self.dry_run else self.config['output']['results_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        summary_file = os.path.join(output_dir, 'ingestion_report_batch.json')
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        
+        print(f"✓ {summary['documents']} document(s) traité(s), {summary['embedding_requests']} requête(s) "
+              f"d'embeddings pour {summary['embedded_texts']} textes "
+              f"(remplissage moyen des batchs: {summary['average_batch_fill']:.0%})")
+        for profile, stats in sorted(profile_stats.items()):
+            print(f"  Profil {profile}: {stats['documents']} document(s), {stats['pages']} page(s), "
+                  f"{stats['seconds']:.1f} s de conversion")
+        print(f"✓ Rapport batch: {summary_file}")
+    
+    def _prepare_document(self, pdf_path: str, document_data: Dict[str, Any] = None):
+        """
+        Extrait, découpe et dédoublonne un document (étape 1)
+        
+        Args:
+            pdf_path: Chemin vers le fichier PDF
+            document_data: Document déjà converti (ex: par le pool de workers), sinon converti ici
+            
+        Returns:
+            Tuple (document_data, chunks, rapport d'ingestion)
+        """
         print(f"\n{'='*60}")
         print(f"Traitement du document: {pdf_path}")
         print(f"{'='*60}\n")
         
         # Étape 1: Extraction et chunking avec Docling
         print("Étape 1/5: Extraction et chunking avec Docling")
-        document_data = self.docling.process_pdf(pdf_path)
+        if document_data is None:
+            document_data = self.docling.process_pdf(pdf_path)
         chunks = self.docling.create_chunks(document_data)
         print(f"✓ {len(chunks)} chunks créés\n")
         
-        # Étape 2: Génération des embeddings
-        print("Étape 2/6: Génération des embeddings")
-        chunk_contents = [chunk['content'] for chunk in chunks]
-        embeddings = self.embeddings.generate_embeddings_batch(
-            chunk_contents,
-            batch_size=self.config['embeddings']['batch_size']
-        )
-        print(f"✓ {len(embeddings)} embeddings générés\n")
+        report = {
+            "document_id": document_data['id'],
+            "source": pdf_path,
+            "pages": len(document_data['pages']),
+            "chunks_created": len(chunks)
+        }
+        if self.docling.chunk_strategy != "element":
+            # Référence: nombre de chunks qu'aurait produit un chunk par élément
+            element_chunks = self.docling.count_element_chunks(document_data)
+            report['chunking'] = {
+                "strategy": self.docling.chunk_strategy,
+                "element_strategy_chunks": element_chunks,
+                "chunks": len(chunks),
+                "chunk_count_change": len(chunks) - element_chunks
+            }
+            print(f"✓ Chunking {self.docling.chunk_strategy}: {len(chunks)} chunks "
+                  f"(contre {element_chunks} avec un chunk par élément)\n")
+        if 'conversion' in document_data['metadata']:
+            report['conversion'] = document_data['metadata']['conversion']
+        if 'worker' in document_data['metadata']:
+            report['conversion_worker'] = document_data['metadata']['worker']
+        
+        # Déduplication des chunks identiques (en-têtes, pieds de page, mentions légales)
+        if self.deduplicator:
+            chunks, dedup_stats = self.deduplicator.deduplicate(chunks)
+            report['deduplication'] = dedup_stats
+            print(f"✓ Déduplication: {dedup_stats['duplicates_removed']} doublon(s) éliminé(s), "
+                  f"{len(chunks)} chunks uniques\n")
+        
+        return document_data, chunks, report
+    
+    def _finish_document(self, document_data: Dict[str, Any], chunks: List[Dict[str, Any]],
+                         embeddings: np.ndarray, report: Dict[str, Any]):
+        """
+        Extrait les topics, insère dans Neptune et OpenSearch et exporte (étapes 3 à 6)
+        
+        Args:
+            document_data: Document structuré issu de process_pdf
+            chunks: Chunks du document
+            embeddings: Matrice d'embeddings (une ligne par chunk)
+            report: Rapport d'ingestion du document
+        """
+        if self.dry_run:
+            # Les requêtes exportées ne concernent que le document courant: chaque export
+            # fusionne ses propres annotations partagées (rejouable seul)
+            self.neptune_queries = []
+            self.opensearch_requests = []
+            self._dry_run_shared_annotations = set()
         
         # Étape 3: Extraction des topics
-        print("Étape 3/6: Extraction des topics et concepts")
+        print(f"Étape 3/6: Extraction des topics et concepts ({document_data['id']})")
         all_topics = self.topic_extractor.get_all_unique_topics(chunks)
         chunk_topics = self.topic_extractor.extract_topics_batch(chunks)
         print(f"✓ {len(all_topics)} topics uniques identifiés\n")
         
+        if self.replace:
+            # Les chunks de l'ancienne version absents de la nouvelle ne seraient pas écrasés
+            report['replaced'] = self.delete_document(document_data['id'])
+        
         # Étape 4: Insertion dans Neptune
         print("Étape 4/6: Insertion des métadonnées dans Neptune")
+        t0 = time.perf_counter()
+        graph_before = self._graph_write_counts()
         self._insert_to_neptune(document_data, chunks, all_topics, chunk_topics)
+        graph_after = self._graph_write_counts()
+        report['graph'] = {
+            "annotation_mode": self.annotation_mode,
+            "store_content": self.store_content,
+            "vertices": graph_after['vertices'] - graph_before['vertices'],
+            "edges": graph_after['edges'] - graph_before['edges'],
+            "insert_seconds": round(time.perf_counter() - t0, 3)
+        }
+        print(f"✓ Graphe: {report['graph']['vertices']} vertices, {report['graph']['edges']} arêtes "
+              f"(annotations: {self.annotation_mode})\n")
         print()
         
         # Étape 5: Insertion dans OpenSearch
@@ -131,17 +398,75 @@ class IngestionPipeline:
             self._generate_graph_visualization_from_data(document_data, chunks, all_topics, chunk_topics)
             print(f"✓ Visualisation du graphe Neptune: {graph_image}")
         
+        report['chunks_indexed'] = len(chunks)
+        report['embeddings'] = len(embeddings)
+        report['topics'] = len(all_topics)
+        report_file = self._write_report(report)
+        print(f"✓ Rapport d'ingestion: {report_file}")
+        
         print(f"\n{'='*60}")
-        print("✓ Traitement terminé avec succès")
+        print(f"✓ Traitement terminé avec succès: {document_data['id']}")
         print(f"{'='*60}\n")
     
+    def delete_document(self, document_id: str) -> Dict[str, Any]:
+        """
+        Supprime un document de Neptune (chunks, annotations, topics orphelins) et d'OpenSearch
+        
+        Args:
+            document_id: Identifiant du document (nom du PDF sans extension)
+            
+        Returns:
+            Statistiques de suppression {graph, opensearch_chunks}
+            
+        Raises:
+            RuntimeError: si les chunks du document n'ont pas pu être supprimés d'OpenSearch
+        """
+        if self.dry_run:
+            print(f"Mode dry-run: suppression de {document_id} non exécutée")
+            return {}
+        
+        # OpenSearch d'abord: en cas d'échec (erreur propagée), le graphe reste intact
+        # et --replace ne réindexe pas le document par-dessus d'anciens chunks
+        opensearch_config = self.config['opensearch']
+        opensearch_chunks = self.opensearch.delete_document(
+            document_id,
+            requests_per_second=opensearch_config.get('delete_requests_per_second', 500),
+            scroll_size=opensearch_config.get('delete_scroll_size', 1000)
+        )
+        deleted = {
+            "graph": self.neptune.delete_document(document_id),
+            "opensearch_chunks": opensearch_chunks
+        }
+        
+        # Des topics devenus orphelins ont été supprimés: ils ne sont plus connus
+        if deleted["graph"].get("topics"):
+            self._load_known_topics()
+        return deleted
+    
+    def _load_known_topics(self):
+        """(Re)charge depuis le graphe le cache des topics déjà présents"""
+        if self.topic_cache:
+            self._known_topics = set(self.neptune.get_topic_ids())
+            print(f"✓ {len(self._known_topics)} topics déjà présents dans le graphe")
+    
+    def _graph_write_counts(self) -> Dict[str, int]:
+        """Nombre cumulé de vertices et d'arêtes écrits (ou générés en dry-run) dans Neptune"""
+        if not self.dry_run:
+            return dict(self.neptune.stats)
+        
+        vertex_types = ('CREATE_DOCUMENT', 'MERGE_TOPIC', 'CREATE_CHUNK', 'CREATE_ANNOTATION', 'MERGE_ANNOTATION')
+        return {
+            "vertices": sum(1 for q in self.neptune_queries if q['query_type'] in vertex_types),
+            "edges": sum(1 for q in self.neptune_queries if q['query_type'] == 'CREATE_RELATIONSHIP')
+        }
+    
     def _insert_to_neptune(self, document_data: Dict[str, Any], chunks: List[Dict[str, Any]], 
                            all_topics: Dict[str, Dict[str, Any]], chunk_topics: Dict[str, Set[str]]):
         """Insère les données dans Neptune"""
         
         # Insertion du document
         if self.dry_run:
-            query = f"CREATE (d:Document {{id: '{document_data['id']}', title: '{document_data['title']}', source: '{document_data['source']}'}})"
+            query = f"MERGE (d:Document {{id: '{document_data['id']}'}}) SET d.title = '{document_data['title']}', d.source = '{document_data['source']}'"
             self.neptune_queries.append({
                 'query_type': 'CREATE_DOCUMENT',
                 'query': query,
@@ -157,33 +482,45 @@ class IngestionPipeline:
                 document_data['title'],
                 document_data['source']
             )
+            # Les chunks sont reliés au document: il doit exister avant leur envoi
+            self.neptune.flush()
         
-        # Insertion des topics (nœuds partagés)
-        for topic_id, topic_data in tqdm(all_topics.items(), desc="Insertion topics Neptune"):
-            if self.dry_run:
-                query = f"MERGE (t:Topic {{id: '{topic_id}', name: '{topic_data['name']}', type: '{topic_data['type']}'}})"
+        # Insertion des topics (nœuds partagés): seuls les topics absents du cache sont fusionnés, en un lot.
+        # En dry-run, chaque export (par document) contient tous ses topics et se rejoue seul.
+        new_topics = {topic_id: topic_data for topic_id, topic_data in all_topics.items()
+                      if self.dry_run or topic_id not in self._known_topics}
+        
+        if self.dry_run:
+            for topic_id, topic_data in new_topics.items():
+                query = f"MERGE (t:Topic {{id: '{topic_id}'}}) SET t.name = '{topic_data['name']}', t.type = '{topic_data['type']}'"
                 self.neptune_queries.append({
                     'query_type': 'MERGE_TOPIC',
                     'query': query,
                     'parameters': topic_data
                 })
-            else:
-                # MERGE pour éviter les doublons entre documents
-                self.neptune.merge_topic(topic_id, topic_data['name'], topic_data['type'])
+        elif new_topics:
+            self.neptune.merge_topics(new_topics)
+            self.neptune.flush()
+        if self.topic_cache and not self.dry_run:
+            self._known_topics.update(new_topics)
         
         # Insertion des chunks et annotations
         for chunk in tqdm(chunks, desc="Insertion chunks Neptune"):
             if self.dry_run:
-                # Chunk
-                query = f"CREATE (c:Chunk {{id: '{chunk['id']}', document_id: '{chunk['document_id']}', page: {chunk['metadata']['page']}, type: '{chunk['metadata']['type']}'}})"
+                # Chunk (annotations en propriétés en mode "properties")
+                properties = ""
+                if self.annotation_mode == "properties":
+                    properties = "".join(f", c.{ANNOTATION_PROPERTY_PREFIX}{a['type']} = '{a['value']}'"
+                                         for a in chunk.get('annotations', []))
+                query = f"MERGE (c:Chunk {{id: '{chunk['id']}'}}) SET c.document_id = '{chunk['document_id']}', c.page = {chunk['metadata']['page']}, c.type = '{chunk['metadata']['type']}'{properties}"
                 self.neptune_queries.append({
                     'query_type': 'CREATE_CHUNK',
                     'query': query,
-                    'parameters': chunk
+                    'parameters': chunk.to_dict()
                 })
                 
                 # Relation Document -> Chunk
-                query = f"MATCH (d:Document {{id: '{chunk['document_id']}'}}), (c:Chunk {{id: '{chunk['id']}'}}) CREATE (d)-[:HAS_CHUNK]->(c)"
+                query = f"MATCH (d:Document {{id: '{chunk['document_id']}'}}), (c:Chunk {{id: '{chunk['id']}'}}) MERGE (d)-[:HAS_CHUNK]->(c)"
                 self.neptune_queries.append({
                     'query_type': 'CREATE_RELATIONSHIP',
                     'query': query,
@@ -193,70 +530,108 @@ class IngestionPipeline:
                 # Relations Chunk -> Topic
                 if chunk['id'] in chunk_topics:
                     for topic_id in chunk_topics[chunk['id']]:
-                        query = f"MATCH (c:Chunk {{id: '{chunk['id']}'}}), (t:Topic {{id: '{topic_id}'}}) CREATE (c)-[:ABOUT]->(t)"
+                        query = f"MATCH (c:Chunk {{id: '{chunk['id']}'}}), (t:Topic {{id: '{topic_id}'}}) MERGE (c)-[:ABOUT]->(t)"
                         self.neptune_queries.append({
                             'query_type': 'CREATE_RELATIONSHIP',
                             'query': query,
                             'parameters': {'relationship': 'ABOUT'}
                         })
                 
-                # Annotations
+                # Annotations (vertices dédiés ou partagés)
+                if self.annotation_mode == "properties":
+                    continue
+                
                 for annotation in chunk.get('annotations', []):
-                    ann_id = f"{chunk['id']}_ann_{annotation['type']}"
-                    query = f"CREATE (a:Annotation {{id: '{ann_id}', type: '{annotation['type']}', value: '{annotation['value']}'}})"
-                    self.neptune_queries.append({
-                        'query_type': 'CREATE_ANNOTATION',
-                        'query': query,
-                        'parameters': annotation
-                    })
+                    if self.annotation_mode == "shared":
+                        ann_id = shared_annotation_id(annotation['type'], annotation['value'])
+                        if ann_id not in self._dry_run_shared_annotations:
+                            self._dry_run_shared_annotations.add(ann_id)
+                            query = f"MERGE (a:Annotation {{id: '{ann_id}'}}) SET a.type = '{annotation['type']}', a.value = '{annotation['value']}'"
+                            self.neptune_queries.append({
+                                'query_type': 'MERGE_ANNOTATION',
+                                'query': query,
+                                'parameters': {'id': ann_id, 'type': annotation['type'], 'value': annotation['value']}
+                            })
+                    else:
+                        ann_id = f"{chunk['id']}_ann_{annotation['type']}"
+                        query = f"MERGE (a:Annotation {{id: '{ann_id}'}}) SET a.type = '{annotation['type']}', a.value = '{annotation['value']}'"
+                        self.neptune_queries.append({
+                            'query_type': 'CREATE_ANNOTATION',
+                            'query': query,
+                            'parameters': annotation.to_dict()
+                        })
                     
-                    query = f"MATCH (c:Chunk {{id: '{chunk['id']}'}}), (a:Annotation {{id: '{ann_id}'}}) CREATE (c)-[:HAS_ANNOTATION]->(a)"
+                    query = f"MATCH (c:Chunk {{id: '{chunk['id']}'}}), (a:Annotation {{id: '{ann_id}'}}) MERGE (c)-[:HAS_ANNOTATION]->(a)"
                     self.neptune_queries.append({
                         'query_type': 'CREATE_RELATIONSHIP',
                         'query': query,
                         'parameters': {}
                     })
             else:
+                # Écritures indépendantes: envoyées en parallèle si max_in_flight > 0
                 self.neptune.insert_chunk(chunk)
-                
-                # Créer les relations avec les topics
-                if chunk['id'] in chunk_topics:
-                    for topic_id in chunk_topics[chunk['id']]:
-                        self.neptune.create_relationship(chunk['id'], topic_id, 'ABOUT')
         
-        print(f"✓ {len(chunks)} chunks et {len(all_topics)} topics insérés dans Neptune")
+        if not self.dry_run:
+            # Créer les relations avec les topics, une fois tous les chunks écrits
+            self.neptune.flush()
+            # Un topic supprimé par un autre processus depuis le chargement du cache est recréé
+            self.neptune.create_relationships([
+                (chunk['id'], topic_id, 'ABOUT')
+                for chunk in chunks
+                for topic_id in chunk_topics.get(chunk['id'], ())
+            ], targets={topic_id: {'name': topic_data['name'], 'type': topic_data['type']}
+                        for topic_id, topic_data in all_topics.items()})
+            self.neptune.flush()
+        
+        print(f"✓ {len(chunks)} chunks et {len(all_topics)} topics insérés dans Neptune "
+              f"({len(new_topics)} nouveaux topics)")
     
-    def _insert_to_opensearch(self, chunks: List[Dict[str, Any]], embeddings: List[List[float]]):
-        """Insère les embeddings dans OpenSearch"""
+    def _insert_to_opensearch(self, chunks: List[Dict[str, Any]], embeddings: np.ndarray):
+        """Insère les embeddings dans OpenSearch (matrice float32, une ligne par chunk)"""
         
-        for chunk, embedding in tqdm(zip(chunks, embeddings), total=len(chunks), desc="Insertion OpenSearch"):
-            if self.dry_run:
-                document = {
-                    "chunk_id": chunk['id'],
-                    "document_id": chunk['document_id'],
-                    "content": chunk['content'],
-                    "embedding": embedding,
-                    "metadata": chunk['metadata']
-                }
-                
-                request = {
-                    'action': 'index',
-                    'index': self.config['opensearch']['index_name'],
-                    'document_id': chunk['id'],
-                    'body': document
-                }
-                self.opensearch_requests.append(request)
-            else:
-                self.opensearch.index_chunk(
-                    chunk_id=chunk['id'],
-                    document_id=chunk['document_id'],
-                    content=chunk['content'],
-                    embedding=embedding,
-                    metadata=chunk['metadata']
-                )
+        if not self.dry_run:
+            self.opensearch.bulk_index_embeddings(chunks, embeddings)
+            print(f"✓ {len(chunks)} chunks indexés dans OpenSearch")
+            return
+        
+        for i, chunk in enumerate(tqdm(chunks, desc="Insertion OpenSearch")):
+            document = {
+                "chunk_id": chunk['id'],
+                "document_id": chunk['document_id'],
+                "content": chunk['content'],
+                "embedding": embeddings[i],  # Vue sur la ligne, sans copie
+                "metadata": chunk['metadata'].to_dict()
+            }
+            
+            request = {
+                'action': 'index',
+                'index': self.config['opensearch']['index_name'],
+                'document_id': chunk['id'],
+                'body': document
+            }
+            self.opensearch_requests.append(request)
         
         print(f"✓ {len(chunks)} chunks indexés dans OpenSearch")
     
+    def _write_report(self, report: Dict[str, Any]) -> str:
+        """
+        Écrit le rapport d'ingestion d'un document en JSON
+        
+        Args:
+            report: Rapport d'ingestion du document
+            
+        Returns:
+            Chemin du fichier créé
+        """
+        output_dir = self.config['output']['dry_run_dir'] if self.dry_run else self.config['output']['results_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        
+        report_file = os.path.join(output_dir, f'ingestion_report_{report["document_id"]}.json')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        
+        return report_file
+    
     def _export_dry_run(self):
         """Export les requêtes en CSV pour le mode dry-run"""
         
@@ -294,7 +669,7 @@ class IngestionPipeline:
                     'action': request['action'],
                     'index': request['index'],
                     'document_id': request['document_id'],
-                    'body': str(request['body'])[:1000]  # Limiter la taille
+                    'body': self._format_request_body(request['body'])[:1000]  # Limiter la taille
                 })
         
         print(f"✓ Requêtes OpenSearch exportées: {opensearch_file}")
@@ -304,6 +679,20 @@ class IngestionPipeline:
         self._generate_graph_visualization(graph_image)
         print(f"✓ Visualisation du graphe Neptune: {graph_image}")
     
+    def _format_request_body(self, body: Dict[str, Any]) -> str:
+        """
+        Formate le corps d'une requête OpenSearch pour l'export CSV
+        
+        Args:
+            body: Document OpenSearch (embedding sous forme de ndarray)
+            
+        Returns:
+            Représentation texte avec un aperçu de l'embedding
+        """
+        embedding = body['embedding']
+        preview = np.array2string(embedding[:5], precision=6, separator=', ')
+        return str({**body, 'embedding': f"{preview[:-1]}, ...] ({len(embedding)} dim)"})
+    
     def _generate_graph_visualization(self, output_path: str):
         """
         Génère une visualisation PNG du graphe Neptune
@@ -311,6 +700,11 @@ class IngestionPipeline:
         Args:
             output_path: Chemin de sortie pour l'image PNG
         """
+        # Dépendances de visualisation importées uniquement pour cette étape
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as mpatches
+        
         # Créer un graphe dirigé
         G = nx.DiGraph()
         
@@ -344,7 +738,7 @@ class IngestionPipeline:
                 node_types[topic_id] = 'Topic'
                 node_labels[topic_id] = f"[Topic]\n{params['name']}"
             
-            elif query_type == 'CREATE_ANNOTATION':
+            elif query_type in ('CREATE_ANNOTATION', 'MERGE_ANNOTATION'):
                 params = query['parameters']
                 ann_id = query['query'].split("'")[1]  # Extraire l'ID de l'annotation
                 G.add_node(ann_id)
@@ -509,14 +903,22 @@ class IngestionPipeline:
         plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
         plt.close()
     
-    def _generate_graph_visualization_from_data(self, document_data: Dict[str, Any], chunks: List[Dict[str, Any]]):
+    def _generate_graph_visualization_from_data(self, document_data: Dict[str, Any], chunks: List[Dict[str, Any]],
+                                                all_topics: Dict[str, Dict[str, Any]] = None,
+                                                chunk_topics: Dict[str, Set[str]] = None):
         """
         Génère une visualisation du graphe à partir des données (mode non-dry-run)
         
         Args:
             document_data: Données du document
             chunks: Liste des chunks
+            all_topics: Topics du document (non représentés dans cette vue)
+            chunk_topics: Relations chunk -> topics (non représentées dans cette vue)
         """
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as mpatches
+        
         output_dir = self.config['output']['results_dir']
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, f'neptune_graph_{document_data["id"]}.png')
@@ -641,31 +1043,69 @@ class IngestionPipeline:
 
     
     def close(self):
-        """Ferme les connexions"""
-        if not self.dry_run:
-            self.neptune.close()
+        """Arrête les workers de conversion et ferme les connexions"""
+        try:
+            if self.converter_pool:
+                self.converter_pool.close()
+                self.converter_pool = None
+            self.docling.close_shard_pool()
+        finally:
+            if not self.dry_run:
+                self.neptune.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Ingestion de documents PDF")
-    parser.add_argument('--input', type=str, required=True, help="Chemin vers le fichier PDF")
+    parser.add_argument('--input', type=str, nargs='+',
+                        help="Fichier(s) PDF ou dossier(s) contenant des PDFs")
     parser.add_argument('--config', type=str, default='config.yaml', help="Fichier de configuration")
     parser.add_argument('--dry-run', action='store_true', help="Mode dry-run (génère des CSV)")
     parser.add_argument('--s3-uri', type=str, help="URI S3 du document (futur)")
+    parser.add_argument('--replace', action='store_true',
+                        help="Remplacer les documents déjà ingérés (suppression préalable dans Neptune et OpenSearch)")
+    parser.add_argument('--delete', type=str, nargs='+', metavar='DOCUMENT_ID',
+                        help="Supprimer des documents de Neptune et OpenSearch (identifiant: nom du PDF sans extension)")
     
     args = parser.parse_args()
     
-    # Vérification du fichier
-    if not args.s3_uri and not os.path.exists(args.input):
-        print(f"Erreur: Le fichier {args.input} n'existe pas")
+    if args.delete:
+        pipeline = IngestionPipeline(config_path=args.config, dry_run=args.dry_run,
+                                     start_converter_pool=False, start_shard_pool=False)
+        try:
+            for document_id in args.delete:
+                pipeline.delete_document(document_id)
+        finally:
+            pipeline.close()
+        return
+    
+    if not args.input:
+        parser.error("--input est requis (sauf avec --delete)")
+    
+    # Résolution des fichiers (les dossiers sont développés en *.pdf)
+    pdf_paths = []
+    for path in args.input:
+        if os.path.isdir(path):
+            pdf_paths.extend(sorted(glob.glob(os.path.join(path, '*.pdf'))))
+        elif args.s3_uri or os.path.exists(path):
+            pdf_paths.append(path)
+        else:
+            print(f"Erreur: Le fichier {path} n'existe pas")
+            return
+    
+    if not pdf_paths:
+        print("Erreur: Aucun fichier PDF à traiter")
         return
     
     # Initialisation du pipeline
-    pipeline = IngestionPipeline(config_path=args.config, dry_run=args.dry_run)
+    pipeline = IngestionPipeline(config_path=args.config, dry_run=args.dry_run, replace=args.replace,
+                                 start_converter_pool=len(pdf_paths) > 1)
     
     try:
-        # Traitement du document
-        pipeline.process_document(args.input)
+        # Traitement du ou des documents
+        if len(pdf_paths) == 1:
+            pipeline.process_document(pdf_paths[0])
+        else:
+            pipeline.process_documents(pdf_paths)
     finally:
         pipeline.close()
 
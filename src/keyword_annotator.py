@@ -0,0 +1,165 @@
+"""
+Module pour la détection des mots-clés du domaine dans les chunks
+"""
+
+from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+
+
+# Vocabulaire par défaut (mots-clés historiques de l'annotation "keywords")
+DEFAULT_KEYWORDS = ["data fabric", "architecture", "ingestion", "metadata", "pipeline"]
+
+
+def load_keywords_file(path: str) -> Dict[str, List[str]]:
+    """
+    Charge un vocabulaire de mots-clés depuis un fichier texte
+
+    Format: un mot-clé par ligne, suivi éventuellement de ses synonymes
+    ("mot-clé: synonyme 1, synonyme 2"). Les lignes vides et commençant par # sont ignorées.
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Dictionnaire {mot-clé: [synonymes]}
+    """
+    vocabulary = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            keyword, _, synonyms = line.partition(':')
+            vocabulary.setdefault(keyword.strip(), []).extend(
+                s.strip() for s in synonyms.split(',') if s.strip()
+            )
+    return vocabulary
+
+
+class KeywordAnnotator:
+    """Détecte en une seule passe par chunk les mots-clés d'un vocabulaire (et leurs synonymes)"""
+
+    def __init__(self, keywords: List[Any] = None, keywords_file: str = None,
+                 cache_dir: Optional[str] = ".cache/annotations"):
+        """
+        Initialise l'annotateur et compile le vocabulaire
+
+        Args:
+            keywords: Mots-clés, chacun sous forme de chaîne ou de dictionnaire
+                      {"keyword": ..., "synonyms": [...]} (défaut: DEFAULT_KEYWORDS)
+            keywords_file: Fichier de mots-clés complémentaire (voir load_keywords_file)
+            cache_dir: Dossier du cache de l'automate compilé (None = pas de cache)
+        """
+        vocabulary = {}
+        for entry in (DEFAULT_KEYWORDS if keywords is None else keywords):
+            if isinstance(entry, dict):
+                vocabulary.setdefault(entry["keyword"], []).extend(entry.get("synonyms", []))
+            else:
+                vocabulary.setdefault(entry, [])
+        if keywords_file:
+            for keyword, synonyms in load_keywords_file(keywords_file).items():
+                vocabulary.setdefault(keyword, []).extend(synonyms)
+
+        # Forme recherchée (en minuscules) -> mot-clé canonique; rang des mots-clés pour l'ordre de sortie
+        self.surface_forms = {}
+        self.rank = {}
+        for keyword, synonyms in vocabulary.items():
+            self.rank.setdefault(keyword, len(self.rank))
+            for form in [keyword] + synonyms:
+                self.surface_forms.setdefault(form.lower(), keyword)
+
+        self.cache_dir = cache_dir
+        self.backend = None
+        self._automaton = None
+        self._pattern = None
+        self._compile()
+
+    def _compile(self):
+        """Compile le vocabulaire en automate Aho-Corasick si disponible, sinon en une expression régulière"""
+        if not self.surface_forms:
+            self.backend = "none"
+            return
+
+        try:
+            import ahocorasick
+        except ImportError:
+            # Une seule expression, formes les plus longues en premier, bornée aux limites de mots
+            alternatives = sorted(self.surface_forms, key=len, reverse=True)
+            self._pattern = re.compile(
+                r'(?<!\w)(?:' + '|'.join(re.escape(form) for form in alternatives) + r')(?!\w)'
+            )
+            self.backend = "regex"
+            return
+
+        self.backend = "aho-corasick"
+        cache_path = None
+        if self.cache_dir:
+            digest = hashlib.sha256(json.dumps(
+                [getattr(ahocorasick, '__version__', ''), sorted(self.surface_forms.items())]
+            ).encode('utf-8')).hexdigest()
+            cache_path = os.path.join(self.cache_dir, f"keywords_{digest[:32]}.pickle")
+            if os.path.exists(cache_path):
+                try:
+                    with open(cache_path, 'rb') as f:
+                        self._automaton = pickle.load(f)
+                    return
+                except (OSError, pickle.UnpicklingError, EOFError) as e:
+                    print(f"Automate de mots-clés en cache illisible, recompilation ({e})")
+
+        automaton = ahocorasick.Automaton()
+        for form, keyword in self.surface_forms.items():
+            automaton.add_word(form, (len(form), keyword))
+        automaton.make_automaton()
+        self._automaton = automaton
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(automaton, f)
+            os.replace(tmp_path, cache_path)
+
+    def find(self, content: str) -> List[str]:
+        """
+        Recherche les mots-clés présents dans un texte
+
+        Les occurrences qui se chevauchent sont résolues comme par l'expression régulière:
+        de gauche à droite, la plus longue l'emporte ("data fabric" masque "data"), quel
+        que soit le moteur utilisé.
+
+        Args:
+            content: Texte du chunk
+
+        Returns:
+            Mots-clés canoniques trouvés (un synonyme renvoie son mot-clé), dans l'ordre du vocabulaire
+        """
+        text = content.lower()
+        found = set()
+
+        if self._automaton is not None:
+            matches = []
+            for end, (length, keyword) in self._automaton.iter(text):
+                start = end - length + 1
+                # Seules les occurrences de mots entiers sont retenues
+                if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                    continue
+                if end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == '_'):
+                    continue
+                matches.append((start, -length, keyword))
+
+            # Occurrences sans chevauchement: la plus à gauche, puis la plus longue
+            covered = 0
+            for start, negative_length, keyword in sorted(matches):
+                if start >= covered:
+                    found.add(keyword)
+                    covered = start - negative_length
+        elif self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                found.add(self.surface_forms[match.group(0)])
+
+        return sorted(found, key=self.rank.__getitem__)
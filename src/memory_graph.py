@@ -0,0 +1,626 @@
+"""
+Module pour le graphe en mémoire (backend local compatible avec NeptuneClient)
+"""
+
+from typing import List, Dict, Any, Tuple, Optional
+from collections import OrderedDict
+import itertools
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from annotations import (ANNOTATION_MODES, ANNOTATION_TYPES, ANNOTATION_PROPERTY_PREFIX,
+                         annotations_from_properties, render_annotation_context, shared_annotation_id)
+
+
+class MemoryGraphClient:
+    """
+    Graphe en mémoire exposant les méthodes de NeptuneClient, pour la CI, le
+    développement et les benchmarks sans cluster Neptune.
+
+    Les vertices sont numérotés (entiers) dans l'ordre de création: labels et
+    propriétés sont stockés dans des listes indexées par ce numéro, les arêtes dans
+    des listes d'adjacence par label ({numéro: {voisin: None}}, ensembles ordonnés).
+    Des index par label et par propriété (INDEXED_PROPERTIES) évitent les parcours
+    complets. Les écritures ont la même sémantique de fusion que NeptuneClient:
+    réécrire un document ne crée ni doublon ni arête supplémentaire.
+    """
+
+    # Propriétés indexées par label: {label: {valeur: vertices}}
+    INDEXED_PROPERTIES = ("document_id", "type")
+
+    # Labels (source, cible) des nœuds reliés par chaque type de relation
+    RELATIONSHIP_LABELS = {
+        "HAS_CHUNK": ("Document", "Chunk"),
+        "HAS_ANNOTATION": ("Chunk", "Annotation"),
+        "ABOUT": ("Chunk", "Topic")
+    }
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, annotation_mode: str = "vertices", store_content: bool = True,
+                 snapshot_path: Optional[str] = None, related_fan_out: int = 50,
+                 related_max_degree: int = 500, related_skip_vertices: List[str] = None,
+                 related_edge_labels: List[str] = None, related_max_results: int = 20,
+                 related_cache_size: int = 1024, related_cache_ttl_seconds: float = 60.0):
+        """
+        Initialise le graphe (vide jusqu'à connect(), qui recharge le snapshot éventuel)
+
+        Args:
+            annotation_mode: Stockage des annotations: "vertices", "properties" ou "shared"
+                             (voir NeptuneClient)
+            store_content: Stocker un extrait du contenu sur le Chunk
+            snapshot_path: Fichier de snapshot, rechargé par connect() et écrit par close()
+                           (None = graphe non persistant)
+            related_fan_out, related_max_degree, related_skip_vertices, related_edge_labels,
+            related_max_results, related_cache_size,
+            related_cache_ttl_seconds: Bornes et cache de get_related_chunks
+                             (voir NeptuneClient)
+        """
+        if annotation_mode not in ANNOTATION_MODES:
+            raise ValueError(f"Mode de stockage des annotations inconnu: {annotation_mode} "
+                             f"(attendu: {', '.join(ANNOTATION_MODES)})")
+
+        self.annotation_mode = annotation_mode
+        self.store_content = store_content
+        self.snapshot_path = snapshot_path
+        self.related_fan_out = related_fan_out
+        self.related_max_degree = related_max_degree
+        self.related_skip_vertices = set(related_skip_vertices or [])
+        self.related_edge_labels = list(related_edge_labels or [])
+        self.related_max_results = related_max_results
+        self.related_cache_size = related_cache_size
+        self.related_cache_ttl_seconds = related_cache_ttl_seconds
+
+        # Chunks liés déjà calculés: (chunk_id, max_distance) -> (instant du calcul, identifiants)
+        self._related_cache = OrderedDict()
+
+        # Volume d'écriture: vertices et arêtes créés ou fusionnés
+        self.stats = {"vertices": 0, "edges": 0}
+
+        self._reset()
+
+    def _reset(self):
+        """Vide le graphe"""
+        # Vertex n: identifiant _ids[n], label _labels[n], propriétés _properties[n]
+        # (None pour un vertex supprimé: les numéros ne sont pas réattribués)
+        self._ids = []
+        self._labels = []
+        self._properties = []
+        self._index = {}
+
+        # Index: label -> vertices, (label, propriété) -> {valeur: vertices}
+        self._by_label = {}
+        self._by_property = {}
+
+        # Adjacence par label d'arête: {label: {vertex: {voisin: None}}}
+        self._out = {}
+        self._in = {}
+        self._edge_count = 0
+        self._related_cache = OrderedDict()
+
+        # Graphe modifié depuis le dernier chargement ou la dernière écriture du snapshot
+        self._dirty = False
+
+    def connect(self):
+        """Recharge le snapshot s'il existe (aucune connexion à établir)"""
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            self.load_snapshot(self.snapshot_path)
+        size = self.size()
+        print(f"✓ Graphe en mémoire prêt ({size['vertices']} vertices, {size['edges']} arêtes)")
+
+    def close(self):
+        """
+        Écrit le snapshot si un fichier est configuré et que le graphe a été modifié
+
+        Un processus en lecture seule (ex: QueryPipeline) ne réécrit donc jamais le
+        snapshot et n'écrase pas celui d'une ingestion terminée entre-temps.
+        """
+        if self.snapshot_path and self._dirty:
+            self.save_snapshot(self.snapshot_path)
+
+    def flush(self) -> int:
+        """Écritures synchrones: rien à attendre (interface commune avec NeptuneClient)"""
+        return 0
+
+    def size(self) -> Dict[str, int]:
+        """
+        Taille du graphe
+
+        Returns:
+            Dictionnaire {vertices, edges}
+        """
+        return {"vertices": len(self._index), "edges": self._edge_count}
+
+    def save_snapshot(self, path: str):
+        """
+        Écrit le graphe et ses index dans un fichier (écriture atomique)
+
+        Args:
+            path: Chemin du snapshot
+        """
+        state = {
+            "version": self.SNAPSHOT_VERSION,
+            "ids": self._ids,
+            "labels": self._labels,
+            "properties": self._properties,
+            "by_label": self._by_label,
+            "by_property": self._by_property,
+            "out": self._out,
+            "in": self._in,
+            "edge_count": self._edge_count
+        }
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._dirty = False
+        print(f"✓ Snapshot du graphe écrit: {path}")
+
+    def load_snapshot(self, path: str):
+        """
+        Recharge un graphe écrit par save_snapshot (index compris, sans reconstruction)
+
+        Args:
+            path: Chemin du snapshot
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+
+        if state.get("version") != self.SNAPSHOT_VERSION:
+            raise ValueError(f"Version de snapshot non supportée: {state.get('version')}")
+
+        self._ids = state["ids"]
+        self._labels = state["labels"]
+        self._properties = state["properties"]
+        self._index = {vertex_id: n for n, vertex_id in enumerate(self._ids) if vertex_id is not None}
+        self._by_label = state["by_label"]
+        self._by_property = state["by_property"]
+        self._out = state["out"]
+        self._in = state["in"]
+        self._edge_count = state["edge_count"]
+        self._related_cache.clear()
+        self._dirty = False
+
+    def _upsert_vertex(self, label: str, vertex_id: str, properties: Dict[str, Any] = None) -> int:
+        """
+        Crée ou réutilise un vertex et remplace les propriétés fournies
+
+        Args:
+            label: Label du vertex
+            vertex_id: Identifiant du vertex
+            properties: Propriétés à écrire
+
+        Returns:
+            Numéro du vertex
+        """
+        self._dirty = True
+        n = self._index.get(vertex_id)
+        if n is None:
+            n = len(self._ids)
+            label = sys.intern(label)
+            self._ids.append(vertex_id)
+            self._labels.append(label)
+            self._properties.append({})
+            self._index[vertex_id] = n
+            self._by_label.setdefault(label, set()).add(n)
+
+        for key, value in (properties or {}).items():
+            self._set_property(n, key, value)
+        return n
+
+    def _set_property(self, n: int, key: str, value: Any):
+        """Écrit une propriété (cardinalité single) et met à jour l'index correspondant"""
+        properties = self._properties[n]
+        if key in self.INDEXED_PROPERTIES:
+            self._unindex(n, key)
+            self._by_property.setdefault((self._labels[n], key), {}).setdefault(value, set()).add(n)
+        properties[key] = value
+
+    def _drop_property(self, n: int, key: str):
+        """Supprime une propriété d'un vertex"""
+        if key in self._properties[n]:
+            self._dirty = True
+            self._unindex(n, key)
+            del self._properties[n][key]
+
+    def _unindex(self, n: int, key: str):
+        """Retire la valeur courante d'une propriété indexée de son index"""
+        old = self._properties[n].get(key)
+        if old is None:
+            return
+        index = self._by_property.get((self._labels[n], key), {})
+        members = index.get(old)
+        if members is not None:
+            members.discard(n)
+            if not members:
+                del index[old]
+
+    def _upsert_edge(self, label: str, from_id: str, to_id: str) -> bool:
+        """
+        Crée une arête si elle n'existe pas déjà
+
+        Args:
+            label: Label de l'arête
+            from_id: Identifiant du vertex source
+            to_id: Identifiant du vertex cible
+
+        Returns:
+            True si les deux extrémités existent (arête créée ou déjà présente)
+        """
+        source = self._index.get(from_id)
+        target = self._index.get(to_id)
+        if source is None or target is None:
+            return False
+
+        targets = self._out.setdefault(label, {}).setdefault(source, {})
+        if target not in targets:
+            self._dirty = True
+            self._related_cache.clear()
+            targets[target] = None
+            self._in.setdefault(label, {}).setdefault(target, {})[source] = None
+            self._edge_count += 1
+        return True
+
+    def _drop_vertex(self, n: int):
+        """Supprime un vertex, ses arêtes et ses entrées d'index"""
+        self._dirty = True
+        for key in self.INDEXED_PROPERTIES:
+            self._unindex(n, key)
+        self._by_label.get(self._labels[n], set()).discard(n)
+        del self._index[self._ids[n]]
+
+        for adjacency, reverse in ((self._out, self._in), (self._in, self._out)):
+            for label, edges in adjacency.items():
+                for m in edges.pop(n, ()):
+                    del reverse[label][m][n]
+                    self._edge_count -= 1
+
+        self._ids[n] = None
+        self._labels[n] = None
+        self._properties[n] = None
+        self._related_cache.clear()
+
+    def _neighbors(self, n: int, labels: List[str] = None):
+        """Voisins d'un vertex dans les deux directions (équivalent de both(*labels))"""
+        for adjacency in (self._out, self._in):
+            for label in (labels or adjacency):
+                yield from adjacency.get(label, {}).get(n, ())
+
+    def _degree(self, n: int) -> int:
+        """Nombre d'arêtes d'un vertex"""
+        return sum(len(edges.get(n, ())) for adjacency in (self._out, self._in) for edges in adjacency.values())
+
+    def vertex(self, vertex_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retourne un vertex
+
+        Args:
+            vertex_id: Identifiant du vertex
+
+        Returns:
+            Dictionnaire {id, label, properties}, None si le vertex n'existe pas
+        """
+        n = self._index.get(vertex_id)
+        if n is None:
+            return None
+        return {"id": vertex_id, "label": self._labels[n], "properties": dict(self._properties[n])}
+
+    def find_vertices(self, label: str, key: str = None, value: Any = None) -> List[str]:
+        """
+        Recherche des vertices par label, et éventuellement par valeur de propriété
+
+        Args:
+            label: Label des vertices
+            key: Propriété filtrée (indexée si elle figure dans INDEXED_PROPERTIES)
+            value: Valeur attendue
+
+        Returns:
+            Identifiants des vertices, dans l'ordre de création
+        """
+        if key is None:
+            members = self._by_label.get(label, ())
+        elif key in self.INDEXED_PROPERTIES:
+            members = self._by_property.get((label, key), {}).get(value, ())
+        else:
+            members = [n for n in self._by_label.get(label, ()) if self._properties[n].get(key) == value]
+        return [self._ids[n] for n in sorted(members)]
+
+    def insert_document(self, document_id: str, title: str, source: str) -> str:
+        """
+        Insère ou met à jour un nœud Document
+
+        Args:
+            document_id: Identifiant du document
+            title: Titre du document
+            source: Source du document
+
+        Returns:
+            Chaîne vide (pas de requête à exporter)
+        """
+        self._upsert_vertex('Document', document_id, {'title': title, 'source': source})
+        self.stats["vertices"] += 1
+        print(f"✓ Document inséré: {document_id}")
+        return ""
+
+    def insert_chunk(self, chunk: Dict[str, Any]) -> str:
+        """
+        Insère ou met à jour un nœud Chunk, sa relation au document et ses annotations
+
+        Args:
+            chunk: Dictionnaire contenant les données du chunk
+
+        Returns:
+            Chaîne vide (pas de requête à exporter)
+        """
+        chunk_id = chunk["id"]
+        annotations = chunk.get("annotations", [])
+
+        properties = {
+            'document_id': chunk["document_id"],
+            'page': chunk["metadata"]["page"],
+            'type': chunk["metadata"]["type"]
+        }
+        if self.store_content:
+            properties['content'] = chunk["content"][:500]
+        n = self._upsert_vertex('Chunk', chunk_id, properties)
+        self.stats["vertices"] += 1
+
+        if self._upsert_edge('HAS_CHUNK', chunk["document_id"], chunk_id):
+            self.stats["edges"] += 1
+
+        if self.annotation_mode == "properties":
+            present = {annotation["type"] for annotation in annotations}
+            for annotation_type in ANNOTATION_TYPES:
+                if annotation_type not in present:
+                    self._drop_property(n, ANNOTATION_PROPERTY_PREFIX + annotation_type)
+            for annotation in annotations:
+                self._set_property(n, ANNOTATION_PROPERTY_PREFIX + annotation["type"], annotation["value"])
+        else:
+            for annotation in annotations:
+                self.insert_annotation(chunk_id, annotation)
+
+        return ""
+
+    def insert_annotation(self, chunk_id: str, annotation: Dict[str, Any]) -> str:
+        """
+        Insère une annotation et la relie à un chunk
+
+        Args:
+            chunk_id: Identifiant du chunk
+            annotation: Dictionnaire contenant l'annotation
+
+        Returns:
+            Chaîne vide (pas de requête à exporter)
+        """
+        if self.annotation_mode == "shared":
+            ann_id = shared_annotation_id(annotation["type"], annotation["value"])
+            properties = {'type': annotation["type"], 'value': annotation["value"]}
+        else:
+            ann_id = f"{chunk_id}_ann_{annotation['type']}"
+            properties = {'type': annotation["type"], 'value': annotation["value"],
+                          'context': annotation["context"]}
+
+        # Comme NeptuneClient, un vertex partagé n'est compté qu'à sa création
+        created = ann_id not in self._index
+        self._upsert_vertex('Annotation', ann_id, properties)
+        if created or self.annotation_mode != "shared":
+            self.stats["vertices"] += 1
+        if self._upsert_edge('HAS_ANNOTATION', chunk_id, ann_id):
+            self.stats["edges"] += 1
+        return ""
+
+    def merge_topic(self, topic_id: str, name: str, topic_type: str) -> str:
+        """
+        Insère ou met à jour un nœud Topic
+
+        Args:
+            topic_id: Identifiant du topic
+            name: Nom du topic
+            topic_type: Type du topic
+
+        Returns:
+            Chaîne vide (pas de requête à exporter)
+        """
+        return self.merge_topics({topic_id: {'name': name, 'type': topic_type}})[0]
+
+    def merge_topics(self, topics: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Insère ou met à jour des nœuds Topic
+
+        Args:
+            topics: Dictionnaire {topic_id: {name, type, ...}}
+
+        Returns:
+            Une chaîne vide (pas de requête à exporter)
+        """
+        for topic_id, topic_data in topics.items():
+            self._upsert_vertex('Topic', topic_id, {'name': topic_data['name'], 'type': topic_data['type']})
+        self.stats["vertices"] += len(topics)
+        return [""]
+
+    def create_relationship(self, from_id: str, to_id: str, relationship: str) -> str:
+        """
+        Crée une relation entre deux nœuds si elle n'existe pas déjà
+
+        Args:
+            from_id: Identifiant du nœud source
+            to_id: Identifiant du nœud cible
+            relationship: Type de relation (voir RELATIONSHIP_LABELS)
+
+        Returns:
+            Chaîne vide (pas de requête à exporter)
+        """
+        return self.create_relationships([(from_id, to_id, relationship)])[0]
+
+    def create_relationships(self, relationships: List[Tuple[str, str, str]],
+                             targets: Dict[str, Dict[str, Any]] = None) -> List[str]:
+        """
+        Crée des relations absentes du graphe (une extrémité absente est ignorée, sauf
+        une cible présente dans targets, créée si la source existe: voir NeptuneClient)
+
+        Args:
+            relationships: Triplets (id source, id cible, type de relation)
+            targets: Propriétés des cibles à créer si absentes {id: propriétés}
+
+        Returns:
+            Une chaîne vide (pas de requête à exporter)
+
+        Raises:
+            ValueError: si un type de relation est inconnu
+        """
+        for from_id, to_id, relationship in relationships:
+            if relationship not in self.RELATIONSHIP_LABELS:
+                raise ValueError(f"Type de relation inconnu: {relationship} "
+                                 f"(attendu: {', '.join(self.RELATIONSHIP_LABELS)})")
+            if (targets and to_id in targets and to_id not in self._index
+                    and from_id in self._index):
+                self._upsert_vertex(self.RELATIONSHIP_LABELS[relationship][1], to_id, targets[to_id])
+                self.stats["vertices"] += 1
+            if self._upsert_edge(relationship, from_id, to_id):
+                self.stats["edges"] += 1
+        return [""]
+
+    def get_topic_ids(self) -> List[str]:
+        """
+        Identifiants des Topics présents dans le graphe
+
+        Returns:
+            Identifiants des vertices Topic
+        """
+        return [self._ids[n] for n in self._by_label.get("Topic", ())]
+
+    def delete_document(self, document_id: str) -> Dict[str, int]:
+        """
+        Supprime un document, ses chunks, leurs annotations et arêtes, puis les Topics
+        et annotations partagées que plus aucun chunk n'utilise (voir NeptuneClient)
+
+        Args:
+            document_id: Identifiant du document
+
+        Returns:
+            Statistiques {chunks, annotations, topics} des vertices supprimés
+        """
+        deleted = {"chunks": 0, "annotations": 0, "topics": 0}
+        document = self._index.get(document_id)
+        if document is None:
+            return deleted
+
+        chunks = list(self._out.get('HAS_CHUNK', {}).get(document, ()))
+        topics, annotations = {}, {}
+        for n in chunks:
+            topics.update(self._out.get('ABOUT', {}).get(n, {}))
+            annotations.update(self._out.get('HAS_ANNOTATION', {}).get(n, {}))
+
+        for n in chunks:
+            self._drop_vertex(n)
+        self._drop_vertex(document)
+        deleted["chunks"] = len(chunks)
+
+        # Annotations propres aux chunks, ou partagées et devenues orphelines
+        for n in annotations:
+            if self.annotation_mode == "vertices" or not self._in.get('HAS_ANNOTATION', {}).get(n):
+                self._drop_vertex(n)
+                deleted["annotations"] += 1
+        for n in topics:
+            if not self._in.get('ABOUT', {}).get(n):
+                self._drop_vertex(n)
+                deleted["topics"] += 1
+
+        print(f"✓ Document supprimé du graphe: {document_id} ({deleted['chunks']} chunks, "
+              f"{deleted['annotations']} annotations, {deleted['topics']} topics orphelins)")
+        return deleted
+
+    def get_chunk_annotations(self, chunk_id: str) -> List[Dict[str, Any]]:
+        """
+        Récupère les annotations d'un chunk (même résultat que NeptuneClient)
+
+        Args:
+            chunk_id: Identifiant du chunk
+
+        Returns:
+            Liste des annotations
+        """
+        n = self._index.get(chunk_id)
+        if n is None:
+            return []
+
+        if self.annotation_mode == "properties":
+            return annotations_from_properties(self._properties[n])
+
+        annotations = []
+        for m in self._out.get('HAS_ANNOTATION', {}).get(n, ()):
+            properties = self._properties[m]
+            ann_type = properties.get("type", "")
+            ann_value = properties.get("value", "")
+            annotations.append({
+                "type": ann_type,
+                "value": ann_value,
+                "context": properties.get("context", render_annotation_context(ann_type, ann_value))
+            })
+        return annotations
+
+    def get_related_chunks(self, chunk_id: str, max_distance: int = 2) -> List[str]:
+        """
+        Récupère les chunks liés dans le graphe, du plus au moins lié, avec les mêmes
+        bornes, le même classement et le même cache que NeptuneClient
+
+        Args:
+            chunk_id: Identifiant du chunk de départ
+            max_distance: Distance dans le graphe
+
+        Returns:
+            Liste d'identifiants de chunks
+        """
+        start = self._index.get(chunk_id)
+        if start is None:
+            return []
+
+        key = (chunk_id, max_distance)
+        cached = self._related_cache.get(key)
+        if cached is not None:
+            computed_at, related = cached
+            if not self.related_cache_ttl_seconds or time.monotonic() - computed_at < self.related_cache_ttl_seconds:
+                self._related_cache.move_to_end(key)
+                return related
+            del self._related_cache[key]
+
+        skip = {self._index[v] for v in self.related_skip_vertices if v in self._index}
+        counts = {}
+        on_path = {start}
+
+        def walk(n: int, depth: int):
+            if depth == max_distance:
+                if self._labels[n] == 'Chunk':
+                    counts[n] = counts.get(n, 0) + 1
+                return
+            neighbors = self._neighbors(n, self.related_edge_labels)
+            if self.related_fan_out:
+                neighbors = itertools.islice(neighbors, self.related_fan_out)
+            for m in neighbors:
+                if m in on_path or m in skip:
+                    continue
+                if (self.related_max_degree and self._labels[m] != 'Chunk'
+                        and self._degree(m) > self.related_max_degree):
+                    continue
+                on_path.add(m)
+                walk(m, depth + 1)
+                on_path.discard(m)
+
+        walk(start, 0)
+
+        ranked = sorted(counts, key=lambda n: (-counts[n], self._ids[n]))
+        related = [self._ids[n] for n in ranked]
+        if self.related_max_results:
+            related = related[:self.related_max_results]
+
+        if self.related_cache_size:
+            self._related_cache[key] = (time.monotonic(), related)
+            if len(self._related_cache) > self.related_cache_size:
+                self._related_cache.popitem(last=False)
+        return related
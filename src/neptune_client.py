@@ -2,17 +2,37 @@
 Module pour l'interaction avec AWS Neptune
 """
 
-from gremlin_python.driver import client, serializer
-from gremlin_python.process.anonymous_traversal import traversal
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+import asyncio
 import json
+import time
+
+from annotations import (ANNOTATION_MODES, ANNOTATION_TYPES, ANNOTATION_PROPERTY_PREFIX,
+                         annotations_from_properties, render_annotation_context, shared_annotation_id)
 
 
 class NeptuneClient:
     """Client pour interagir avec AWS Neptune"""
     
-    def __init__(self, endpoint: str, port: int = 8182, use_iam: bool = True):
+    SERIALIZERS = ("graphson", "graphbinary")
+    
+    # Labels (source, cible) des nœuds reliés par chaque type de relation
+    RELATIONSHIP_LABELS = {
+        "HAS_CHUNK": ("Document", "Chunk"),
+        "HAS_ANNOTATION": ("Chunk", "Annotation"),
+        "ABOUT": ("Chunk", "Topic")
+    }
+    
+    def __init__(self, endpoint: str, port: int = 8182, use_iam: bool = True,
+                 annotation_mode: str = "vertices", store_content: bool = True,
+                 pool_size: int = 4, max_workers: int = None, serializer: str = "graphson",
+                 max_in_flight: int = 0, batch_size: int = 50, related_fan_out: int = 50,
+                 related_max_degree: int = 500, related_skip_vertices: List[str] = None,
+                 related_edge_labels: List[str] = None, related_max_results: int = 20,
+                 related_cache_size: int = 1024, related_cache_ttl_seconds: float = 60.0,
+                 reader_endpoints: List[str] = None, reader_retry_seconds: float = 30.0):
         """
         Initialise le client Neptune
         
@@ -20,46 +40,396 @@ class NeptuneClient:
             endpoint: Endpoint du cluster Neptune
             port: Port de connexion
             use_iam: Utiliser l'authentification IAM
+            annotation_mode: Stockage des annotations: "vertices" (un vertex par chunk et
+                             par annotation), "properties" (propriétés du Chunk) ou
+                             "shared" (vertices partagés par couple type/valeur)
+            store_content: Stocker un extrait du contenu sur le Chunk (déjà présent dans OpenSearch)
+            pool_size: Nombre de connexions WebSocket (une requête en cours par connexion)
+            max_workers: Threads du driver pour l'envoi et la réception (défaut: 2 * pool_size + 1,
+                         une traversée asynchrone occupant un thread jusqu'à la lecture de son résultat)
+            serializer: "graphson" (GraphSON v3) ou "graphbinary" (GraphBinary v1, plus compact)
+            max_in_flight: Écritures asynchrones en attente au maximum (0 = écritures bloquantes);
+                           les écritures en attente sont terminées par flush()
+            batch_size: Fusions (topics, relations) regroupées par traversée, chunks supprimés par lot
+            related_fan_out: Voisins suivis au plus par vertex et par saut dans get_related_chunks (0 = illimité)
+            related_max_degree: Vertices de degré supérieur (hubs) non traversés (0 = pas de seuil)
+            related_skip_vertices: Vertices jamais traversés (ex: topics trop génériques)
+            related_edge_labels: Arêtes suivies (None = toutes; ["ABOUT"] = chunks liés par leurs topics)
+            related_max_results: Chunks liés retournés au plus (0 = tous)
+            related_cache_size: Résultats de get_related_chunks conservés (LRU, vidé à chaque écriture
+                                de ce client)
+            related_cache_ttl_seconds: Durée de validité d'un résultat en cache: borne le retard sur
+                                       les écritures d'autres processus (0 = sans limite)
+            reader_endpoints: Endpoints des réplicas en lecture (ex: endpoint "cluster-ro" ou endpoints
+                              d'instances): les lectures y sont réparties tour à tour, les écritures
+                              restent sur endpoint (writer)
+            reader_retry_seconds: Durée d'exclusion d'un reader injoignable avant nouvelle tentative
         """
+        if annotation_mode not in ANNOTATION_MODES:
+            raise ValueError(f"Mode de stockage des annotations inconnu: {annotation_mode} "
+                             f"(attendu: {', '.join(ANNOTATION_MODES)})")
+        if serializer not in self.SERIALIZERS:
+            raise ValueError(f"Sérialiseur Gremlin inconnu: {serializer} (attendu: {', '.join(self.SERIALIZERS)})")
+        
         self.endpoint = endpoint
         self.port = port
         self.use_iam = use_iam
+        self.annotation_mode = annotation_mode
+        self.store_content = store_content
+        self.pool_size = pool_size
+        self.max_workers = max_workers
+        self.serializer = serializer
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.related_fan_out = related_fan_out
+        self.related_max_degree = related_max_degree
+        self.related_skip_vertices = list(related_skip_vertices or [])
+        self.related_edge_labels = list(related_edge_labels or [])
+        self.related_max_results = related_max_results
+        self.related_cache_size = related_cache_size
+        self.related_cache_ttl_seconds = related_cache_ttl_seconds
+        self.reader_endpoints = list(reader_endpoints or [])
+        self.reader_retry_seconds = reader_retry_seconds
+        
+        # Chunks liés déjà calculés: (chunk_id, max_distance) -> (instant du calcul, identifiants)
+        self._related_cache = OrderedDict()
+        
+        # Annotations partagées déjà écrites par ce client (mode "shared")
+        self._shared_annotations = set()
+        
+        # Écritures asynchrones en cours et erreurs non encore remontées par flush()
+        self._in_flight = deque()
+        self._errors = []
+        
+        # Volume d'écriture: vertices et arêtes créés ou fusionnés
+        self.stats = {"vertices": 0, "edges": 0}
         
         # Construction de l'URL de connexion
-        protocol = "wss" if use_iam else "ws"
-        self.connection_url = f"{protocol}://{endpoint}:{port}/gremlin"
+        self.connection_url = self._url(endpoint)
         
-        self.client = None
+        # Connexion au serveur et source de traversées distante (g), ouvertes par connect()
+        self.connection = None
         self.g = None
+        self._offline_g = None
         
+        # Readers {url, connection, g, down_until}, connectés à la première lecture;
+        # les lectures tournent entre eux (réplicas, éventuellement en léger retard sur le writer)
+        self._readers = None
+        self._next_reader = 0
+    
+    @property
+    def client(self):
+        """Connexion distante (None tant que connect() n'a pas été appelé)"""
+        return self.connection
+    
+    def _url(self, endpoint: str) -> str:
+        """URL WebSocket Gremlin d'un endpoint du cluster"""
+        protocol = "wss" if self.use_iam else "ws"
+        return f"{protocol}://{endpoint}:{self.port}/gremlin"
+    
     def connect(self):
-        """Établit la connexion à Neptune"""
-        print(f"Connexion à Neptune: {self.connection_url}")
+        """Établit la connexion au writer Neptune (pool de pool_size connexions)"""
+        print(f"Connexion à Neptune: {self.connection_url} "
+              f"({self.pool_size} connexions, {self.serializer})")
         
         try:
-            self.client = client.Client(
-                self.connection_url,
-                'g',
-                message_serializer=serializer.GraphSONSerializersV3d0()
-            )
-            
-            # Test de connexion
-            result = self.client.submit("g.V().limit(1)").all().result()
+            self.connection, self.g = self._open(self.connection_url)
             print("✓ Connexion Neptune établie")
             
         except Exception as e:
             print(f"✗ Erreur de connexion Neptune: {e}")
             raise
     
+    def _open(self, url: str):
+        """
+        Ouvre une connexion (pool de pool_size connexions) et vérifie l'accès au graphe
+        
+        Args:
+            url: URL WebSocket Gremlin
+            
+        Returns:
+            Couple (connexion, source de traversées distante)
+        """
+        # Driver Gremlin importé uniquement lorsqu'une connexion est ouverte
+        from gremlin_python.driver import serializer
+        from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+        from gremlin_python.process.anonymous_traversal import traversal
+        
+        if self.serializer == "graphbinary":
+            message_serializer = serializer.GraphBinarySerializersV1()
+        else:
+            message_serializer = serializer.GraphSONSerializersV3d0()
+        
+        # Chaque traversée asynchrone occupe un thread en attendant sa réponse, reçue par
+        # un autre thread: avec max_workers = pool_size, le pool se bloquerait lui-même
+        max_workers = self.max_workers or 2 * self.pool_size + 1
+        
+        connection = DriverRemoteConnection(
+            url,
+            'g',
+            pool_size=self.pool_size,
+            max_workers=max_workers,
+            message_serializer=message_serializer
+        )
+        try:
+            source = traversal()
+            g = source.with_(connection) if hasattr(source, 'with_') else source.withRemote(connection)
+            
+            # Test de connexion
+            g.V().limit(1).to_list()
+        except Exception:
+            connection.close()
+            raise
+        return connection, g
+    
     def close(self):
-        """Ferme la connexion"""
-        if self.client:
-            self.client.close()
-            print("Connexion Neptune fermée")
+        """Termine les écritures en attente et ferme les connexions (writer et readers)"""
+        for reader in self._readers or []:
+            if reader["connection"] is not None:
+                reader["connection"].close()
+        self._readers = None
+        
+        if self.connection:
+            try:
+                self.flush()
+            finally:
+                self.connection.close()
+                print("Connexion Neptune fermée")
+    
+    def _read_sources(self):
+        """
+        Sources de traversées pour une lecture: les readers disponibles, à partir du
+        suivant dans le tourniquet, puis le writer en dernier recours
+        
+        Un reader est connecté à sa première utilisation; en échec, il est écarté pendant
+        reader_retry_seconds. Les réplicas pouvant être en léger retard sur le writer,
+        seules les lectures (annotations, chunks liés) leur sont envoyées.
+        
+        Yields:
+            Couples (reader ou None pour le writer, source de traversées)
+        """
+        if self._readers is None:
+            self._readers = [{"url": self._url(endpoint), "connection": None, "g": None, "down_until": 0.0}
+                             for endpoint in self.reader_endpoints]
+        
+        count = len(self._readers)
+        start = self._next_reader
+        self._next_reader = (start + 1) % count if count else 0
+        
+        for offset in range(count):
+            reader = self._readers[(start + offset) % count]
+            if reader["down_until"] > time.monotonic():
+                continue
+            if reader["g"] is None:
+                try:
+                    reader["connection"], reader["g"] = self._open(reader["url"])
+                    print(f"✓ Reader Neptune connecté: {reader['url']}")
+                except Exception as e:
+                    self._mark_reader_down(reader, e)
+                    continue
+            yield reader, reader["g"]
+        
+        yield None, self.g
+    
+    def _mark_reader_down(self, reader: Dict[str, Any], error: Exception):
+        """Écarte un reader en échec pendant reader_retry_seconds (reconnecté ensuite)"""
+        print(f"✗ Reader Neptune indisponible ({reader['url']}), repli pendant "
+              f"{self.reader_retry_seconds:g} s: {error}")
+        if reader["connection"] is not None:
+            try:
+                reader["connection"].close()
+            except Exception:
+                pass
+        reader["connection"], reader["g"] = None, None
+        reader["down_until"] = time.monotonic() + self.reader_retry_seconds
+    
+    @staticmethod
+    def _is_transport_error(error: Exception) -> bool:
+        """
+        Indique si une erreur provient de la connexion (reader injoignable, connexion
+        fermée) et non de la traversée elle-même (erreur de requête, délai dépassé)
+        """
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            return False
+        if isinstance(error, OSError):
+            return True
+        try:
+            from aiohttp import ClientError
+            if isinstance(error, ClientError):
+                return True
+        except ImportError:
+            pass
+        # Erreurs du transport WebSocket du driver Gremlin
+        return isinstance(error, RuntimeError) and str(error).startswith(
+            ("Connection was closed", "Connection was already closed", "Received error on read"))
+    
+    def _read(self, build) -> List[Any]:
+        """
+        Exécute une lecture sur un reader (réparties tour à tour), avec repli sur
+        les readers suivants puis sur le writer en cas d'erreur de connexion
+        
+        Une erreur de la traversée (requête invalide, délai dépassé) est propagée sans
+        écarter le reader: la rejouer ailleurs reporterait sa charge sur le writer.
+        
+        Args:
+            build: Fonction construisant la traversée à partir d'une source (g)
+            
+        Returns:
+            Résultats de la traversée
+        """
+        for reader, g in self._read_sources():
+            if reader is None:
+                return build(g).to_list()
+            try:
+                return build(g).to_list()
+            except Exception as e:
+                if not self._is_transport_error(e):
+                    raise
+                self._mark_reader_down(reader, e)
+    
+    def _source(self):
+        """
+        Source de traversées: distante si connecté, sinon locale (traversées
+        construites uniquement pour être traduites en texte, ex: dry-run)
+        """
+        if self.g is not None:
+            return self.g
+        if self._offline_g is None:
+            from gremlin_python.process.graph_traversal import GraphTraversalSource
+            from gremlin_python.process.traversal import TraversalStrategies
+            from gremlin_python.structure.graph import Graph
+            self._offline_g = GraphTraversalSource(Graph(), TraversalStrategies())
+        return self._offline_g
+    
+    def _translate(self, traversal) -> str:
+        """
+        Représentation textuelle (Gremlin-Groovy) d'une traversée, pour les exports et le débogage
+        
+        Uniquement hors connexion: la traduction coûte autant que la construction de la
+        traversée, les écritures envoyées ne sont pas traduites.
+        """
+        from gremlin_python.process.translator import Translator
+        return Translator('g').translate(traversal.bytecode)
+    
+    def submit_async(self, traversal) -> Future:
+        """
+        Envoie une traversée (bytecode) sans attendre son résultat
+        
+        Au plus max_in_flight traversées restent en attente: au-delà, la plus ancienne est
+        attendue avant l'envoi. L'envoi lui-même attend qu'une connexion du pool soit libre.
+        
+        Args:
+            traversal: Traversée construite depuis self.g
+            
+        Returns:
+            Future de la traversée
+        """
+        while self._in_flight and len(self._in_flight) >= max(self.max_in_flight, 1):
+            self._wait(self._in_flight.popleft())
+        
+        future = traversal.promise()
+        self._in_flight.append(future)
+        return future
+    
+    def flush(self) -> int:
+        """
+        Attend la fin de toutes les écritures asynchrones
+        
+        Returns:
+            Nombre d'écritures terminées
+            
+        Raises:
+            RuntimeError: si au moins une écriture a échoué (après attente de toutes les autres)
+        """
+        completed = 0
+        while self._in_flight:
+            self._wait(self._in_flight.popleft())
+            completed += 1
+        
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise RuntimeError(f"{len(errors)} écriture(s) Neptune en échec, première erreur: {errors[0]}")
+        return completed
+    
+    def _wait(self, future: Future):
+        """Attend une traversée asynchrone et conserve son erreur éventuelle pour flush()"""
+        try:
+            future.result()
+        except Exception as e:
+            self._errors.append(e)
+    
+    def _submit(self, traversal):
+        """Envoie une écriture: asynchrone si max_in_flight > 0, bloquante sinon"""
+        # Le voisinage des chunks peut changer: les chunks liés en cache sont invalidés
+        self._related_cache.clear()
+        if self.max_in_flight > 0:
+            self.submit_async(traversal)
+        else:
+            traversal.to_list()
+    
+    def _upsert_vertex(self, traversal, label: str, vertex_id: str, properties: Dict[str, Any] = None):
+        """
+        Fusion (fold/coalesce) d'un vertex identifié par son ID (T.id)
+        
+        Le vertex est créé s'il n'existe pas, sinon réutilisé; ses propriétés sont
+        remplacées (cardinalité single) dans les deux cas. Une réécriture ne crée
+        donc ni doublon ni valeur supplémentaire.
+        
+        Args:
+            traversal: Traversée à prolonger, ou source d'une nouvelle traversée
+                       (self._source(), ou __ pour une traversée anonyme)
+            label: Label du vertex
+            vertex_id: ID du vertex (identifiant naturel: chunk, document, topic, annotation)
+            properties: Propriétés à écrire
+            
+        Returns:
+            Traversée positionnée sur le vertex
+        """
+        from gremlin_python.process.graph_traversal import GraphTraversal, __
+        from gremlin_python.process.traversal import Cardinality, T
+        
+        create = __.add_v(label).property(T.id, vertex_id)
+        if isinstance(traversal, GraphTraversal):
+            # En cours de traversée, fold() perdrait les étapes nommées (as_) précédentes
+            traversal = traversal.coalesce(__.V(vertex_id), create)
+        else:
+            traversal = (traversal.V(vertex_id)
+                         .fold()
+                         .coalesce(__.unfold(), create))
+        
+        for key, value in (properties or {}).items():
+            traversal = traversal.property(Cardinality.single, key, value)
+        return traversal
+    
+    def _upsert_edge(self, traversal, label: str, from_step: str = None, from_id: str = None):
+        """
+        Ajoute à une traversée la fusion d'une arête vers le vertex courant
+        
+        Args:
+            traversal: Traversée positionnée sur le vertex cible
+            label: Label de l'arête
+            from_step: Étape nommée (as_) du vertex source dans la traversée
+            from_id: ID du vertex source (si from_step n'est pas fourni)
+            
+        Returns:
+            Traversée positionnée sur l'arête (existante ou créée)
+        """
+        from gremlin_python.process.graph_traversal import __
+        
+        if from_step is not None:
+            return traversal.coalesce(
+                __.in_e(label).where(__.out_v().as_(from_step)),
+                __.add_e(label).from_(from_step)
+            )
+        
+        return traversal.coalesce(
+            __.in_e(label).where(__.out_v().has_id(from_id)),
+            __.add_e(label).from_(__.V(from_id))
+        )
     
     def insert_document(self, document_id: str, title: str, source: str) -> str:
         """
-        Insère un nœud Document dans Neptune
+        Insère ou met à jour un nœud Document dans Neptune
         
         Args:
             document_id: Identifiant du document
@@ -67,139 +437,380 @@ class NeptuneClient:
             source: Source du document
             
         Returns:
-            Query Cypher pour dry-run
-        """
-        query = f"""
-        g.addV('Document')
-         .property('id', '{document_id}')
-         .property('title', '{title}')
-         .property('source', '{source}')
+            Traversée Gremlin (texte) hors connexion (dry-run), None une fois envoyée
         """
+        traversal = self._upsert_vertex(self._source(), 'Document', document_id, {'title': title, 'source': source})
         
         if self.client:
-            self.client.submit(query).all().result()
+            self._submit(traversal)
+            self.stats["vertices"] += 1
             print(f"✓ Document inséré: {document_id}")
+            return None
         
-        return query
+        return self._translate(traversal)
     
     def insert_chunk(self, chunk: Dict[str, Any]) -> str:
         """
-        Insère un nœud Chunk et ses relations dans Neptune
+        Insère ou met à jour un nœud Chunk, sa relation au document et ses annotations en une seule traversée
+        
+        Chaque chunk ne dépend que du Document (et des annotations partagées, écrites
+        au préalable): les écritures de chunks peuvent donc être envoyées en parallèle.
+        Toutes les écritures sont des fusions: réingérer un document ne duplique rien.
         
         Args:
             chunk: Dictionnaire contenant les données du chunk
             
         Returns:
-            Query Cypher pour dry-run
+            Traversée Gremlin (texte) hors connexion (dry-run), None une fois envoyée
         """
+        from gremlin_python.process.graph_traversal import __
+        from gremlin_python.process.traversal import Cardinality
+        
         chunk_id = chunk["id"]
         document_id = chunk["document_id"]
-        content = chunk["content"].replace("'", "\\'")[:500]  # Limiter la taille
-        page = chunk["metadata"]["page"]
-        element_type = chunk["metadata"]["type"]
-        
-        # Création du chunk
-        query = f"""
-        g.addV('Chunk')
-         .property('id', '{chunk_id}')
-         .property('document_id', '{document_id}')
-         .property('content', '{content}')
-         .property('page', {page})
-         .property('type', '{element_type}')
-        """
-        
-        if self.client:
-            self.client.submit(query).all().result()
+        annotations = chunk.get("annotations", [])
+        vertices, edges = 1, 1
+        
+        if self.annotation_mode == "shared":
+            # Les vertices partagés doivent exister avant d'être reliés
+            self._ensure_shared_annotations(annotations)
+        
+        # Chunk
+        properties = {
+            'document_id': document_id,
+            'page': chunk["metadata"]["page"],
+            'type': chunk["metadata"]["type"]
+        }
+        if self.store_content:
+            properties['content'] = chunk["content"][:500]  # Limiter la taille
+        traversal = self._upsert_vertex(self._source(), 'Chunk', chunk_id, properties)
+        
+        if self.annotation_mode == "properties":
+            # Annotations stockées sur le chunk: ni vertex ni arête supplémentaire. Les
+            # annotations d'une ingestion précédente absentes de celle-ci sont retirées.
+            present = {annotation["type"] for annotation in annotations}
+            stale = [ANNOTATION_PROPERTY_PREFIX + t for t in ANNOTATION_TYPES if t not in present]
+            if stale:
+                traversal = traversal.side_effect(__.properties(*stale).drop())
+            for annotation in annotations:
+                traversal = traversal.property(Cardinality.single, ANNOTATION_PROPERTY_PREFIX + annotation["type"],
+                                               annotation["value"])
         
         # Relation avec le document
-        relation_query = f"""
-        g.V().has('Document', 'id', '{document_id}')
-         .addE('HAS_CHUNK')
-         .to(g.V().has('Chunk', 'id', '{chunk_id}'))
-        """
+        traversal = self._upsert_edge(traversal.as_('c'), 'HAS_CHUNK', from_id=document_id).select('c')
+        
+        # Annotations (vertices dédiés ou partagés)
+        if self.annotation_mode != "properties":
+            for annotation in annotations:
+                if self.annotation_mode == "shared":
+                    ann_id = shared_annotation_id(annotation["type"], annotation["value"])
+                    traversal = traversal.V(ann_id)
+                else:
+                    traversal = self._upsert_vertex(traversal, 'Annotation', f"{chunk_id}_ann_{annotation['type']}", {
+                        'type': annotation["type"],
+                        'value': annotation["value"],
+                        'context': annotation["context"]
+                    })
+                    vertices += 1
+                traversal = self._upsert_edge(traversal, 'HAS_ANNOTATION', 'c').select('c')
+                edges += 1
         
         if self.client:
-            self.client.submit(relation_query).all().result()
-        
-        full_query = query + "\n" + relation_query
+            self._submit(traversal)
+            self.stats["vertices"] += vertices
+            self.stats["edges"] += edges
+            return None
         
-        # Insertion des annotations
-        for annotation in chunk.get("annotations", []):
-            ann_query = self.insert_annotation(chunk_id, annotation)
-            full_query += "\n" + ann_query
+        return self._translate(traversal)
+    
+    def _ensure_shared_annotations(self, annotations: List[Dict[str, Any]]):
+        """
+        Crée les vertices Annotation partagés pas encore écrits par ce client (mode "shared")
         
-        if self.client:
-            print(f"✓ Chunk inséré: {chunk_id}")
+        Les créations sont bloquantes: les chunks envoyés ensuite, éventuellement en
+        parallèle, peuvent s'y relier sans risque de doublon.
         
-        return full_query
+        Args:
+            annotations: Annotations d'un chunk
+        """
+        for annotation in annotations:
+            ann_id = shared_annotation_id(annotation["type"], annotation["value"])
+            if ann_id in self._shared_annotations:
+                continue
+            
+            if self.client:
+                self._upsert_vertex(self._source(), 'Annotation', ann_id, {
+                    'type': annotation["type"],
+                    'value': annotation["value"]
+                }).to_list()
+                self.stats["vertices"] += 1
+            self._shared_annotations.add(ann_id)
     
     def insert_annotation(self, chunk_id: str, annotation: Dict[str, Any]) -> str:
         """
         Insère une annotation et la relie à un chunk
         
+        En mode "shared", le vertex Annotation est commun à tous les chunks portant la
+        même annotation: il n'est créé qu'une fois et son contexte n'est pas stocké.
+        
         Args:
             chunk_id: Identifiant du chunk
             annotation: Dictionnaire contenant l'annotation
             
         Returns:
-            Query Cypher pour dry-run
+            Traversée Gremlin (texte) hors connexion (dry-run), None une fois envoyée
         """
-        ann_type = annotation["type"]
-        ann_value = annotation["value"].replace("'", "\\'")
-        ann_context = annotation["context"].replace("'", "\\'")
-        ann_id = f"{chunk_id}_ann_{ann_type}"
+        if self.annotation_mode == "shared":
+            self._ensure_shared_annotations([annotation])
+            ann_id = shared_annotation_id(annotation["type"], annotation["value"])
+            traversal = self._source().V(ann_id)
+        else:
+            traversal = self._upsert_vertex(self._source(), 'Annotation', f"{chunk_id}_ann_{annotation['type']}", {
+                'type': annotation["type"],
+                'value': annotation["value"],
+                'context': annotation["context"]
+            })
+        traversal = self._upsert_edge(traversal, 'HAS_ANNOTATION', from_id=chunk_id)
+        
+        if self.client:
+            self._submit(traversal)
+            self.stats["vertices"] += 0 if self.annotation_mode == "shared" else 1
+            self.stats["edges"] += 1
+            return None
         
-        query = f"""
-        g.addV('Annotation')
-         .property('id', '{ann_id}')
-         .property('type', '{ann_type}')
-         .property('value', '{ann_value}')
-         .property('context', '{ann_context}')
+        return self._translate(traversal)
+    
+    def merge_topic(self, topic_id: str, name: str, topic_type: str) -> str:
         """
+        Insère ou met à jour un nœud Topic (partagé entre chunks et documents)
         
-        if self.client:
-            self.client.submit(query).all().result()
+        Args:
+            topic_id: Identifiant du topic
+            name: Nom du topic
+            topic_type: Type du topic (business_concept, keyword)
+            
+        Returns:
+            Traversée Gremlin (texte) hors connexion (dry-run), None une fois envoyée
+        """
+        queries = self.merge_topics({topic_id: {'name': name, 'type': topic_type}})
+        return queries[0] if queries else None
+    
+    def merge_topics(self, topics: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Insère ou met à jour des nœuds Topic par lots de batch_size fusions par traversée
+        
+        Chaque fusion est isolée dans un sideEffect: elle n'est pas multipliée par les
+        résultats des précédentes.
         
-        relation_query = f"""
-        g.V().has('Chunk', 'id', '{chunk_id}')
-         .addE('HAS_ANNOTATION')
-         .to(g.V().has('Annotation', 'id', '{ann_id}'))
+        Args:
+            topics: Dictionnaire {topic_id: {name, type, ...}}
+            
+        Returns:
+            Traversées Gremlin (texte) hors connexion (dry-run), une par lot; liste vide une fois envoyées
         """
+        from gremlin_python.process.graph_traversal import __
+        
+        queries = []
+        items = list(topics.items())
+        
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            traversal = self._source().inject(0)
+            for topic_id, topic_data in batch:
+                traversal = traversal.side_effect(self._upsert_vertex(__, 'Topic', topic_id, {
+                    'name': topic_data['name'],
+                    'type': topic_data['type']
+                }))
+            
+            if self.client:
+                self._submit(traversal)
+                self.stats["vertices"] += len(batch)
+            else:
+                queries.append(self._translate(traversal))
         
-        if self.client:
-            self.client.submit(relation_query).all().result()
+        return queries
+    
+    def create_relationship(self, from_id: str, to_id: str, relationship: str) -> str:
+        """
+        Crée une relation entre deux nœuds si elle n'existe pas déjà
         
-        return query + "\n" + relation_query
+        Args:
+            from_id: Identifiant du nœud source
+            to_id: Identifiant du nœud cible
+            relationship: Type de relation (voir RELATIONSHIP_LABELS)
+            
+        Returns:
+            Traversée Gremlin (texte) hors connexion (dry-run), None une fois envoyée
+        """
+        queries = self.create_relationships([(from_id, to_id, relationship)])
+        return queries[0] if queries else None
+    
+    def create_relationships(self, relationships: List[Tuple[str, str, str]],
+                             targets: Dict[str, Dict[str, Any]] = None) -> List[str]:
+        """
+        Crée des relations absentes du graphe par lots de batch_size fusions par traversée
+        
+        Chaque fusion est isolée dans un sideEffect: une extrémité absente du graphe
+        n'interrompt pas le reste du lot. Une cible présente dans targets est créée
+        si elle manque (ex: Topic supprimé par un autre processus depuis le chargement
+        du cache des topics), sans réécrire ses propriétés si elle existe.
+        
+        Args:
+            relationships: Triplets (id source, id cible, type de relation)
+            targets: Propriétés des cibles à créer si absentes {id: propriétés}
+            
+        Returns:
+            Traversées Gremlin (texte) hors connexion (dry-run), une par lot; liste vide une fois envoyées
+            
+        Raises:
+            ValueError: si un type de relation est inconnu
+        """
+        from gremlin_python.process.graph_traversal import __
+        from gremlin_python.process.traversal import T
+        
+        queries = []
+        targets = targets or {}
+        
+        for start in range(0, len(relationships), self.batch_size):
+            batch = relationships[start:start + self.batch_size]
+            traversal = self._source().inject(0)
+            for from_id, to_id, relationship in batch:
+                if relationship not in self.RELATIONSHIP_LABELS:
+                    raise ValueError(f"Type de relation inconnu: {relationship} "
+                                     f"(attendu: {', '.join(self.RELATIONSHIP_LABELS)})")
+                if to_id in targets:
+                    create = __.add_v(self.RELATIONSHIP_LABELS[relationship][1]).property(T.id, to_id)
+                    for key, value in targets[to_id].items():
+                        create = create.property(key, value)
+                    edge = __.V(from_id).as_('s').coalesce(__.V(to_id), create)
+                else:
+                    edge = __.V(from_id).as_('s').V(to_id)
+                traversal = traversal.side_effect(self._upsert_edge(edge, relationship, 's'))
+            
+            if self.client:
+                self._submit(traversal)
+                self.stats["edges"] += len(batch)
+            else:
+                queries.append(self._translate(traversal))
+        
+        return queries
+    
+    def get_topic_ids(self) -> List[str]:
+        """
+        Identifiants des Topics présents dans le graphe (lus sur le writer)
+        
+        Returns:
+            Identifiants des vertices Topic
+        """
+        if not self.client:
+            return []
+        return self.g.V().has_label('Topic').id_().to_list()
+    
+    def delete_document(self, document_id: str) -> Dict[str, int]:
+        """
+        Supprime un document, ses chunks, leurs annotations et arêtes par lots bornés
+        
+        Les chunks sont supprimés par lots de batch_size (un drop() sur un grand document
+        dépasserait le délai d'exécution). Les Topics et annotations partagées que plus
+        aucun chunk n'utilise sont ensuite supprimés.
+        
+        Args:
+            document_id: Identifiant du document
+            
+        Returns:
+            Statistiques {chunks, annotations, topics} des vertices supprimés
+        """
+        deleted = {"chunks": 0, "annotations": 0, "topics": 0}
+        if not self.client:
+            return deleted
+        
+        # Les écritures en attente portent peut-être sur ce document
+        self.flush()
+        self._related_cache.clear()
+        
+        topics, shared = set(), set()
+        while True:
+            chunk_ids = self.g.V(document_id).out('HAS_CHUNK').limit(self.batch_size).id_().to_list()
+            if not chunk_ids:
+                break
+            
+            topics.update(self.g.V(*chunk_ids).out('ABOUT').dedup().id_().to_list())
+            if self.annotation_mode == "vertices":
+                # Annotations propres aux chunks: supprimées avec eux
+                deleted["annotations"] += self.g.V(*chunk_ids).out('HAS_ANNOTATION').count().next()
+                self.g.V(*chunk_ids).out('HAS_ANNOTATION').drop().to_list()
+            elif self.annotation_mode == "shared":
+                shared.update(self.g.V(*chunk_ids).out('HAS_ANNOTATION').dedup().id_().to_list())
+            
+            # Supprimer un vertex supprime aussi ses arêtes
+            self.g.V(*chunk_ids).drop().to_list()
+            deleted["chunks"] += len(chunk_ids)
+        
+        self.g.V(document_id).drop().to_list()
+        
+        # Topics et annotations partagées devenus orphelins
+        deleted["topics"] = self._drop_orphans(sorted(topics), 'Topic', 'ABOUT')
+        deleted["annotations"] += self._drop_orphans(sorted(shared), 'Annotation', 'HAS_ANNOTATION')
+        self._shared_annotations.difference_update(shared)
+        
+        print(f"✓ Document supprimé de Neptune: {document_id} ({deleted['chunks']} chunks, "
+              f"{deleted['annotations']} annotations, {deleted['topics']} topics orphelins)")
+        return deleted
+    
+    def _drop_orphans(self, vertex_ids: List[str], label: str, edge_label: str) -> int:
+        """
+        Supprime, par lots de batch_size, les vertices qui n'ont plus d'arête entrante edge_label
+        
+        Args:
+            vertex_ids: Vertices candidats
+            label: Label attendu des vertices
+            edge_label: Label des arêtes entrantes qui maintiennent un vertex
+            
+        Returns:
+            Nombre de vertices supprimés
+        """
+        from gremlin_python.process.graph_traversal import __
+        
+        dropped = 0
+        for start in range(0, len(vertex_ids), self.batch_size):
+            batch = vertex_ids[start:start + self.batch_size]
+            orphans = self.g.V(*batch).has_label(label).not_(__.in_e(edge_label)).id_().to_list()
+            if orphans:
+                self.g.V(*orphans).drop().to_list()
+                dropped += len(orphans)
+        return dropped
     
     def get_chunk_annotations(self, chunk_id: str) -> List[Dict[str, Any]]:
         """
         Récupère les annotations d'un chunk
         
+        Le résultat est identique quel que soit le mode de stockage: le contexte
+        non stocké (modes "properties" et "shared") est recalculé.
+        
         Args:
             chunk_id: Identifiant du chunk
             
         Returns:
             Liste des annotations
         """
-        query = f"""
-        g.V().has('Chunk', 'id', '{chunk_id}')
-         .outE('HAS_ANNOTATION')
-         .inV()
-         .valueMap()
-        """
-        
         if not self.client:
             return []
         
         try:
-            results = self.client.submit(query).all().result()
+            if self.annotation_mode == "properties":
+                results = self._read(lambda g: g.V(chunk_id).value_map())
+                return annotations_from_properties(results[0]) if results else []
+            
+            results = self._read(lambda g: g.V(chunk_id).out_e('HAS_ANNOTATION').in_v().value_map())
             annotations = []
             
             for result in results:
+                ann_type = result.get("type", [""])[0]
+                ann_value = result.get("value", [""])[0]
                 annotations.append({
-                    "type": result.get("type", [""])[0],
-                    "value": result.get("value", [""])[0],
-                    "context": result.get("context", [""])[0]
+                    "type": ann_type,
+                    "value": ann_value,
+                    "context": result.get("context", [render_annotation_context(ann_type, ann_value)])[0]
                 })
             
             return annotations
@@ -210,34 +821,70 @@ class NeptuneClient:
     
     def get_related_chunks(self, chunk_id: str, max_distance: int = 2) -> List[str]:
         """
-        Récupère les chunks liés dans le graphe (pour filtrage)
+        Récupère les chunks liés dans le graphe (pour filtrage), du plus au moins lié
+        
+        L'expansion est bornée: au plus related_fan_out voisins par vertex et par saut,
+        sans traverser les hubs (degré > related_max_degree, ex: topic_document) ni les
+        vertices de related_skip_vertices. Les chunks sont classés par nombre de chemins
+        qui les relient au chunk de départ, soit, à distance 2 par les arêtes ABOUT, par
+        nombre de topics partagés. Les résultats sont mis en cache (LRU, durée de validité
+        related_cache_ttl_seconds).
         
         Args:
             chunk_id: Identifiant du chunk de départ
-            max_distance: Distance maximale dans le graphe
+            max_distance: Distance dans le graphe
             
         Returns:
             Liste d'identifiants de chunks
         """
-        query = f"""
-        g.V().has('Chunk', 'id', '{chunk_id}')
-         .repeat(both().simplePath())
-         .times({max_distance})
-         .hasLabel('Chunk')
-         .values('id')
-         .dedup()
-        """
-        
         if not self.client:
             return []
         
+        key = (chunk_id, max_distance)
+        cached = self._related_cache.get(key)
+        if cached is not None:
+            computed_at, related = cached
+            if not self.related_cache_ttl_seconds or time.monotonic() - computed_at < self.related_cache_ttl_seconds:
+                self._related_cache.move_to_end(key)
+                return related
+            del self._related_cache[key]
+        
+        from gremlin_python.process.graph_traversal import __
+        from gremlin_python.process.traversal import P, T
+        
+        hop = __.both(*self.related_edge_labels)
+        if self.related_fan_out:
+            hop = __.local(hop.limit(self.related_fan_out))
+        hop = hop.simple_path()
+        if self.related_skip_vertices:
+            hop = hop.not_(__.has_id(P.within(*self.related_skip_vertices)))
+        if self.related_max_degree:
+            # Degré compté au plus jusqu'au seuil: un hub n'est jamais parcouru en entier
+            hop = hop.or_(__.has_label('Chunk'),
+                          __.both_e().limit(self.related_max_degree + 1).count().is_(P.lte(self.related_max_degree)))
+        
         try:
-            results = self.client.submit(query).all().result()
-            return list(results)
+            results = self._read(lambda g: (g.V(chunk_id)
+                                            .repeat(hop)
+                                            .times(max_distance)
+                                            .has_label('Chunk')
+                                            .group_count()
+                                            .by(T.id)))
             
         except Exception as e:
             print(f"Erreur lors de la récupération des chunks liés: {e}")
             return []
+        
+        counts = results[0] if results else {}
+        related = sorted(counts, key=lambda related_id: (-counts[related_id], related_id))
+        if self.related_max_results:
+            related = related[:self.related_max_results]
+        
+        if self.related_cache_size:
+            self._related_cache[key] = (time.monotonic(), related)
+            if len(self._related_cache) > self.related_cache_size:
+                self._related_cache.popitem(last=False)
+        return related
     
     def generate_cypher_query(self, operation: str, params: Dict[str, Any]) -> str:
         """
@@ -251,12 +898,12 @@ class NeptuneClient:
             Requête Cypher formatée
         """
         if operation == "CREATE_DOCUMENT":
-            return f"""g.addV('Document').property('id', '{params["id"]}').property('title', '{params["title"]}').property('source', '{params["source"]}')"""
+            return f"""g.addV('Document').property(T.id, '{params["id"]}').property('title', '{params["title"]}').property('source', '{params["source"]}')"""
         
         elif operation == "CREATE_CHUNK":
-            return f"""g.addV('Chunk').property('id', '{params["id"]}').property('document_id', '{params["document_id"]}').property('content', '{params["content"][:100]}...').property('page', {params["page"]})"""
+            return f"""g.addV('Chunk').property(T.id, '{params["id"]}').property('document_id', '{params["document_id"]}').property('content', '{params["content"][:100]}...').property('page', {params["page"]})"""
         
         elif operation == "CREATE_ANNOTATION":
-            return f"""g.addV('Annotation').property('id', '{params["id"]}').property('type', '{params["type"]}').property('value', '{params["value"]}')"""
+            return f"""g.addV('Annotation').property(T.id, '{params["id"]}').property('type', '{params["type"]}').property('value', '{params["value"]}')"""
         
         return ""
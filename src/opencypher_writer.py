@@ -0,0 +1,488 @@
+"""
+Module pour l'écriture dans Neptune en openCypher (HTTP), par lots UNWIND
+"""
+
+from typing import List, Dict, Any, Tuple
+from urllib.parse import urlencode
+import json
+
+from annotations import ANNOTATION_MODES, ANNOTATION_TYPES, ANNOTATION_PROPERTY_PREFIX, shared_annotation_id
+
+
+# Requêtes paramétrées: une requête fusionne toutes les lignes ($rows) d'un lot
+DOCUMENT_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MERGE (d:Document {`~id`: r.id}) "
+    "SET d.title = r.title, d.source = r.source"
+)
+
+TOPIC_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MERGE (t:Topic {`~id`: r.id}) "
+    "SET t.name = r.name, t.type = r.type"
+)
+
+# Les propriétés nulles (annotations absentes en mode "properties") sont supprimées par SET +=
+CHUNK_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MERGE (c:Chunk {`~id`: r.id}) "
+    "SET c += r.properties "
+    "WITH c, r "
+    "MATCH (d:Document {`~id`: r.document_id}) "
+    "MERGE (d)-[:HAS_CHUNK]->(c)"
+)
+
+ANNOTATION_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MATCH (c:Chunk {`~id`: r.chunk_id}) "
+    "MERGE (a:Annotation {`~id`: r.id}) "
+    "SET a += r.properties "
+    "MERGE (c)-[:HAS_ANNOTATION]->(a)"
+)
+
+# Le type d'une relation ne peut pas être paramétré: une requête par type
+RELATIONSHIP_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MATCH (s:{source} {{`~id`: r.source}}), (t:{target} {{`~id`: r.target}}) "
+    "MERGE (s)-[:{relationship}]->(t)"
+)
+
+# Variante créant la cible si elle manque (propriétés écrites uniquement à la création)
+RELATIONSHIP_TARGET_STATEMENT = (
+    "UNWIND $rows AS r "
+    "MATCH (s:{source} {{`~id`: r.source}}) "
+    "MERGE (t:{target} {{`~id`: r.target}}) "
+    "ON CREATE SET t += r.properties "
+    "MERGE (s)-[:{relationship}]->(t)"
+)
+
+
+class OpenCypherWriter:
+    """
+    Écrit le graphe dans Neptune en openCypher via HTTP (alternative au client Gremlin)
+
+    Les écritures sont accumulées puis envoyées par lots de batch_size lignes, chaque
+    lot étant une seule requête paramétrée "UNWIND $rows AS r MERGE ...": documents,
+    topics, chunks (avec leur arête HAS_CHUNK), annotations et relations sont fusionnés
+    (réécrire un document ne crée pas de doublon). Les identifiants sont les IDs des
+    vertices (`~id`), comme pour NeptuneClient.
+
+    Expose les méthodes d'écriture de NeptuneClient (voir graph_store.create_graph_writer).
+    """
+
+    # Labels (source, cible) des nœuds reliés par chaque type de relation
+    RELATIONSHIP_LABELS = {
+        "HAS_CHUNK": ("Document", "Chunk"),
+        "HAS_ANNOTATION": ("Chunk", "Annotation"),
+        "ABOUT": ("Chunk", "Topic")
+    }
+
+    def __init__(self, endpoint: str, port: int = 8182, use_iam: bool = True, region: str = None,
+                 annotation_mode: str = "vertices", store_content: bool = True,
+                 batch_size: int = 1000, pool_size: int = 4, timeout: float = 120.0):
+        """
+        Initialise le writer openCypher
+
+        Args:
+            endpoint: Endpoint du cluster Neptune
+            port: Port HTTP
+            use_iam: Signer les requêtes (SigV4, identifiants AWS de l'environnement) et utiliser HTTPS
+            region: Région AWS du cluster (signature SigV4)
+            annotation_mode: Stockage des annotations: "vertices", "properties" ou "shared"
+                             (voir NeptuneClient)
+            store_content: Stocker un extrait du contenu sur le Chunk
+            batch_size: Lignes fusionnées par requête
+            pool_size: Connexions HTTP conservées
+            timeout: Délai maximal d'une requête, en secondes
+        """
+        if annotation_mode not in ANNOTATION_MODES:
+            raise ValueError(f"Mode de stockage des annotations inconnu: {annotation_mode} "
+                             f"(attendu: {', '.join(ANNOTATION_MODES)})")
+
+        self.endpoint = endpoint
+        self.port = port
+        self.use_iam = use_iam
+        self.region = region
+        self.annotation_mode = annotation_mode
+        self.store_content = store_content
+        self.batch_size = batch_size
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        protocol = "https" if use_iam else "http"
+        self.url = f"{protocol}://{endpoint}:{port}/openCypher"
+
+        # Lignes en attente, par requête, envoyées par flush() dans l'ordre des dépendances
+        self._documents = []
+        self._topics = []
+        self._chunks = []
+        self._annotations = []
+        self._relationships = {}
+
+        # Volume d'écriture: vertices et arêtes créés ou fusionnés, requêtes HTTP envoyées
+        self.stats = {"vertices": 0, "edges": 0, "requests": 0}
+
+        self.session = None
+        self._credentials = None
+        self._shared_annotations = set()
+
+    def connect(self):
+        """Ouvre la session HTTP (connexions réutilisées) et vérifie l'accès au cluster"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        print(f"Connexion à Neptune (openCypher): {self.url}")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if self.use_iam:
+            import boto3
+            self._credentials = boto3.Session().get_credentials()
+
+        try:
+            self.execute("RETURN 1")
+            print("✓ Connexion Neptune établie")
+        except Exception as e:
+            print(f"✗ Erreur de connexion Neptune: {e}")
+            raise
+
+    def close(self):
+        """Envoie les écritures en attente et ferme la session"""
+        if self.session:
+            try:
+                self.flush()
+            finally:
+                self.session.close()
+                self.session = None
+                print("Connexion Neptune fermée")
+
+    def execute(self, statement: str, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Exécute une requête openCypher
+
+        Args:
+            statement: Requête openCypher
+            parameters: Paramètres ($nom) de la requête
+
+        Returns:
+            Lignes de résultat
+
+        Raises:
+            RuntimeError: si Neptune rejette la requête
+        """
+        fields = {"query": statement}
+        if parameters:
+            fields["parameters"] = json.dumps(parameters, ensure_ascii=False)
+        body = urlencode(fields)
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        if self.use_iam:
+            headers = self._sign(body, headers)
+
+        response = self.session.post(self.url, data=body.encode("utf-8"), headers=headers, timeout=self.timeout)
+        self.stats["requests"] += 1
+        if response.status_code != 200:
+            raise RuntimeError(f"Requête openCypher en échec ({response.status_code}): {response.text[:500]}")
+        return response.json().get("results", [])
+
+    def _sign(self, body: str, headers: Dict[str, str]) -> Dict[str, str]:
+        """Ajoute la signature SigV4 (service neptune-db) aux en-têtes d'une requête"""
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        request = AWSRequest(method="POST", url=self.url, data=body, headers=headers)
+        SigV4Auth(self._credentials, "neptune-db", self.region).add_auth(request)
+        return dict(request.headers)
+
+    def _run_batches(self, statement: str, rows: List[Dict[str, Any]]):
+        """Envoie des lignes par lots de batch_size, une requête UNWIND par lot"""
+        for start in range(0, len(rows), self.batch_size):
+            self.execute(statement, {"rows": rows[start:start + self.batch_size]})
+
+    def _maybe_flush(self, pending: List[Any]):
+        """Envoie les écritures en attente dès qu'un lot est complet"""
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Envoie toutes les écritures en attente, dans l'ordre des dépendances
+        (documents et topics, puis chunks, puis annotations et relations)
+
+        Returns:
+            Nombre de lignes envoyées
+        """
+        sent = 0
+        if self.session is None:
+            return sent
+
+        for statement, rows in ((DOCUMENT_STATEMENT, self._documents),
+                                (TOPIC_STATEMENT, self._topics),
+                                (CHUNK_STATEMENT, self._chunks),
+                                (ANNOTATION_STATEMENT, self._annotations)):
+            self._run_batches(statement, rows)
+            sent += len(rows)
+            rows.clear()
+
+        for (relationship, create_target), rows in self._relationships.items():
+            source, target = self.RELATIONSHIP_LABELS[relationship]
+            template = RELATIONSHIP_TARGET_STATEMENT if create_target else RELATIONSHIP_STATEMENT
+            statement = template.format(source=source, target=target, relationship=relationship)
+            self._run_batches(statement, rows)
+            sent += len(rows)
+        self._relationships.clear()
+
+        return sent
+
+    def insert_document(self, document_id: str, title: str, source: str) -> str:
+        """
+        Fusionne un nœud Document (envoyé au prochain flush)
+
+        Args:
+            document_id: Identifiant du document
+            title: Titre du document
+            source: Source du document
+
+        Returns:
+            Requête openCypher du lot
+        """
+        self._documents.append({"id": document_id, "title": title, "source": source})
+        self.stats["vertices"] += 1
+        self._maybe_flush(self._documents)
+        return DOCUMENT_STATEMENT
+
+    def insert_chunk(self, chunk: Dict[str, Any]) -> str:
+        """
+        Fusionne un nœud Chunk, sa relation au document et ses annotations (envoyés par lots)
+
+        Args:
+            chunk: Dictionnaire contenant les données du chunk
+
+        Returns:
+            Requête openCypher du lot
+        """
+        annotations = chunk.get("annotations", [])
+        properties = {
+            "document_id": chunk["document_id"],
+            "page": chunk["metadata"]["page"],
+            "type": chunk["metadata"]["type"]
+        }
+        if self.store_content:
+            properties["content"] = chunk["content"][:500]
+
+        if self.annotation_mode == "properties":
+            # Les annotations absentes de cette ingestion sont retirées (valeur nulle)
+            values = {annotation["type"]: annotation["value"] for annotation in annotations}
+            for annotation_type in ANNOTATION_TYPES:
+                properties[ANNOTATION_PROPERTY_PREFIX + annotation_type] = values.get(annotation_type)
+
+        self._chunks.append({"id": chunk["id"], "document_id": chunk["document_id"], "properties": properties})
+        self.stats["vertices"] += 1
+        self.stats["edges"] += 1
+
+        if self.annotation_mode != "properties":
+            for annotation in annotations:
+                self._queue_annotation(chunk["id"], annotation)
+
+        self._maybe_flush(self._chunks)
+        self._maybe_flush(self._annotations)
+        return CHUNK_STATEMENT
+
+    def _queue_annotation(self, chunk_id: str, annotation: Dict[str, Any]):
+        """Met en attente la fusion d'une annotation et de son arête HAS_ANNOTATION"""
+        if self.annotation_mode == "shared":
+            # Vertex partagé: compté une seule fois, à sa première écriture
+            ann_id = shared_annotation_id(annotation["type"], annotation["value"])
+            properties = {"type": annotation["type"], "value": annotation["value"]}
+            if ann_id not in self._shared_annotations:
+                self._shared_annotations.add(ann_id)
+                self.stats["vertices"] += 1
+        else:
+            ann_id = f"{chunk_id}_ann_{annotation['type']}"
+            properties = {"type": annotation["type"], "value": annotation["value"],
+                          "context": annotation["context"]}
+            self.stats["vertices"] += 1
+
+        self._annotations.append({"id": ann_id, "chunk_id": chunk_id, "properties": properties})
+        self.stats["edges"] += 1
+
+    def insert_annotation(self, chunk_id: str, annotation: Dict[str, Any]) -> str:
+        """
+        Fusionne une annotation et la relie à un chunk (envoyées au prochain flush)
+
+        Args:
+            chunk_id: Identifiant du chunk
+            annotation: Dictionnaire contenant l'annotation
+
+        Returns:
+            Requête openCypher du lot
+        """
+        self._queue_annotation(chunk_id, annotation)
+        self._maybe_flush(self._annotations)
+        return ANNOTATION_STATEMENT
+
+    def merge_topic(self, topic_id: str, name: str, topic_type: str) -> str:
+        """
+        Fusionne un nœud Topic (envoyé au prochain flush)
+
+        Args:
+            topic_id: Identifiant du topic
+            name: Nom du topic
+            topic_type: Type du topic
+
+        Returns:
+            Requête openCypher du lot
+        """
+        return self.merge_topics({topic_id: {"name": name, "type": topic_type}})[0]
+
+    def merge_topics(self, topics: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Fusionne des nœuds Topic (envoyés par lots de batch_size)
+
+        Args:
+            topics: Dictionnaire {topic_id: {name, type, ...}}
+
+        Returns:
+            Requête openCypher des lots
+        """
+        for topic_id, topic_data in topics.items():
+            self._topics.append({"id": topic_id, "name": topic_data["name"], "type": topic_data["type"]})
+        self.stats["vertices"] += len(topics)
+        self._maybe_flush(self._topics)
+        return [TOPIC_STATEMENT]
+
+    def create_relationship(self, from_id: str, to_id: str, relationship: str) -> str:
+        """
+        Fusionne une relation entre deux nœuds (envoyée au prochain flush)
+
+        Args:
+            from_id: Identifiant du nœud source
+            to_id: Identifiant du nœud cible
+            relationship: Type de relation (voir RELATIONSHIP_LABELS)
+
+        Returns:
+            Requête openCypher du lot
+        """
+        return self.create_relationships([(from_id, to_id, relationship)])[0]
+
+    def create_relationships(self, relationships: List[Tuple[str, str, str]],
+                             targets: Dict[str, Dict[str, Any]] = None) -> List[str]:
+        """
+        Fusionne des relations (envoyées par lots de batch_size, une requête par type)
+
+        Args:
+            relationships: Triplets (id source, id cible, type de relation)
+            targets: Propriétés des cibles à créer si absentes {id: propriétés} (voir NeptuneClient)
+
+        Returns:
+            Requêtes openCypher des types de relation concernés
+
+        Raises:
+            ValueError: si un type de relation est inconnu
+        """
+        for _, _, relationship in relationships:
+            if relationship not in self.RELATIONSHIP_LABELS:
+                raise ValueError(f"Type de relation inconnu: {relationship} "
+                                 f"(attendu: {', '.join(self.RELATIONSHIP_LABELS)})")
+
+        targets = targets or {}
+        for from_id, to_id, relationship in relationships:
+            create_target = to_id in targets
+            rows = self._relationships.setdefault((relationship, create_target), [])
+            if create_target:
+                rows.append({"source": from_id, "target": to_id, "properties": targets[to_id]})
+            else:
+                rows.append({"source": from_id, "target": to_id})
+            self.stats["edges"] += 1
+            self._maybe_flush(rows)
+
+        return [
+            (RELATIONSHIP_TARGET_STATEMENT if create_target else RELATIONSHIP_STATEMENT).format(
+                source=self.RELATIONSHIP_LABELS[relationship][0],
+                target=self.RELATIONSHIP_LABELS[relationship][1],
+                relationship=relationship)
+            for relationship, create_target in sorted({(r, t in targets) for _, t, r in relationships})
+        ]
+
+    def get_topic_ids(self) -> List[str]:
+        """
+        Identifiants des Topics présents dans le graphe
+
+        Returns:
+            Identifiants des vertices Topic
+        """
+        if self.session is None:
+            return []
+        return [row["id"] for row in self.execute("MATCH (t:Topic) RETURN id(t) AS id")]
+
+    def delete_document(self, document_id: str) -> Dict[str, int]:
+        """
+        Supprime un document, ses chunks, leurs annotations et arêtes par lots de
+        batch_size chunks, puis les Topics et annotations partagées devenus orphelins
+
+        Args:
+            document_id: Identifiant du document
+
+        Returns:
+            Statistiques {chunks, annotations, topics} des vertices supprimés
+        """
+        deleted = {"chunks": 0, "annotations": 0, "topics": 0}
+        if self.session is None:
+            return deleted
+
+        self.flush()
+
+        topics, shared = set(), set()
+        while True:
+            rows = self.execute(
+                "MATCH (:Document {`~id`: $id})-[:HAS_CHUNK]->(c:Chunk) RETURN id(c) AS id LIMIT $limit",
+                {"id": document_id, "limit": self.batch_size}
+            )
+            chunk_ids = [row["id"] for row in rows]
+            if not chunk_ids:
+                break
+
+            topics.update(row["id"] for row in self.execute(
+                "MATCH (c:Chunk)-[:ABOUT]->(t:Topic) WHERE id(c) IN $ids RETURN DISTINCT id(t) AS id",
+                {"ids": chunk_ids}
+            ))
+            if self.annotation_mode == "vertices":
+                rows = self.execute(
+                    "MATCH (c:Chunk)-[:HAS_ANNOTATION]->(a:Annotation) WHERE id(c) IN $ids "
+                    "DETACH DELETE a RETURN count(a) AS deleted",
+                    {"ids": chunk_ids}
+                )
+                deleted["annotations"] += rows[0]["deleted"] if rows else 0
+            elif self.annotation_mode == "shared":
+                shared.update(row["id"] for row in self.execute(
+                    "MATCH (c:Chunk)-[:HAS_ANNOTATION]->(a:Annotation) WHERE id(c) IN $ids RETURN DISTINCT id(a) AS id",
+                    {"ids": chunk_ids}
+                ))
+
+            self.execute("MATCH (c:Chunk) WHERE id(c) IN $ids DETACH DELETE c", {"ids": chunk_ids})
+            deleted["chunks"] += len(chunk_ids)
+
+        self.execute("MATCH (d:Document {`~id`: $id}) DETACH DELETE d", {"id": document_id})
+
+        deleted["topics"] = self._drop_orphans(sorted(topics), "Topic", "ABOUT")
+        deleted["annotations"] += self._drop_orphans(sorted(shared), "Annotation", "HAS_ANNOTATION")
+        self._shared_annotations.difference_update(shared)
+
+        print(f"✓ Document supprimé de Neptune: {document_id} ({deleted['chunks']} chunks, "
+              f"{deleted['annotations']} annotations, {deleted['topics']} topics orphelins)")
+        return deleted
+
+    def _drop_orphans(self, vertex_ids: List[str], label: str, relationship: str) -> int:
+        """Supprime, par lots de batch_size, les vertices sans relation entrante du type donné"""
+        dropped = 0
+        for start in range(0, len(vertex_ids), self.batch_size):
+            rows = self.execute(
+                f"MATCH (v:{label}) WHERE id(v) IN $ids AND NOT ()-[:{relationship}]->(v) "
+                f"DETACH DELETE v RETURN count(v) AS deleted",
+                {"ids": vertex_ids[start:start + self.batch_size]}
+            )
+            dropped += rows[0]["deleted"] if rows else 0
+        return dropped
@@ -2,7 +2,6 @@
 Module pour l'interaction avec AWS OpenSearch
 """
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
 from typing import List, Dict, Any
 import json
 
@@ -22,6 +21,8 @@ class OpenSearchClient:
             username: Nom d'utilisateur (si pas IAM)
             password: Mot de passe (si pas IAM)
         """
+        from opensearchpy import OpenSearch, RequestsHttpConnection
+        
         self.endpoint = endpoint.replace("https://", "").replace("http://", "")
         self.index_name = index_name
         self.use_iam = use_iam
@@ -136,6 +137,52 @@ class OpenSearchClient:
             print(f"Erreur lors de l'indexation: {e}")
             return document
     
+    def delete_document(self, document_id: str, requests_per_second: float = 500,
+                        scroll_size: int = 1000) -> int:
+        """
+        Supprime tous les chunks d'un document (delete_by_query sur document_id)
+        
+        La suppression est limitée en débit (requests_per_second, par lots de scroll_size
+        documents) pour ne pas pénaliser les recherches concurrentes, et ignore les
+        conflits de version (chunks réindexés pendant la suppression).
+        
+        Args:
+            document_id: Identifiant du document
+            requests_per_second: Débit maximal de suppression (-1 = illimité)
+            scroll_size: Documents supprimés par lot
+            
+        Returns:
+            Nombre de chunks supprimés
+            
+        Raises:
+            RuntimeError: si des chunks n'ont pas pu être supprimés (les erreurs du client
+                          OpenSearch sont propagées): le document ne doit pas être réindexé
+                          par-dessus d'anciens chunks
+        """
+        try:
+            response = self.client.delete_by_query(
+                index=self.index_name,
+                body={"query": {"term": {"document_id": document_id}}},
+                params={
+                    "conflicts": "proceed",
+                    "refresh": "true",
+                    "requests_per_second": requests_per_second,
+                    "scroll_size": scroll_size
+                }
+            )
+        except Exception as e:
+            print(f"✗ Erreur lors de la suppression du document {document_id}: {e}")
+            raise
+        
+        failures = response.get("failures") or []
+        if failures or response.get("timed_out"):
+            raise RuntimeError(f"Suppression incomplète du document {document_id} dans OpenSearch "
+                               f"({len(failures)} échec(s), timed_out={response.get('timed_out', False)})")
+        
+        deleted = response.get("deleted", 0)
+        print(f"✓ {deleted} chunks supprimés d'OpenSearch ({document_id})")
+        return deleted
+    
     def search_similar(self, query_embedding: List[float], top_k: int = 5, 
                       filter_chunk_ids: List[str] = None) -> List[Dict[str, Any]]:
         """
@@ -268,3 +315,46 @@ class OpenSearchClient:
         except Exception as e:
             print(f"Erreur lors de l'indexation batch: {e}")
             return 0
+    
+    def bulk_index_embeddings(self, chunks: List[Dict[str, Any]], embeddings, chunk_size: int = 500) -> int:
+        """
+        Indexe des chunks et leur matrice d'embeddings en batch
+        
+        Les lignes de la matrice (ndarray float32) sont passées telles quelles au
+        sérialiseur JSON d'opensearch-py, qui les convertit une à une au moment de
+        l'envoi: aucune liste Python de floats n'est conservée pour tout le document.
+        
+        Args:
+            chunks: Liste de chunks (issus de DoclingProcessor)
+            embeddings: Matrice (n_chunks, dimension) ou liste d'embeddings
+            chunk_size: Nombre de documents par requête _bulk
+            
+        Returns:
+            Nombre de chunks indexés
+        """
+        from opensearchpy import helpers
+        
+        def actions():
+            for i, chunk in enumerate(chunks):
+                yield {
+                    "_index": self.index_name,
+                    "_id": chunk["id"],
+                    "_source": {
+                        "chunk_id": chunk["id"],
+                        "document_id": chunk["document_id"],
+                        "content": chunk["content"],
+                        "embedding": embeddings[i],
+                        "metadata": dict(chunk["metadata"])
+                    }
+                }
+        
+        try:
+            success, failed = helpers.bulk(self.client, actions(), chunk_size=chunk_size)
+            print(f"✓ {success} chunks indexés en batch")
+            if failed:
+                print(f"✗ {len(failed)} échecs")
+            return success
+            
+        except Exception as e:
+            print(f"Erreur lors de l'indexation batch: {e}")
+            return 0
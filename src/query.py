@@ -10,7 +10,7 @@ from typing import List, Dict, Any
 from datetime import datetime
 
 from embeddings import EmbeddingGenerator
-from neptune_client import NeptuneClient
+from graph_store import create_graph_client
 from opensearch_client import OpenSearchClient
 
 
@@ -37,15 +37,13 @@ class QueryPipeline:
         self.embeddings = EmbeddingGenerator(
             provider=self.config['embeddings']['provider'],
             model_name=self.config['embeddings']['model'],
-            api_key=self.config['embeddings'].get('api_key')
+            api_key=self.config['embeddings'].get('api_key'),
+            dimension=self.config['embeddings']['dimension'],
+            latency_ms=self.config['embeddings'].get('latency_ms', 0)
         )
         
         if not dry_run:
-            self.neptune = NeptuneClient(
-                endpoint=self.config['neptune']['endpoint'],
-                port=self.config['neptune']['port'],
-                use_iam=self.config['neptune']['use_iam']
-            )
+            self.neptune = create_graph_client(self.config['neptune'])
             self.neptune.connect()
             
             self.opensearch = OpenSearchClient(
@@ -192,7 +190,10 @@ class QueryPipeline:
             
             if self.dry_run:
                 # Génération de la requête pour dry-run
-                query = f"MATCH (c:Chunk {{id: '{chunk_id}'}})-[:HAS_ANNOTATION]->(a:Annotation) RETURN a"
+                if self.config['neptune'].get('annotation_mode', 'vertices') == 'properties':
+                    query = f"MATCH (c:Chunk {{id: '{chunk_id}'}}) RETURN c"
+                else:
+                    query = f"MATCH (c:Chunk {{id: '{chunk_id}'}})-[:HAS_ANNOTATION]->(a:Annotation) RETURN a"
                 
                 self.neptune_queries.append({
                     'query_type': 'GET_ANNOTATIONS',
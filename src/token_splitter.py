@@ -0,0 +1,149 @@
+"""
+Module pour le découpage des textes en tokens du modèle d'embeddings
+"""
+
+from typing import List, Tuple
+from collections import OrderedDict
+import os
+
+
+class TokenSplitter:
+    """Découpe les textes en fenêtres de tokens avec un tokenizer rapide (Hugging Face tokenizers)"""
+
+    def __init__(self, tokenizer_name: str, chunk_size: int = 512, chunk_overlap: int = 50,
+                 cache_size: int = 10000):
+        """
+        Initialise le découpeur (le tokenizer est chargé au premier usage)
+
+        Args:
+            tokenizer_name: Identifiant Hugging Face du tokenizer (ex: "Cohere/Cohere-embed-multilingual-v3.0")
+                            ou chemin vers un fichier tokenizer.json
+            chunk_size: Nombre maximal de tokens par chunk
+            chunk_overlap: Chevauchement entre chunks, en tokens
+            cache_size: Nombre de textes dont les offsets de tokens sont conservés
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"Le chevauchement ({chunk_overlap}) doit être inférieur à chunk_size ({chunk_size})")
+
+        self.tokenizer_name = tokenizer_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.cache_size = cache_size
+        self._tokenizer = None
+        self._offsets_cache = OrderedDict()
+
+    @property
+    def tokenizer(self):
+        """Tokenizer rapide, chargé au premier usage"""
+        if self._tokenizer is None:
+            from tokenizers import Tokenizer
+
+            if os.path.isfile(self.tokenizer_name):
+                tokenizer = Tokenizer.from_file(self.tokenizer_name)
+            else:
+                tokenizer = Tokenizer.from_pretrained(self.tokenizer_name)
+
+            # La troncature du modèle masquerait les tokens au-delà de sa limite d'entrée
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+            self._tokenizer = tokenizer
+        return self._tokenizer
+
+    def offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Retourne les offsets (début, fin) en caractères de chaque token du texte
+
+        Le résultat est mis en cache: un texte mesuré puis découpé n'est tokenisé qu'une fois.
+
+        Args:
+            text: Texte à tokeniser
+
+        Returns:
+            Liste d'offsets, un par token (hors tokens spéciaux)
+        """
+        offsets = self._offsets_cache.get(text)
+        if offsets is not None:
+            self._offsets_cache.move_to_end(text)
+            return offsets
+
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        offsets = encoding.offsets
+
+        self._offsets_cache[text] = offsets
+        if len(self._offsets_cache) > self.cache_size:
+            self._offsets_cache.popitem(last=False)
+        return offsets
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Compte les tokens d'un texte
+
+        Args:
+            text: Texte à mesurer
+
+        Returns:
+            Nombre de tokens
+        """
+        return len(self.offsets(text))
+
+    def split(self, text: str, first_size: int = None) -> List[str]:
+        """
+        Découpe un texte en chunks d'au plus chunk_size tokens avec chevauchement
+
+        Args:
+            text: Texte à découper
+            first_size: Nombre maximal de tokens du premier chunk (défaut: chunk_size)
+
+        Returns:
+            Liste de chunks
+        """
+        return [chunk for chunk, _ in self.split_with_counts(text, first_size=first_size)]
+
+    def split_with_counts(self, text: str, first_size: int = None) -> List[Tuple[str, int]]:
+        """
+        Découpe un texte comme split() en retournant le nombre de tokens de chaque chunk,
+        pris dans les offsets du texte (les chunks ne sont pas retokenisés)
+
+        Les coupures sont placées de préférence au début d'un mot (token précédé d'un
+        espace), dans la seconde moitié de la fenêtre, pour ne pas couper les mots.
+
+        Args:
+            text: Texte à découper
+            first_size: Nombre maximal de tokens du premier chunk (défaut: chunk_size),
+                        au moins 2 * chunk_overlap
+
+        Returns:
+            Liste de couples (chunk, nombre de tokens)
+        """
+        offsets = self.offsets(text)
+        if len(offsets) <= (first_size or self.chunk_size):
+            return [(text.strip(), len(offsets))] if text.strip() else []
+
+        chunks = []
+        start = 0
+
+        while start < len(offsets):
+            size = first_size if first_size and start == 0 else self.chunk_size
+            end = min(start + size, len(offsets))
+
+            # Reculer jusqu'à une frontière de mot si la fenêtre coupe un mot
+            if end < len(offsets):
+                boundary = end
+                while boundary > start + size // 2 and offsets[boundary][0] <= offsets[boundary - 1][1]:
+                    boundary -= 1
+                if boundary > start + size // 2:
+                    end = boundary
+
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+            if chunk:
+                chunks.append((chunk, end - start))
+
+            if end >= len(offsets):
+                break
+            # Le chevauchement commence lui aussi au début d'un mot
+            next_start = max(end - self.chunk_overlap, start + 1)
+            while next_start < end and offsets[next_start][0] <= offsets[next_start - 1][1]:
+                next_start += 1
+            start = next_start
+
+        return chunks